@@ -1,17 +1,30 @@
+import asyncio
+import contextlib
 import os
 import time
 import traceback
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 
 import structlog
 from config import settings
-from embed_cv_search import embed_cv_and_search_async
-from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from embed_cv_search import embed_cv_and_search_async, warmup_model
+from fastapi import FastAPI, File, HTTPException, Request, Response, UploadFile
 from fastapi.responses import JSONResponse
-from models import EmbedResponse, HealthResponse
+from metrics import EMPTY_CV_TEXT, observe_stage
+from models import EmbedResponse, HealthResponse, ReadinessResponse, VectorIndexStatus
+from pdf_extract import (
+    PdfExtractionError,
+    extract_text_async,
+    shutdown_pdf_pool,
+    warmup_pdf_pool,
+)
 from prometheus_fastapi_instrumentator import Instrumentator
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from utils import extract_text_from_pdf
+from upload import UploadSizeLimitMiddleware, read_upload
+from utils import load_lexeme_stats, set_lexeme_stats, warmup_pool
+from vector_index import VectorIndex, get_vector_index
 
 structlog.configure(
     processors=[
@@ -22,9 +35,81 @@ structlog.configure(
 )
 logger = structlog.get_logger()
 
-app = FastAPI(title="CV-Embedding Engine API")
+
+async def _refresh_vector_index(index: VectorIndex) -> None:
+    """Load the search snapshot, then poll for new versions (runs in the background)."""
+    while True:
+        if await asyncio.to_thread(index.refresh):
+            state = index.state
+            if state.lexeme_doc_freq:
+                set_lexeme_stats(state.lexeme_doc_freq, state.total_docs)
+        await asyncio.sleep(index.check_interval)
+
+
+# Warmup state behind /health/ready: duration of each completed phase and the
+# error of each failed one. Serving needs the model and an open DB pool.
+_READY_PHASES: frozenset[str] = frozenset({"model", "db_pool"})
+_warmup_phases: dict[str, float] = {}
+_warmup_errors: dict[str, str] = {}
+_ready: bool = False
+
+
+async def _warmup(load_stats: bool) -> None:
+    """Load the model, pre-warm the DB pool and load corpus statistics, timing each phase.
+
+    Ready as soon as the model is loaded and the DB pool is open (bounded by
+    ``settings.db_connect_timeout``); the PDF pool and corpus statistics
+    phases that follow do not hold /health/ready at 503.
+    """
+    global _ready
+    t_start = time.time()
+    phases: list[tuple[str, Callable[[], Awaitable[None]]]] = [
+        ("model", lambda: asyncio.to_thread(warmup_model)),
+        ("db_pool", warmup_pool),
+        ("pdf_pool", lambda: asyncio.to_thread(warmup_pdf_pool)),
+    ]
+    if load_stats:
+        phases.append(("lexeme_stats", load_lexeme_stats))
+    for name, run in phases:
+        t0 = time.time()
+        try:
+            await run()
+        except Exception as e:
+            _warmup_errors[name] = str(e)
+            logger.warning("warmup_phase_failed", phase=name, error=str(e))
+            continue
+        _warmup_phases[name] = round(time.time() - t0, 3)
+        logger.info("warmup_phase", phase=name, duration=_warmup_phases[name])
+        if _READY_PHASES.issubset(_warmup_phases):
+            _ready = True
+    logger.info("warmup_complete", ready=_ready, total_duration=round(time.time() - t_start, 3))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Warm up in the background while already answering /health/live.
+
+    /health/ready turns OK once the model is loaded and the DB pool is open (the
+    Cloud Run startup probe holds traffic until then). With a search snapshot configured, it is loaded in
+    the background too (searches rank embeddings in SQL until it is ready) and
+    provides the lexeme statistics, so they are not queried at startup.
+    """
+    index = get_vector_index()
+    tasks = [asyncio.create_task(_warmup(load_stats=index is None))]
+    if index is not None:
+        tasks.append(asyncio.create_task(_refresh_vector_index(index)))
+    yield
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    shutdown_pdf_pool()
+
+
+app = FastAPI(title="CV-Embedding Engine API", lifespan=lifespan)
 
 Instrumentator().instrument(app).expose(app, endpoint="/metrics")
+app.add_middleware(UploadSizeLimitMiddleware, path="/embed-cv", max_bytes=settings.max_upload_bytes)
 
 limiter = Limiter(key_func=get_remote_address, default_limits=["10/minute"])
 
@@ -37,10 +122,35 @@ async def _rate_limit_handler(request: Request, exc: Exception) -> JSONResponse:
     )
 
 
-@app.get("/health", response_model=HealthResponse)
+@app.get("/health", response_model=HealthResponse, response_model_exclude_none=True)
 async def health() -> HealthResponse:
-    """Health check endpoint for Cloud Run"""
-    return HealthResponse(status="healthy")
+    """Health check endpoint for Cloud Run (with vector replica version/staleness if enabled)"""
+    index = get_vector_index()
+    if index is None:
+        return HealthResponse(status="healthy")
+    return HealthResponse(status="healthy", vector_index=VectorIndexStatus(**index.status()))
+
+
+@app.get("/health/live", response_model=HealthResponse, response_model_exclude_none=True)
+async def health_live() -> HealthResponse:
+    """Liveness: the process is up and serving HTTP (warmup may still be running)"""
+    return HealthResponse(status="alive")
+
+
+@app.get("/health/ready", response_model=ReadinessResponse)
+async def health_ready(response: Response) -> ReadinessResponse:
+    """Readiness: model loaded and DB pool open; 503 until then, with per-phase timings"""
+    if not _ready:
+        response.status_code = 503
+    failed = not _READY_PHASES.isdisjoint(_warmup_errors)
+    return ReadinessResponse(
+        status="ready" if _ready else ("failed" if failed else "warming_up"),
+        phases=_warmup_phases,
+        errors=_warmup_errors,
+    )
+
+
+_PDF_ERROR_STATUS: dict[str, int] = {"too_large": 413, "worker_crashed": 500}
 
 
 @app.post("/embed-cv", response_model=EmbedResponse)
@@ -55,25 +165,35 @@ async def embed_cv(request: Request, file: UploadFile = File(...)) -> EmbedRespo
 
     t_start = time.time()
 
-    file_bytes = await file.read()
+    file_bytes, file_sha256 = await read_upload(file, settings.max_upload_bytes)
     t_read = time.time()
+    observe_stage("file_read", t_read - t_start)
     logger.info(
         "file_read",
         duration=round(t_read - t_start, 2),
         filename=file.filename,
         size_bytes=len(file_bytes),
+        sha256=file_sha256,
     )
 
     try:
-        text = extract_text_from_pdf(file_bytes)
+        text = await extract_text_async(file_bytes)
+    except PdfExtractionError as e:
+        logger.warning("pdf_extract_rejected", code=e.code, reason=e.message)
+        raise HTTPException(
+            status_code=_PDF_ERROR_STATUS.get(e.code, 422),
+            detail={"error": e.code, "message": e.message},
+        ) from e
     except Exception as e:
         logger.error("pdf_extract_error", error=str(e), traceback=traceback.format_exc())
         raise HTTPException(status_code=400, detail=f"Failed to extract text from PDF: {e}") from e
 
     t_extract = time.time()
+    observe_stage("pdf_extract", t_extract - t_read)
     logger.info("pdf_extract", duration=round(t_extract - t_read, 2), text_chars=len(text))
 
     if not text.strip():
+        EMPTY_CV_TEXT.inc()
         logger.warning("empty_cv_text", text_chars=len(text))
         return EmbedResponse(top_jobs=[])
 
@@ -90,6 +210,7 @@ async def embed_cv(request: Request, file: UploadFile = File(...)) -> EmbedRespo
         raise HTTPException(status_code=500, detail=f"Search failed: {e}") from e
 
     t_end = time.time()
+    observe_stage("total", t_end - t_start)
     logger.info(
         "request_complete",
         total_duration=round(t_end - t_start, 2),
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,6 +12,49 @@ class Settings(BaseSettings):
     db_password: str = ""
     db_name: str = ""
     port: int = 8080
+    # Server-side prepare the hybrid query once per pooled connection. Disable
+    # behind a transaction-mode pooler that does not support prepared statements.
+    db_prepare_statements: bool = True
+    # Seconds the startup warmup waits for the pool's first connection before
+    # giving up (the API then stays not ready, see /health/ready).
+    db_connect_timeout: float = 10.0
+
+    # Embedding ranking in the hybrid search: the nearest embedding_coarse_candidates
+    # jobs are retrieved through an HNSW index, on vector(384) for "full" or on the
+    # compact column for "halfvec"/"binary" (see migration 5d1e8b3c7f20), then
+    # ranked exactly. Above 1000 candidates, pgvector's hnsw.ef_search cap applies.
+    embedding_search_mode: Literal["full", "halfvec", "binary"] = "full"
+    embedding_coarse_candidates: int = 1000
+    # Fraction of searches (0-1) that also run the hybrid query under
+    # EXPLAIN (ANALYZE, BUFFERS) and log a per-node summary ("query_plan_sample",
+    # see query_plan.py). Each sampled search runs the query twice.
+    explain_sample_rate: float = 0.0
+
+    # Optional in-process replica of the gold embeddings (see vector_index.py):
+    # local directory or gs:// prefix of the snapshots published by ingest-db.
+    # When set, the embedding top-N (embedding_coarse_candidates) is computed in
+    # memory and Postgres only runs FTS, title ranking and metadata. gs:// versions
+    # are downloaded to vector_snapshot_cache_dir (default: a temp subdirectory).
+    # A version older than vector_snapshot_max_age seconds is reported stale.
+    vector_snapshot_dir: str = ""
+    vector_snapshot_cache_dir: str = ""
+    vector_snapshot_check_interval: float = 60.0
+    vector_snapshot_max_age: int = 129600
+
+    # Largest accepted CV: /embed-cv answers 413 above it while streaming the
+    # upload, and pdf_extract.py rejects bigger documents from any other caller
+    max_upload_bytes: int = 5 * 1024 * 1024
+
+    # CV text extraction runs in a pool of pdf_workers processes (pdf_extract.py),
+    # each document capped in size (max_upload_bytes), page count and CPU
+    # seconds. Text is read from the first pdf_text_pages pages with the
+    # pdf_extractor backend ("pdfminer" / "pypdfium2" need the optional
+    # package, otherwise pypdf is used).
+    pdf_workers: int = 2
+    pdf_max_pages: int = 20
+    pdf_cpu_timeout: float = 5.0
+    pdf_text_pages: int = 5
+    pdf_extractor: Literal["pypdf", "pdfminer", "pypdfium2"] = "pypdf"
 
 
 settings = Settings()
@@ -5,15 +5,15 @@ import re
 import time
 from typing import Any
 
-import aiohttp
+import numpy as np
 import structlog
-import torch
+from config import settings
+from metrics import DEAD_LINKS, LINKS_CHECKED, observe_stage
 from utils import search_jobs_vector_hybrid
+from vector_index import get_vector_index
 
 logger: Any = structlog.get_logger()
 
-torch.set_num_threads(1)
-
 MODEL_NAME: str = "antoinelouis/french-me5-small"
 _device: str = "cpu"
 _model: Any = None
@@ -23,13 +23,23 @@ def _get_model() -> Any:
     global _model
     if _model is None:
         t0 = time.time()
+        # torch / sentence_transformers take seconds to import: deferred to the
+        # first load (the startup warmup) so `import app` stays fast
+        import torch
         from sentence_transformers import SentenceTransformer
 
+        torch.set_num_threads(1)
         _model = SentenceTransformer(MODEL_NAME, device=_device)
         logger.info("model_loaded", cold_start_duration=round(time.time() - t0, 2))
     return _model
 
 
+def warmup_model() -> None:
+    """Load the model and run one dummy encode, so the first request does not pay
+    for lazy weight loading and kernel / allocator initialization."""
+    _get_model().encode("warmup", normalize_embeddings=True)
+
+
 def load_french_stopwords() -> set[str]:
     """Load French stopwords from JSON file"""
     path = os.path.join(os.path.dirname(__file__), "stopwords.json")
@@ -68,6 +78,8 @@ async def verify_job_link(job_id: str, timeout: float = 0.2) -> dict[str, Any]:
     Verify if a job offer link is still available on France Travail.
     Uses aggressive timeout (200ms) to fail fast on dead links.
     """
+    import aiohttp
+
     job_url = f"https://candidat.francetravail.fr/offres/recherche/detail/{job_id}"
     try:
         async with (
@@ -121,6 +133,9 @@ async def filter_dead_jobs(
 
     filtered_jobs: list[dict[str, Any]] = [job for job in top_jobs if job["job_id"] in alive_ids]
     t_end = time.time()
+    observe_stage("link_verification", t_end - t_start)
+    LINKS_CHECKED.inc(len(top_jobs))
+    DEAD_LINKS.inc(dead_count)
     logger.info(
         "link_verification",
         duration=round(t_end - t_start, 3),
@@ -148,6 +163,7 @@ async def embed_cv_and_search(
     # Clean for FTS (French stopwords)
     cv_text_for_fts = clean_text_for_fts(cv_text)
     t1 = time.time()
+    observe_stage("fts_prep", t1 - t0)
     logger.info(
         "fts_preparation",
         duration=round(t1 - t0, 2),
@@ -157,7 +173,10 @@ async def embed_cv_and_search(
 
     # Generate embedding (multilingual model handles French natively)
     try:
-        embedding: list[float] = (await asyncio.to_thread(_get_model().encode, cv_text)).tolist()
+        # Unit-normalized so the search can rank by inner product (= cosine)
+        embedding: list[float] = (
+            await asyncio.to_thread(_get_model().encode, cv_text, normalize_embeddings=True)
+        ).tolist()
     except Exception as e:
         logger.error(
             "embedding_error",
@@ -168,11 +187,39 @@ async def embed_cv_and_search(
         )
         raise
     t2 = time.time()
+    observe_stage("embedding", t2 - t1)
     logger.info("embedding", duration=round(t2 - t1, 2), dim=len(embedding))
 
+    # Embedding top-N from the in-memory replica, if one is configured and loaded
+    embed_candidates: list[str] | None = None
+    index = get_vector_index()
+    replica = index.state if index is not None else None
+    if index is not None and replica is not None and replica.version is not None:
+        # An empty replica falls back to ranking the embeddings in the database
+        embed_candidates = (
+            index.top_n(
+                np.asarray(embedding, dtype=np.float32),
+                settings.embedding_coarse_candidates,
+                replica,
+            )
+            or None
+        )
+        t_replica = time.time()
+        observe_stage("replica_top_n", t_replica - t2)
+        logger.info(
+            "replica_top_n",
+            duration=round(t_replica - t2, 4),
+            version=replica.version,
+            candidates=len(embed_candidates or []),
+        )
+        t2 = t_replica
+
     # Hybrid search
     top_jobs: list[dict[str, Any]] = await search_jobs_vector_hybrid(
-        embedding=embedding, cv_text_fts=cv_text_for_fts, cv_text_orig=cv_text
+        embedding=embedding,
+        cv_text_fts=cv_text_for_fts,
+        cv_text_orig=cv_text,
+        embed_candidates=embed_candidates,
     )
     t3 = time.time()
     logger.info("hybrid_search", duration=round(t3 - t2, 2), results=len(top_jobs))
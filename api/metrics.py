@@ -0,0 +1,50 @@
+from prometheus_client import Counter, Histogram
+
+# Per-stage latency of /embed-cv, exported on the Instrumentator's /metrics
+# (default registry). Buckets span sub-millisecond stages (replica top-N, FTS
+# prep) up to the 30 s worst case of a cold request.
+STAGE_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+STAGE_DURATION = Histogram(
+    "cv_search_stage_duration_seconds",
+    "Duration of each /embed-cv pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+EMPTY_CV_TEXT = Counter(
+    "cv_search_empty_text_total",
+    "Uploads whose PDF yielded no text (answered with no results)",
+)
+EMPTY_FTS_QUERY = Counter(
+    "cv_search_empty_tsquery_total",
+    "Searches whose CV produced no full-text terms (placeholder tsquery used)",
+)
+LINKS_CHECKED = Counter(
+    "cv_search_links_checked_total",
+    "Job offer links checked before returning results",
+)
+DEAD_LINKS = Counter(
+    "cv_search_dead_links_total",
+    "Job offer links found dead and filtered out of the results",
+)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record one stage duration (e.g. ``observe_stage("embedding", t2 - t1)``)."""
+    STAGE_DURATION.labels(stage=stage).observe(seconds)
@@ -28,5 +28,22 @@ class EmbedResponse(BaseModel):
     top_jobs: list[JobResult] = []
 
 
+class VectorIndexStatus(BaseModel):
+    enabled: bool
+    loaded: bool
+    version: str | None = None
+    latest_version: str | None = None
+    rows: int | None = None
+    age_seconds: float | None = None
+    stale: bool | None = None
+
+
+class ReadinessResponse(BaseModel):
+    status: str
+    phases: dict[str, float] = {}
+    errors: dict[str, str] = {}
+
+
 class HealthResponse(BaseModel):
     status: str
+    vector_index: VectorIndexStatus | None = None
@@ -0,0 +1,263 @@
+import asyncio
+import functools
+import importlib.util
+import io
+import multiprocessing
+import signal
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from types import FrameType
+from typing import Any
+
+import structlog
+from config import settings
+
+logger: Any = structlog.get_logger()
+
+# Extra wall-clock time allowed over the CPU budget (worker scheduling, IPC)
+# before the pool is torn down as a last resort.
+_WALL_CLOCK_MARGIN: float = 2.0
+
+_executor: ProcessPoolExecutor | None = None
+# One in-flight document per worker, so the wall-clock bound never counts time
+# spent queued behind other uploads. Keyed by event loop (a semaphore is bound
+# to the loop it first waits on).
+_slots: dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+
+class PdfExtractionError(Exception):
+    """PDF rejected or aborted before text was extracted; ``code`` is returned to the client."""
+
+    def __init__(self, code: str, message: str) -> None:
+        super().__init__(code, message)
+        self.code = code
+        self.message = message
+
+    def __str__(self) -> str:
+        return f"{self.code}: {self.message}"
+
+
+class _CpuTimeoutError(Exception):
+    pass
+
+
+class _PoolResetError(Exception):
+    pass
+
+
+def _check_page_count(count: int, max_pages: int | None) -> None:
+    if max_pages is not None and count > max_pages:
+        raise PdfExtractionError("too_many_pages", f"PDF has {count} pages (max {max_pages})")
+
+
+def _pages_pypdf(file_bytes: bytes, max_pages: int | None, text_pages: int) -> list[str]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(file_bytes))
+    _check_page_count(len(reader.pages), max_pages)
+    return [page.extract_text() or "" for page in reader.pages[:text_pages]]
+
+
+def _pages_pdfminer(file_bytes: bytes, max_pages: int | None, text_pages: int) -> list[str]:
+    # Layout-less mode: TextConverter without LAParams emits characters in
+    # content-stream order, skipping the (costly) layout analysis.
+    from pdfminer.converter import TextConverter
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+
+    document = PDFDocument(PDFParser(io.BytesIO(file_bytes)))
+    _check_page_count(int(resolve1(document.catalog["Pages"]).get("Count", 0)), max_pages)
+    resources = PDFResourceManager(caching=True)
+    texts: list[str] = []
+    for i, page in enumerate(PDFPage.create_pages(document)):
+        if i >= text_pages:
+            break
+        out = io.StringIO()
+        device = TextConverter(resources, out, laparams=None)
+        PDFPageInterpreter(resources, device).process_page(page)
+        device.close()
+        texts.append(out.getvalue())
+    return texts
+
+
+def _pages_pypdfium2(file_bytes: bytes, max_pages: int | None, text_pages: int) -> list[str]:
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(file_bytes)
+    try:
+        _check_page_count(len(pdf), max_pages)
+        texts: list[str] = []
+        for i in range(min(len(pdf), text_pages)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range().replace("\r\n", "\n"))
+            textpage.close()
+            page.close()
+        return texts
+    finally:
+        pdf.close()
+
+
+# PDF_EXTRACTOR backends: page texts of the first text_pages pages, after
+# rejecting documents over max_pages. pdfminer.six and pypdfium2 are optional
+# dependencies; when the configured one is not installed, pypdf is used.
+EXTRACTORS: dict[str, tuple[str, Callable[[bytes, int | None, int], list[str]]]] = {
+    "pypdf": ("pypdf", _pages_pypdf),
+    "pdfminer": ("pdfminer", _pages_pdfminer),
+    "pypdfium2": ("pypdfium2", _pages_pypdfium2),
+}
+
+
+@functools.cache
+def _resolve_extractor(name: str) -> str:
+    module, _ = EXTRACTORS[name]
+    if importlib.util.find_spec(module) is None:
+        logger.warning("pdf_extractor_unavailable", extractor=name, fallback="pypdf")
+        return "pypdf"
+    return name
+
+
+def extract_text_from_pdf(
+    file_bytes: bytes,
+    max_pages: int | None = None,
+    text_pages: int = 1,
+    extractor: str = "pypdf",
+) -> str:
+    """Extract text from the first ``text_pages`` pages of PDF.
+
+    Documents over ``max_pages`` are rejected (PdfExtractionError) before any
+    text is extracted; ``extractor`` names an EXTRACTORS backend.
+    """
+    _, extract_pages = EXTRACTORS[_resolve_extractor(extractor)]
+    pages = extract_pages(file_bytes, max_pages, text_pages)
+    return "\n".join(text.strip() for text in pages if text.strip())
+
+
+def _raise_cpu_timeout(signum: int, frame: FrameType | None) -> None:
+    raise _CpuTimeoutError
+
+
+def _extract_worker(
+    file_bytes: bytes, max_pages: int, text_pages: int, extractor: str, cpu_timeout: float
+) -> str:
+    """Runs in a pool process: extract under a CPU-time budget and a page cap.
+
+    ITIMER_PROF counts the worker's CPU time, so a PDF crafted to make the parser
+    spin is interrupted without killing the worker process.
+    """
+    previous = signal.signal(signal.SIGPROF, _raise_cpu_timeout)
+    signal.setitimer(signal.ITIMER_PROF, cpu_timeout)
+    try:
+        return extract_text_from_pdf(file_bytes, max_pages, text_pages, extractor)
+    except _CpuTimeoutError:
+        raise PdfExtractionError(
+            "timeout", f"PDF extraction exceeded {cpu_timeout}s of CPU time"
+        ) from None
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: never fork the event loop / model threads of the API process
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.pdf_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _reset_executor(expected: ProcessPoolExecutor) -> None:
+    """Kill the pool's workers (a stuck extraction cannot be cancelled otherwise).
+
+    Only if ``expected`` is still the current pool: a late failure from a pool
+    already replaced must not tear down its successor.
+    """
+    global _executor
+    if _executor is not expected:
+        return
+    _executor = None
+    processes = list(getattr(expected, "_processes", {}).values())
+    expected.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.kill()
+    logger.warning("pdf_pool_reset", killed=len(processes))
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the worker processes (app shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def warmup_pdf_pool() -> None:
+    """Start the pool's worker processes ahead of the first upload."""
+    executor = _get_executor()
+    for future in [executor.submit(time.sleep, 0) for _ in range(settings.pdf_workers)]:
+        future.result()
+
+
+async def extract_text_async(file_bytes: bytes) -> str:
+    """Extract the CV text in the PDF process pool without blocking the event loop.
+
+    Raises:
+        PdfExtractionError: over the size or page cap, over the CPU budget, or
+            the worker died. Other parsing errors (e.g. PdfReadError) propagate.
+    """
+    if len(file_bytes) > settings.max_upload_bytes:
+        raise PdfExtractionError(
+            "too_large", f"PDF is {len(file_bytes)} bytes (max {settings.max_upload_bytes})"
+        )
+    loop = asyncio.get_running_loop()
+    slots = _slots.get(loop)
+    if slots is None:
+        _slots.clear()
+        slots = _slots[loop] = asyncio.Semaphore(settings.pdf_workers)
+    async with slots:
+        try:
+            return await _extract_in_pool(loop, file_bytes)
+        except _PoolResetError:
+            # Collateral of another upload's pool reset: retried once, on a fresh pool
+            logger.info("pdf_extraction_retried")
+        try:
+            return await _extract_in_pool(loop, file_bytes)
+        except _PoolResetError:
+            raise PdfExtractionError("worker_crashed", "PDF extraction worker died") from None
+
+
+async def _extract_in_pool(loop: asyncio.AbstractEventLoop, file_bytes: bytes) -> str:
+    """One extraction attempt, bounded by the wall-clock margin.
+
+    Raises ``_PoolResetError`` when the pool died because another extraction
+    reset it, so the caller can retry.
+    """
+    executor = _get_executor()
+    try:
+        future = loop.run_in_executor(
+            executor,
+            _extract_worker,
+            file_bytes,
+            settings.pdf_max_pages,
+            settings.pdf_text_pages,
+            settings.pdf_extractor,
+            settings.pdf_cpu_timeout,
+        )
+        return await asyncio.wait_for(future, settings.pdf_cpu_timeout + _WALL_CLOCK_MARGIN)
+    except TimeoutError:
+        _reset_executor(executor)
+        raise PdfExtractionError(
+            "timeout", f"PDF extraction exceeded {settings.pdf_cpu_timeout}s"
+        ) from None
+    except BrokenProcessPool:
+        if _executor is not executor:
+            raise _PoolResetError from None
+        _reset_executor(executor)
+        raise PdfExtractionError("worker_crashed", "PDF extraction worker died") from None
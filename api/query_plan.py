@@ -0,0 +1,97 @@
+import json
+from typing import Any
+
+import structlog
+from psycopg import AsyncConnection
+
+logger: Any = structlog.get_logger()
+
+# Log event carrying one sampled plan; scripts/plan_samples.py aggregates them.
+SAMPLE_EVENT: str = "query_plan_sample"
+
+
+def _node_label(node: dict[str, Any]) -> str:
+    """Node type plus what it works on, e.g. "Index Scan jobs_title_idx" or "Sort"."""
+    target = node.get("Index Name") or node.get("Relation Name") or node.get("CTE Name")
+    label = str(node["Node Type"])
+    if target:
+        label = f"{label} {target}"
+    if node.get("Subplan Name"):
+        label = f"{node['Subplan Name']}: {label}"
+    return label
+
+
+def summarize_plan(explain: list[dict[str, Any]]) -> dict[str, Any]:
+    """Flatten ``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` output into per-node timings.
+
+    Each node gets its self time (total time across loops minus its children's),
+    row count, shared buffer hits/reads and spill indicators: a sort or hash
+    that went to disk, or temp blocks written.
+    """
+    root = explain[0]
+    nodes: list[dict[str, Any]] = []
+
+    def walk(node: dict[str, Any]) -> float:
+        loops = node.get("Actual Loops", 1) or 1
+        total_ms = float(node.get("Actual Total Time", 0.0)) * loops
+        summary: dict[str, Any] = {"node": _node_label(node)}
+        nodes.append(summary)  # pre-order: parents before their children
+        children_ms = sum(walk(child) for child in node.get("Plans", []))
+        temp_written = node.get("Temp Written Blocks", 0)
+        spilled = (
+            node.get("Sort Space Type") == "Disk"
+            or node.get("Hash Batches", 1) > 1
+            or temp_written > 0
+        )
+        summary |= {
+            "self_ms": round(max(total_ms - children_ms, 0.0), 3),
+            "total_ms": round(total_ms, 3),
+            "rows": node.get("Actual Rows", 0) * loops,
+            "loops": loops,
+            "shared_hit": node.get("Shared Hit Blocks", 0),
+            "shared_read": node.get("Shared Read Blocks", 0),
+            "temp_written": temp_written,
+            "spilled": spilled,
+        }
+        if "Sort Method" in node:
+            summary["sort_method"] = node["Sort Method"]
+            summary["sort_space_kb"] = node.get("Sort Space Used", 0)
+        return total_ms
+
+    walk(root["Plan"])
+    return {
+        "planning_ms": round(root.get("Planning Time", 0.0), 3),
+        "execution_ms": round(root.get("Execution Time", 0.0), 3),
+        "spilled": any(n["spilled"] for n in nodes),
+        "nodes": nodes,
+    }
+
+
+async def log_query_plan(conn: AsyncConnection, sql: str, params: Any, mode: str) -> None:
+    """Re-run ``sql`` under EXPLAIN ANALYZE and log the plan summary.
+
+    Runs in a savepoint of the caller's transaction (so SET LOCAL settings such
+    as work_mem apply) and never raises: a failed sample is only logged.
+    """
+    try:
+        async with conn.transaction(), conn.cursor() as cur:
+            explain_sql = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql  # nosec B608 -- fixed query
+            await cur.execute(explain_sql, params)
+            row = await cur.fetchone()
+        explain = row[0] if row else None
+        if isinstance(explain, str):
+            explain = json.loads(explain)
+        if not explain:
+            return
+        summary = summarize_plan(explain)
+    except Exception as e:
+        logger.warning("query_plan_sample_error", error=str(e), error_type=type(e).__name__)
+        return
+    logger.info(
+        SAMPLE_EVENT,
+        embedding_mode=mode,
+        execution_ms=summary["execution_ms"],
+        spilled=summary["spilled"],
+        # Compact JSON so the sample can be parsed back out of the log line
+        sample=json.dumps(summary, separators=(",", ":")),
+    )
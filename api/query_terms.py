@@ -0,0 +1,72 @@
+import math
+from collections.abc import Mapping
+from typing import Any
+
+import snowballstemmer
+
+# Upper bound on OR-ed terms in the tsquery (ts_rank / ts_headline cost grows with it)
+MAX_QUERY_TERMS: int = 64
+
+# Stems found in more than this share of job offers carry no ranking signal
+MAX_DOC_FREQ_RATIO: float = 0.2
+
+# Same Snowball French algorithm as PostgreSQL's 'french' text search config,
+# so stems line up with the lexemes of lexeme_stats (built with ts_stat).
+_stemmer: Any = snowballstemmer.stemmer("french")
+
+
+def stem(word: str) -> str:
+    """Return the French Snowball stem of a lowercase word."""
+    result: str = _stemmer.stemWord(word)
+    return result
+
+
+def select_query_terms(
+    words: list[str],
+    doc_freq: Mapping[str, int] | None,
+    total_docs: int,
+    max_terms: int = MAX_QUERY_TERMS,
+    max_doc_freq_ratio: float = MAX_DOC_FREQ_RATIO,
+) -> list[str]:
+    """Pick the most discriminative CV words for the FTS query.
+
+    Words are deduplicated by stem (first surface form kept). With corpus
+    statistics, stems above ``max_doc_freq_ratio`` of ``total_docs`` are dropped
+    and the rest ranked by IDF; stems absent from the corpus cannot match any
+    job and only fill remaining slots. Without statistics, the first
+    ``max_terms`` distinct stems are kept in CV order.
+
+    Args:
+        words: Cleaned CV words (see ``clean_text_for_fts``).
+        doc_freq: Stem → number of job offers containing it, or None.
+        total_docs: Number of job offers the statistics were computed on.
+        max_terms: Maximum number of terms returned.
+        max_doc_freq_ratio: Document-frequency ratio above which a stem is dropped.
+
+    Returns:
+        Surface words to OR into the tsquery, most discriminative first.
+    """
+    surface: dict[str, str] = {}
+    for word in words:
+        surface.setdefault(stem(word), word)
+
+    if not doc_freq or total_docs <= 0:
+        return list(surface.values())[:max_terms]
+
+    max_df = max_doc_freq_ratio * total_docs
+    known: list[tuple[float, str]] = []
+    unknown: list[str] = []
+    for s, word in surface.items():
+        df = doc_freq.get(s, 0)
+        if df == 0:
+            unknown.append(word)
+        elif df <= max_df:
+            known.append((math.log(total_docs / df), word))
+
+    known.sort(key=lambda item: item[0], reverse=True)
+    return ([word for _, word in known] + unknown)[:max_terms]
+
+
+def build_tsquery(terms: list[str]) -> str:
+    """OR the terms into a to_tsquery() string, each quoted as a single lexeme."""
+    return " | ".join("'" + term.replace("'", "''") + "'" for term in terms)
@@ -0,0 +1,97 @@
+import hashlib
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Read size when copying an upload out of Starlette's spooled file
+CHUNK_SIZE: int = 64 * 1024
+
+# Multipart framing (boundaries, part headers) allowed on top of the file size
+# when the limit is applied to the raw request body.
+MULTIPART_OVERHEAD: int = 16 * 1024
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail={"error": "too_large", "message": f"Upload exceeds {max_bytes} bytes"},
+    )
+
+
+def _invalid_content_length(value: bytes) -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail={
+            "error": "invalid_content_length",
+            "message": f"Invalid Content-Length header: {value[:32]!r}",
+        },
+    )
+
+
+class UploadSizeLimitMiddleware:
+    """Reject oversize request bodies on ``path`` before they are parsed.
+
+    FastAPI parses the whole multipart body (spooling the file) before the
+    endpoint runs, so the limit is enforced here: on the declared
+    Content-Length up front, and on the bytes actually received for chunked
+    uploads, aborting the parse as soon as the limit is crossed.
+    """
+
+    def __init__(self, app: ASGIApp, path: str, max_bytes: int) -> None:
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+        body_limit = self.max_bytes + MULTIPART_OVERHEAD
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        error = None
+        if content_length is not None:
+            if not content_length.strip().isdigit():
+                error = _invalid_content_length(content_length)
+            elif int(content_length) > body_limit:
+                error = _too_large(self.max_bytes)
+        if error is not None:
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > body_limit:
+                    raise _too_large(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> tuple[bytes, str]:
+    """Read an upload in chunks, enforcing ``max_bytes`` and hashing on the fly.
+
+    Returns:
+        The file bytes and their SHA-256 hex digest (cache key for the CV).
+
+    Raises:
+        HTTPException: 413 once more than ``max_bytes`` have been read.
+    """
+    digest = hashlib.sha256()
+    chunks: list[bytes] = []
+    size = 0
+    while chunk := await file.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(max_bytes)
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
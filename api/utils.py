@@ -1,12 +1,18 @@
-import io
+import functools
+import random
 import re
 import time
 from typing import Any
 
 import structlog
 from config import settings
+from metrics import EMPTY_FTS_QUERY, observe_stage
+from pgvector import Vector
+from pgvector.psycopg import register_vector_async
+from psycopg import AsyncConnection
 from psycopg_pool import AsyncConnectionPool
-from pypdf import PdfReader
+from query_plan import log_query_plan
+from query_terms import build_tsquery, select_query_terms
 
 logger: Any = structlog.get_logger()
 
@@ -28,6 +34,11 @@ FTS_WEIGHTS: list[float] = [0.3, 0.6, 1.0]
 _db_pool: AsyncConnectionPool | None = None
 
 
+async def _configure_connection(conn: AsyncConnection) -> None:
+    """Register the pgvector adapters (binary vector parameters) on each new connection."""
+    await register_vector_async(conn)
+
+
 async def _get_pool() -> AsyncConnectionPool:
     global _db_pool
     if _db_pool is None and settings.db_host:
@@ -35,6 +46,7 @@ async def _get_pool() -> AsyncConnectionPool:
             conninfo=f"host={settings.db_host} dbname={settings.db_name} user={settings.db_user} password={settings.db_password} port={settings.db_port}",
             min_size=1,
             max_size=5,
+            configure=_configure_connection,
         )
         await _db_pool.open()
     if _db_pool is None:
@@ -42,13 +54,68 @@ async def _get_pool() -> AsyncConnectionPool:
     return _db_pool
 
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    """Extract text from first page of PDF"""
-    reader = PdfReader(io.BytesIO(file_bytes))
-    text = ""
-    if reader.pages:
-        text = reader.pages[0].extract_text() or ""
-    return text.strip()
+async def warmup_pool() -> None:
+    """Open the pool, wait for its initial connections and run a round-trip on one.
+
+    Raises psycopg_pool.PoolTimeout if no connection is up within
+    ``settings.db_connect_timeout`` seconds.
+    """
+    pool = await _get_pool()
+    await pool.wait(timeout=settings.db_connect_timeout)
+    async with pool.connection() as conn:
+        await conn.execute("SELECT 1")
+
+
+# Corpus document frequency per French lexeme (lexeme_stats, maintained by
+# ingest-db). Loaded once per process, at startup, into a plain dict so query
+# term weighting costs no DB round-trip.
+_lexeme_doc_freq: dict[str, int] = {}
+_lexeme_total_docs: int = 0
+_lexeme_stats_loaded_at: float | None = None
+
+
+async def _load_lexeme_stats(conn: AsyncConnection) -> None:
+    """Load lexeme_stats into memory using ``conn``.
+
+    Falls back to empty statistics (plain term cap, no IDF) if the table is
+    missing or the load fails; the failure is confined to a savepoint and not
+    retried until the next load_lexeme_stats() call.
+    """
+    global _lexeme_doc_freq, _lexeme_total_docs, _lexeme_stats_loaded_at
+    t0 = time.time()
+    try:
+        async with conn.transaction(), conn.cursor() as cur:
+            await cur.execute("SELECT lexeme, ndoc FROM lexeme_stats")
+            rows = await cur.fetchall()
+            await cur.execute("SELECT count(*) FROM jobs_gold WHERE fts_tokens IS NOT NULL")
+            count_row = await cur.fetchone()
+        _lexeme_doc_freq = dict(rows)
+        _lexeme_total_docs = int(count_row[0]) if count_row else 0
+        logger.info(
+            "lexeme_stats_loaded",
+            lexemes=len(_lexeme_doc_freq),
+            total_docs=_lexeme_total_docs,
+            duration=round(time.time() - t0, 3),
+        )
+    except Exception as e:
+        logger.warning("lexeme_stats_unavailable", error=str(e), error_type=type(e).__name__)
+    _lexeme_stats_loaded_at = t0
+
+
+def set_lexeme_stats(doc_freq: dict[str, int], total_docs: int) -> None:
+    """Use lexeme statistics obtained elsewhere (the search snapshot) instead of the DB."""
+    global _lexeme_doc_freq, _lexeme_total_docs, _lexeme_stats_loaded_at
+    _lexeme_doc_freq = doc_freq
+    _lexeme_total_docs = total_docs
+    _lexeme_stats_loaded_at = time.time()
+    logger.info("lexeme_stats_set", lexemes=len(doc_freq), total_docs=total_docs)
+
+
+async def load_lexeme_stats() -> None:
+    """Load lexeme_stats into memory (called from the app startup hook)."""
+    pool = await _get_pool()
+    async with pool.connection() as conn:
+        await _load_lexeme_stats(conn)
 
 
 def extract_french_keywords_from_headline(headline: Any) -> list[str]:
@@ -84,71 +151,116 @@ def _build_fts_weights_literal() -> str:
     return "{" + ", ".join(str(w) for w in weights) + "}"
 
 
-async def search_jobs_vector_hybrid(
-    embedding: list[float], cv_text_fts: str, cv_text_orig: str
-) -> list[dict[str, Any]]:
-    """
-    Hybrid job search combining FTS + embedding + title via Reciprocal Rank Fusion.
-
-    Ranks jobs independently by embedding similarity, FTS relevance, and title match,
-    then fuses ranks using RRF: score(d) = 1/(k+rank_embed) + 1/(k+rank_fts) + w*1/(k+rank_title).
-
-    Returns top 100 jobs sorted by RRF combined score.
-    """
-    t_start = time.time()
-
-    pool = await _get_pool()
-    async with pool.connection() as conn:
-        t_conn = time.time()
-        logger.info("db_connection", duration=round(t_conn - t_start, 3))
-        logger.info("fts_prep", fts_chars=len(cv_text_fts), embedding_dim=len(embedding))
-
-        fts_terms = cv_text_fts.split()[:1000]
-        tsquery = " | ".join(f"'{term}'" for term in fts_terms) if fts_terms else ""
-        if not tsquery:
-            logger.warning(
-                "empty_fts_query",
-                fts_chars=len(cv_text_fts),
-                original_chars=len(cv_text_orig),
-            )
-            tsquery = "'placeholder'"
-        embedding_str = "[" + ",".join(map(str, embedding)) + "]"
-        fts_weights_literal = _build_fts_weights_literal()
-
-        # Two-stage query: (1) rank all jobs by RRF and keep the top-K, then
-        # (2) compute the expensive ts_headline snippet ONLY on those K rows.
-        # ts_headline does not influence ranking (it only feeds keyword
-        # highlighting), so restricting it to the final top-K is result-preserving
-        # while avoiding highlighting the full corpus on every request.
-        sql = """
-        WITH ranked AS (
+# Embedding rank CTE per EMBEDDING_SEARCH_MODE. Each mode takes the nearest
+# coarse_limit candidates with an index-friendly ORDER BY ... LIMIT: "full" on
+# the float32 vector (HNSW vector_ip_ops, migration 9b4f6a2d1e57), the compact
+# modes on the halfvec/binary column, then ranks only those by exact distance.
+# Jobs outside the candidates share rank coarse_limit + 1.
+# Embeddings are L2-normalized at encode time, so the negative inner product
+# (<#>, the cheapest pgvector operator) orders exactly like cosine distance.
+# The coarse ORDER BY reads the query vector through a scalar subquery (an
+# InitPlan), which keeps the HNSW index usable.
+# "replica" is used when the API ranked the embeddings in memory (vector_index.py):
+# the candidate ids arrive best-first and their position is the rank.
+_EMBED_RANK_CTES: dict[str, str] = {
+    "full": """
+            SELECT c.job_id, ROW_NUMBER() OVER (ORDER BY c.distance) as embed_rank
+            FROM (
+                SELECT job_id, embedding <#> (SELECT q FROM params) AS distance
+                FROM jobs_gold
+                WHERE fts_tokens IS NOT NULL
+                ORDER BY embedding <#> (SELECT q FROM params)
+                LIMIT %(coarse_limit)s
+            ) c
+    """,
+    "halfvec": """
+            SELECT c.job_id, ROW_NUMBER() OVER (ORDER BY c.embedding <#> p.q) as embed_rank
+            FROM (
+                SELECT job_id, embedding
+                FROM jobs_gold
+                WHERE fts_tokens IS NOT NULL
+                ORDER BY embedding_half <#> (SELECT q::halfvec(384) FROM params)
+                LIMIT %(coarse_limit)s
+            ) c
+            CROSS JOIN params p
+    """,
+    "binary": """
+            SELECT c.job_id, ROW_NUMBER() OVER (ORDER BY c.embedding <#> p.q) as embed_rank
+            FROM (
+                SELECT job_id, embedding
+                FROM jobs_gold
+                WHERE fts_tokens IS NOT NULL
+                ORDER BY embedding_bin <~> (SELECT binary_quantize(q)::bit(384) FROM params)
+                LIMIT %(coarse_limit)s
+            ) c
+            CROSS JOIN params p
+    """,
+    "replica": """
+            SELECT e.job_id, e.embed_rank
+            FROM unnest(%(embed_ids)s::text[]) WITH ORDINALITY AS e(job_id, embed_rank)
+    """,
+}
+
+# pgvector's HNSW scan returns at most hnsw.ef_search rows (default 40, at most
+# 1000): raised to the candidate count so the coarse stages are not truncated.
+_HNSW_EF_SEARCH_MAX: int = 1000
+
+
+def _hnsw_ef_search() -> int:
+    return max(40, min(int(settings.embedding_coarse_candidates), _HNSW_EF_SEARCH_MAX))
+
+
+# Two-stage query: (1) rank all jobs by RRF and keep the top-K, then
+# (2) compute the expensive ts_headline snippet ONLY on those K rows.
+# ts_headline does not influence ranking (it only feeds keyword
+# highlighting), so restricting it to the final top-K is result-preserving
+# while avoiding highlighting the full corpus on every request.
+# The exact embedding_score is likewise only computed for the final K.
+# Every input is bound exactly once (named placeholders map to a single $n)
+# and parsed once in the params CTE; the embedding travels as a binary
+# pgvector parameter (%(embedding)b) instead of a ~8 KB text literal.
+_HYBRID_SQL_TEMPLATE: str = """
+        WITH params AS MATERIALIZED (
+            SELECT
+                %(embedding)b::vector(384) AS q,
+                to_tsquery('french', %(tsquery)s) AS tsq,
+                %(fts_weights)s::float4[] AS weights
+        ),
+        embed AS (
+            {embed_cte}
+        ),
+        ranked AS (
             SELECT
                 jg.job_id,
-                (1 - (jg.embedding <-> %s))::float8 as embedding_score,
-                COALESCE(ts_rank(%s::float4[], jg.fts_tokens, to_tsquery('french', %s)), 0)::float8 as fts_score,
+                COALESCE(ts_rank(p.weights, jg.fts_tokens, p.tsq), 0)::float8 as fts_score,
                 js.intitule,
                 js.entreprise->>'nom' AS entreprise,
                 js.lieuTravail->>'libelle' AS lieu,
                 js.typeContratLibelle,
                 js.dateCreation,
-                ROW_NUMBER() OVER (ORDER BY (1 - (jg.embedding <-> %s)) DESC) as embed_rank,
-                ROW_NUMBER() OVER (ORDER BY COALESCE(ts_rank(%s::float4[], jg.fts_tokens, to_tsquery('french', %s)), 0) DESC) as fts_rank,
-                ROW_NUMBER() OVER (ORDER BY COALESCE(ts_rank(js.title_tsv, to_tsquery('french', %s), 2), 0) DESC) as title_rank
+                COALESCE(e.embed_rank, %(coarse_limit)s + 1) as embed_rank,
+                ROW_NUMBER() OVER (ORDER BY COALESCE(ts_rank(p.weights, jg.fts_tokens, p.tsq), 0) DESC) as fts_rank,
+                ROW_NUMBER() OVER (ORDER BY COALESCE(ts_rank(js.title_tsv, p.tsq, 2), 0) DESC) as title_rank
             FROM jobs_gold jg
             JOIN jobs_silver js ON jg.job_id = js.job_id
+            CROSS JOIN params p
+            LEFT JOIN embed e ON e.job_id = jg.job_id
             WHERE jg.fts_tokens IS NOT NULL
         ),
         top_ranked AS (
             SELECT
-                job_id, embedding_score, fts_score,
-                (1.0 / (%s + embed_rank) + 1.0 / (%s + fts_rank) + %s * 1.0 / (%s + title_rank))::float8 as combined_score,
+                job_id, fts_score,
+                (1.0 / (%(rrf_k)s + embed_rank) + 1.0 / (%(rrf_k)s + fts_rank)
+                    + %(title_weight)s * 1.0 / (%(rrf_k)s + title_rank))::float8 as combined_score,
                 intitule, entreprise, lieu, typeContratLibelle, dateCreation
             FROM ranked
             ORDER BY combined_score DESC
-            LIMIT %s
+            LIMIT %(top_k)s
         )
         SELECT
-            t.job_id, t.embedding_score, t.fts_score, t.combined_score,
+            t.job_id,
+            (-(jg.embedding <#> p.q))::float8 as embedding_score,
+            t.fts_score, t.combined_score,
             t.intitule, t.entreprise, t.lieu, t.typeContratLibelle, t.dateCreation,
             ts_headline('french',
                 js.intitule || ' ' || COALESCE(js.description, '') || ' ' ||
@@ -156,37 +268,105 @@ async def search_jobs_vector_hybrid(
                           FROM jsonb_array_elements(js.competences) AS elem), '') || ' ' ||
                 COALESCE((SELECT string_agg((elem->>'libelle') || ' ' || (elem->>'description'), ' ')
                           FROM jsonb_array_elements(js.qualitesprofessionnelles) AS elem), ''),
-                to_tsquery('french', %s),
+                p.tsq,
                 'StartSel=<b>, StopSel=</b>, MaxWords=100, MinWords=50') as headline
         FROM top_ranked t
         JOIN jobs_silver js ON js.job_id = t.job_id
+        JOIN jobs_gold jg ON jg.job_id = t.job_id
+        CROSS JOIN params p
         ORDER BY t.combined_score DESC;
-        """
+"""
+
+
+@functools.cache
+def build_hybrid_sql(mode: str) -> str:
+    """Return the hybrid search SQL for an EMBEDDING_SEARCH_MODE (stable text per mode,
+    so each pooled connection prepares it once)."""
+    return _HYBRID_SQL_TEMPLATE.format(embed_cte=_EMBED_RANK_CTES[mode])
+
+
+def build_hybrid_params(
+    embedding: list[float], tsquery: str, embed_ids: list[str] | None = None
+) -> dict[str, Any]:
+    """Return the named parameters of the hybrid search SQL (``embed_ids`` for "replica")."""
+    return {
+        "embedding": Vector(embedding),
+        "tsquery": tsquery,
+        "fts_weights": _build_fts_weights_literal(),
+        "coarse_limit": settings.embedding_coarse_candidates,
+        "rrf_k": RRF_K,
+        "title_weight": TITLE_WEIGHT,
+        "top_k": TOP_K,
+        "embed_ids": embed_ids,
+    }
+
+
+async def search_jobs_vector_hybrid(
+    embedding: list[float],
+    cv_text_fts: str,
+    cv_text_orig: str,
+    embed_candidates: list[str] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Hybrid job search combining FTS + embedding + title via Reciprocal Rank Fusion.
+
+    Ranks jobs independently by embedding similarity, FTS relevance, and title match,
+    then fuses ranks using RRF: score(d) = 1/(k+rank_embed) + 1/(k+rank_fts) + w*1/(k+rank_title).
+    If ``embed_candidates`` (job ids, best first) is given, the embedding ranking
+    was already done in memory and is used instead of ranking in the database.
+
+    Returns top 100 jobs sorted by RRF combined score.
+    """
+    t_start = time.time()
+    mode = "replica" if embed_candidates is not None else settings.embedding_search_mode
+
+    pool = await _get_pool()
+    async with pool.connection() as conn:
+        t_conn = time.time()
+        observe_stage("db_connection", t_conn - t_start)
+        logger.info("db_connection", duration=round(t_conn - t_start, 3))
+        logger.info(
+            "fts_prep",
+            fts_chars=len(cv_text_fts),
+            embedding_dim=len(embedding),
+            embedding_mode=mode,
+        )
+
+        if _lexeme_stats_loaded_at is None:
+            # Not loaded at startup (e.g. DB unreachable then): one attempt now
+            await _load_lexeme_stats(conn)
+        cv_words = cv_text_fts.split()
+        fts_terms = select_query_terms(cv_words, _lexeme_doc_freq, _lexeme_total_docs)
+        tsquery = build_tsquery(fts_terms)
+        logger.info(
+            "fts_terms",
+            cv_words=len(cv_words),
+            selected=len(fts_terms),
+            corpus_docs=_lexeme_total_docs,
+        )
+        if not tsquery:
+            EMPTY_FTS_QUERY.inc()
+            logger.warning(
+                "empty_fts_query",
+                fts_chars=len(cv_text_fts),
+                original_chars=len(cv_text_orig),
+            )
+            tsquery = "'placeholder'"
+        sql = build_hybrid_sql(mode)
+        params = build_hybrid_params(embedding, tsquery, embed_candidates)
 
         async with conn.cursor() as cur:
             try:
-                # Keep the 3 ranking sorts (embedding, FTS, title over the full
-                # corpus) in memory instead of spilling to disk. Scoped to this
-                # transaction via SET LOCAL, so it never leaks to pooled sessions.
-                await cur.execute("SET LOCAL work_mem = '64MB'")
+                # Keep the ranking sorts (FTS and title over the full corpus) in
+                # memory instead of spilling to disk, and let the HNSW scans
+                # return every coarse candidate. Transaction-local (like SET
+                # LOCAL), so neither leaks to pooled sessions.
                 await cur.execute(
-                    sql,
-                    (
-                        embedding_str,
-                        fts_weights_literal,
-                        tsquery,
-                        embedding_str,
-                        fts_weights_literal,
-                        tsquery,
-                        tsquery,
-                        RRF_K,
-                        RRF_K,
-                        TITLE_WEIGHT,
-                        RRF_K,
-                        TOP_K,
-                        tsquery,
-                    ),
+                    "SELECT set_config('work_mem', '64MB', true), "
+                    "set_config('hnsw.ef_search', %s, true)",
+                    (str(_hnsw_ef_search()),),
                 )
+                await cur.execute(sql, params, prepare=settings.db_prepare_statements)
                 results = await cur.fetchall()
             except Exception as e:
                 logger.error(
@@ -199,7 +379,11 @@ async def search_jobs_vector_hybrid(
                 )
                 raise
 
-    t_query = time.time()
+        t_query = time.time()
+        observe_stage("db_query", t_query - t_conn)
+        if random.random() < settings.explain_sample_rate:
+            await log_query_plan(conn, sql, params, mode)
+
     logger.info("query_execution", duration=round(t_query - t_conn, 3), results=len(results))
 
     # Process results (already sorted by combined_score)
@@ -234,6 +418,7 @@ async def search_jobs_vector_hybrid(
         )
 
     t_process = time.time()
+    observe_stage("headline_processing", t_process - t_query)
     logger.info("processing", duration=round(t_process - t_query, 3))
 
     # Summary stats
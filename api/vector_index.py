@@ -0,0 +1,249 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+import numpy as np
+import structlog
+from config import settings
+
+logger: Any = structlog.get_logger()
+
+# Snapshot layout (written by functions/ingest-db/snapshot.py), local or gs://:
+#   {root}/LATEST                       name of the current version directory
+#   {root}/{version}/job_ids.npy        fixed-width unicode array, shape (n,)
+#   {root}/{version}/embeddings.npy     float32 unit vectors, shape (n, 384)
+#   {root}/{version}/{intitule,entreprise,lieu,type_contrat,date_creation}.npy
+#   {root}/{version}/lexemes.npy        lexeme_stats lexemes, with lexeme_ndoc.npy (int32)
+#   {root}/{version}/meta.json          {"version", "rows", "dim", "dtype", "total_docs", "created_at"}
+# The API maps only what it uses: ids, embeddings and the lexeme statistics.
+LATEST_FILE: str = "LATEST"
+VERSION_FORMAT: str = "%Y%m%d_%H%M%S"
+_REMOTE_PREFIX: str = "gs://"
+
+
+@dataclass(frozen=True)
+class IndexState:
+    """One loaded snapshot version: replaced as a whole, never mutated.
+
+    Readers bind ``VectorIndex.state`` once, so ids, embeddings and lexeme
+    statistics always come from the same version even if a refresh swaps the
+    state while they run.
+    """
+
+    version: str | None = None
+    job_ids: np.ndarray | None = None
+    embeddings: np.ndarray | None = None
+    lexeme_doc_freq: dict[str, int] = field(default_factory=dict)
+    total_docs: int = 0
+    created_at: float | None = None
+    loaded_at: float | None = None
+
+
+class VectorIndex:
+    """In-memory replica of jobs_gold embeddings, memory-mapped from a snapshot.
+
+    Embedding top-N is one matrix-vector product over the mapped matrix; a new
+    snapshot version is picked up by polling the LATEST pointer at most every
+    ``check_interval`` seconds (the old arrays stay valid for in-flight requests).
+    A ``gs://`` root is first copied to ``cache_dir``, since only local files
+    can be memory-mapped. Snapshots published before float32 (float16
+    embeddings) are upcast into RAM instead: n x 1.5 KB resident, on top of
+    the previous version's matrix until the swap completes.
+    """
+
+    def __init__(self, root: str, check_interval: float = 60.0, cache_dir: str = "") -> None:
+        self.root = root.rstrip("/")
+        self.check_interval = check_interval
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "cvee-snapshots")
+        self.latest_version: str | None = None
+        # Swapped by a single assignment in load() (a worker thread)
+        self.state = IndexState()
+        self._last_check: float = 0.0
+        self._fs: Any = None
+
+    @property
+    def version(self) -> str | None:
+        return self.state.version
+
+    @property
+    def job_ids(self) -> np.ndarray | None:
+        return self.state.job_ids
+
+    @property
+    def embeddings(self) -> np.ndarray | None:
+        return self.state.embeddings
+
+    @property
+    def lexeme_doc_freq(self) -> dict[str, int]:
+        return self.state.lexeme_doc_freq
+
+    @property
+    def total_docs(self) -> int:
+        return self.state.total_docs
+
+    @property
+    def remote(self) -> bool:
+        return self.root.startswith(_REMOTE_PREFIX)
+
+    def _remote_fs(self) -> Any:
+        if self._fs is None:
+            import gcsfs
+
+            self._fs = gcsfs.GCSFileSystem()
+        return self._fs
+
+    def _read_latest(self) -> str | None:
+        latest_path = f"{self.root}/{LATEST_FILE}"
+        try:
+            if self.remote:
+                content: bytes = self._remote_fs().cat(latest_path)
+                return content.decode("utf-8").strip() or None
+            with open(latest_path, encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _local_path(self, version: str) -> str:
+        """Local directory of ``version``, downloading it first for a gs:// root."""
+        if not self.remote:
+            return os.path.join(self.root, version)
+        path = os.path.join(self.cache_dir, version)
+        if not os.path.isdir(path):
+            t0 = time.time()
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = tempfile.mkdtemp(prefix=f".{version}.", dir=self.cache_dir)
+            self._remote_fs().get(f"{self.root}/{version}/", tmp_path, recursive=True)
+            os.replace(tmp_path, path)
+            logger.info(
+                "vector_snapshot_downloaded",
+                version=version,
+                duration=round(time.time() - t0, 3),
+            )
+        # Keep the version being loaded and the current one (still mapped by requests)
+        for name in os.listdir(self.cache_dir):
+            if name not in (version, self.version) and not name.startswith("."):
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+        return path
+
+    def load(self, version: str) -> None:
+        """Map the arrays of ``version`` and make them current."""
+        t0 = time.time()
+        path = self._local_path(version)
+        job_ids = np.load(os.path.join(path, "job_ids.npy"), mmap_mode="r")
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        if embeddings.dtype != np.float32:
+            # Older float16 snapshot: BLAS has no half-precision matmul, so upcast
+            # once (a full in-RAM copy, not mapped) instead of per request
+            logger.warning("vector_snapshot_upcast", version=version, dtype=str(embeddings.dtype))
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(job_ids) != len(embeddings):
+            raise ValueError(f"Snapshot {version}: {len(job_ids)} ids for {len(embeddings)} rows")
+        meta: dict[str, Any] = {}
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        lexeme_doc_freq: dict[str, int] = {}
+        lexemes_path = os.path.join(path, "lexemes.npy")
+        if os.path.exists(lexemes_path):
+            lexemes = np.load(lexemes_path)
+            ndoc = np.load(os.path.join(path, "lexeme_ndoc.npy"))
+            lexeme_doc_freq = dict(zip(lexemes.tolist(), ndoc.tolist(), strict=True))
+
+        state = IndexState(
+            version=version,
+            job_ids=job_ids,
+            embeddings=embeddings,
+            lexeme_doc_freq=lexeme_doc_freq,
+            total_docs=int(meta.get("total_docs", len(job_ids))),
+            created_at=(
+                float(meta["created_at"])
+                if "created_at" in meta
+                else datetime.strptime(version, VERSION_FORMAT).replace(tzinfo=UTC).timestamp()
+            ),
+            loaded_at=time.time(),
+        )
+        self.state = state
+        logger.info(
+            "vector_index_loaded",
+            version=version,
+            rows=len(job_ids),
+            lexemes=len(lexeme_doc_freq),
+            duration=round(time.time() - t0, 3),
+        )
+
+    def refresh(self, force: bool = False) -> bool:
+        """Load the published version if it changed (polls at most every check_interval).
+
+        Returns True if a new version was loaded.
+        """
+        now = time.time()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        try:
+            self.latest_version = self._read_latest()
+            if self.latest_version is None or self.latest_version == self.version:
+                return False
+            self.load(self.latest_version)
+        except Exception as e:
+            logger.error("vector_index_load_error", root=self.root, error=str(e))
+            return False
+        return True
+
+    def top_n(self, query: np.ndarray, n: int, state: IndexState | None = None) -> list[str]:
+        """Return the ids of the ``n`` jobs with the highest inner product, best first.
+
+        ``state`` pins the version to rank (default: the current one, bound once
+        for the whole call whatever a concurrent refresh does).
+        """
+        state = state or self.state
+        if state.embeddings is None or state.job_ids is None or len(state.job_ids) == 0:
+            return []
+        scores = state.embeddings @ query.astype(np.float32, copy=False)
+        n = min(n, len(scores))
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top])]
+        return [str(job_id) for job_id in state.job_ids[top]]
+
+    def status(self) -> dict[str, Any]:
+        """Version and staleness of the loaded snapshot, as of the last poll (for /health)."""
+        state = self.state
+        if state.version is None or state.created_at is None:
+            return {"enabled": True, "loaded": False, "version": None}
+        age = time.time() - state.created_at
+        return {
+            "enabled": True,
+            "loaded": True,
+            "version": state.version,
+            "latest_version": self.latest_version,
+            "rows": 0 if state.job_ids is None else len(state.job_ids),
+            "age_seconds": round(age, 1),
+            "stale": self.latest_version != state.version or age > settings.vector_snapshot_max_age,
+        }
+
+
+_vector_index: VectorIndex | None = None
+
+
+def get_vector_index() -> VectorIndex | None:
+    """Return the process-wide replica, or None if VECTOR_SNAPSHOT_DIR is unset.
+
+    The replica is loaded and refreshed in the background (see the app lifespan);
+    until then its ``version`` is None and searches rank embeddings in SQL.
+    """
+    global _vector_index
+    if not settings.vector_snapshot_dir:
+        return None
+    if _vector_index is None:
+        _vector_index = VectorIndex(
+            settings.vector_snapshot_dir,
+            settings.vector_snapshot_check_interval,
+            settings.vector_snapshot_cache_dir,
+        )
+    return _vector_index
@@ -0,0 +1,86 @@
+"""File size and read cost of the gold Parquet formats, old and canonical.
+
+Writes the same N unit embeddings in the three gold formats found in the
+bucket — one JSON string per row (former Databricks export), list<double>
+(former Polars pipeline) and FixedSizeList<float32, 384> (canonical, written
+by core.build_gold and databricks/export.py) — then times, for each: the
+Parquet read, the decode into the float32 matrix ingest-db loads
+(gcs_sync.gold_embeddings) and the binary COPY payload built from it.
+
+Usage:
+    uv run python bench/gold_format.py --rows 50000
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "functions" / "ingest-db"))
+from gcs_sync import gold_copy_payload, gold_embeddings  # noqa: E402
+
+DIM = 384
+
+
+def gold_tables(n: int, seed: int = 0) -> dict[str, pa.Table]:
+    x = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    job_ids = pa.array([f"J{i:08d}" for i in range(n)])
+    return {
+        "json_string": pa.table(
+            {"job_id": job_ids, "embedding": [json.dumps(row.tolist()) for row in x]}
+        ),
+        "list_double": pa.table(
+            {"job_id": job_ids, "embedding": pa.array(x.astype(np.float64).tolist())}
+        ),
+        "fixed_size_list_float32": pa.table(
+            {"job_id": job_ids, "embedding": pa.FixedSizeListArray.from_arrays(x.ravel(), DIM)}
+        ),
+    }
+
+
+def _best_of(fn, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def bench(n: int, repeat: int) -> dict:
+    report = {}
+    for name, table in gold_tables(n).items():
+        buf = io.BytesIO()
+        pq.write_table(table, buf)
+        data = buf.getvalue()
+        read_s, read = _best_of(lambda: pq.read_table(io.BytesIO(data)), repeat)  # noqa: B023
+        decode_s, decoded = _best_of(lambda: gold_embeddings(read), repeat)  # noqa: B023
+        copy_s, _ = _best_of(lambda: gold_copy_payload(*decoded), repeat)  # noqa: B023
+        report[name] = {
+            "file_mb": round(len(data) / 2**20, 2),
+            "read_ms": round(1000 * read_s, 1),
+            "decode_ms": round(1000 * decode_s, 1),
+            "copy_payload_ms": round(1000 * copy_s, 1),
+        }
+        print(json.dumps({name: report[name]}), file=sys.stderr)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N timings")
+    args = parser.parse_args()
+    print(json.dumps({"rows": args.rows, "formats": bench(args.rows, args.repeat)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Recall@100 of the compact embedding modes against the full-precision ranking.
+
+Compares the "halfvec" and "binary" EMBEDDING_SEARCH_MODE (coarse candidates on
+the compact representation, exact rescoring of those candidates) with the exact
+float32 top-100, either offline with NumPy or against the database.
+
+Usage:
+    # Offline: embeddings from a gold Parquet file, or a synthetic corpus
+    uv run python bench/halfvec_recall.py --gold jobs_gold_20260101_000000.parquet
+    uv run python bench/halfvec_recall.py --synthetic 20000
+
+    # Database (DB_* from .env), after migration 5d1e8b3c7f20
+    uv run python bench/halfvec_recall.py --db --queries 50
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+TOP_K = 100
+DIM = 384
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def load_gold_embeddings(path: str) -> np.ndarray:
+    """Load gold embeddings (list or JSON string per row) as a unit-norm float32 matrix."""
+    import pandas as pd
+
+    values = pd.read_parquet(path, columns=["embedding"])["embedding"]
+    rows = [json.loads(v) if isinstance(v, str) else v for v in values]
+    return _normalize(np.asarray(rows, dtype=np.float32))
+
+
+def synthetic_embeddings(n: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors (closer to real job embeddings than pure noise)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 200, 1), DIM)).astype(np.float32)
+    labels = rng.integers(0, len(centers), n)
+    return _normalize(centers[labels] + 0.5 * rng.standard_normal((n, DIM)).astype(np.float32))
+
+
+def _top_k_ip(corpus: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    dist = -(corpus @ query)  # pgvector <#>: negative inner product
+    idx = np.argpartition(dist, min(k, len(dist) - 1))[:k]
+    return idx[np.argsort(dist[idx])]
+
+
+def _rescore(corpus: np.ndarray, query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    return candidates[_top_k_ip(corpus[candidates], query, TOP_K)]
+
+
+def offline_recall(corpus: np.ndarray, n_queries: int, coarse: int) -> dict[str, float]:
+    """Average recall@100 of each compact mode, queries = perturbed corpus rows."""
+    rng = np.random.default_rng(1)
+    half = corpus.astype(np.float16).astype(np.float32)
+    bits = np.packbits(corpus > 0, axis=1)
+    popcount = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+    recalls: dict[str, list[float]] = {"halfvec": [], "binary": []}
+    timings: dict[str, float] = {"full": 0.0, "halfvec": 0.0, "binary": 0.0}
+    for qi in rng.choice(len(corpus), size=min(n_queries, len(corpus)), replace=False):
+        query = _normalize(corpus[qi] + 0.1 * rng.standard_normal(DIM).astype(np.float32))
+
+        t0 = time.perf_counter()
+        exact = set(_top_k_ip(corpus, query, TOP_K).tolist())
+        t1 = time.perf_counter()
+        cand = _top_k_ip(half, query.astype(np.float16).astype(np.float32), coarse)
+        approx_half = set(_rescore(corpus, query, cand).tolist())
+        t2 = time.perf_counter()
+        qbits = np.packbits(query > 0)
+        hamming = popcount[np.bitwise_xor(bits, qbits)].sum(axis=1)
+        cand = np.argpartition(hamming, min(coarse, len(hamming) - 1))[:coarse]
+        approx_bin = set(_rescore(corpus, query, cand).tolist())
+        t3 = time.perf_counter()
+
+        recalls["halfvec"].append(len(exact & approx_half) / len(exact))
+        recalls["binary"].append(len(exact & approx_bin) / len(exact))
+        timings["full"] += t1 - t0
+        timings["halfvec"] += t2 - t1
+        timings["binary"] += t3 - t2
+
+    n = len(recalls["halfvec"])
+    return {
+        "recall_halfvec": float(np.mean(recalls["halfvec"])),
+        "recall_binary": float(np.mean(recalls["binary"])),
+        **{f"ms_{mode}": 1000 * t / n for mode, t in timings.items()},
+    }
+
+
+DB_COARSE_SQL = {
+    "halfvec": "ORDER BY embedding_half <#> %s::halfvec(384)",
+    "binary": "ORDER BY embedding_bin <~> binary_quantize(%s::vector)::bit(384)",
+}
+
+
+def db_recall(n_queries: int, coarse: int) -> dict[str, float]:
+    """Average recall@100 of each compact mode on the live jobs_gold table."""
+    import psycopg
+
+    load_dotenv()
+    conninfo = (
+        f"host={os.getenv('DB_HOST')} dbname={os.getenv('DB_NAME')} user={os.getenv('DB_USER')} "
+        f"password={os.getenv('DB_PASSWORD')} port={os.getenv('DB_PORT', '5432')}"
+    )
+    recalls: dict[str, list[float]] = {"halfvec": [], "binary": []}
+    timings: dict[str, float] = {"full": 0.0, "halfvec": 0.0, "binary": 0.0}
+    with psycopg.connect(conninfo) as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT embedding::text FROM jobs_gold WHERE embedding_half IS NOT NULL "
+            "ORDER BY random() LIMIT %s",
+            (n_queries,),
+        )
+        queries = [row[0] for row in cur.fetchall()]
+        for q in queries:
+            t0 = time.perf_counter()
+            cur.execute(
+                "SELECT job_id FROM jobs_gold ORDER BY embedding <#> %s::vector LIMIT %s",
+                (q, TOP_K),
+            )
+            exact = {row[0] for row in cur.fetchall()}
+            timings["full"] += time.perf_counter() - t0
+            for mode, coarse_order in DB_COARSE_SQL.items():
+                t0 = time.perf_counter()
+                cur.execute(
+                    f"""
+                    SELECT job_id FROM (
+                        SELECT job_id, embedding FROM jobs_gold {coarse_order} LIMIT %s
+                    ) c
+                    ORDER BY embedding <#> %s::vector
+                    LIMIT %s
+                    """,  # nosec B608 -- coarse_order from a fixed dict
+                    (q, coarse, q, TOP_K),
+                )
+                approx = {row[0] for row in cur.fetchall()}
+                timings[mode] += time.perf_counter() - t0
+                recalls[mode].append(len(exact & approx) / max(len(exact), 1))
+
+    n = max(len(queries), 1)
+    return {
+        "recall_halfvec": float(np.mean(recalls["halfvec"] or [0.0])),
+        "recall_binary": float(np.mean(recalls["binary"] or [0.0])),
+        **{f"ms_{mode}": 1000 * t / n for mode, t in timings.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--gold", help="Gold Parquet file (job_id, embedding)")
+    source.add_argument("--synthetic", type=int, help="Number of synthetic embeddings")
+    source.add_argument("--db", action="store_true", help="Query jobs_gold via DB_* env")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--coarse", type=int, default=1000, help="Coarse candidate count")
+    args = parser.parse_args()
+
+    if args.db:
+        result = db_recall(args.queries, args.coarse)
+    else:
+        corpus = (
+            load_gold_embeddings(args.gold) if args.gold else synthetic_embeddings(args.synthetic)
+        )
+        result = offline_recall(corpus, args.queries, args.coarse)
+    print(json.dumps({"top_k": TOP_K, "coarse": args.coarse, **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Speed and fidelity of the PDF_EXTRACTOR backends on generated CV fixtures.
+
+For each fixture (bench/pdf_fixtures.py) and each installed backend, reports
+extraction throughput (chars/second) and fidelity against the known page text:
+word recall (share of ground-truth words recovered, as a multiset) and the
+character similarity ratio. The "pypdf_first_page" row is the previous
+behaviour (first page only).
+
+Usage:
+    uv run python bench/pdf_backends.py
+    uv run python bench/pdf_backends.py --repeat 20 --text-pages 10
+"""
+
+import argparse
+import difflib
+import importlib.util
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "api"))
+sys.path.insert(0, str(PROJECT_ROOT / "bench"))
+from pdf_extract import EXTRACTORS, extract_text_from_pdf  # noqa: E402
+from pdf_fixtures import FIXTURES, make_pdf  # noqa: E402
+
+
+def fidelity(extracted: str, truth: str) -> dict[str, float]:
+    expected = Counter(truth.split())
+    found = Counter(extracted.split())
+    recall = sum((expected & found).values()) / max(sum(expected.values()), 1)
+    similarity = difflib.SequenceMatcher(None, extracted, truth, autojunk=False).ratio()
+    return {"word_recall": round(recall, 4), "char_similarity": round(similarity, 4)}
+
+
+def bench(pdf: bytes, truth: str, extractor: str, text_pages: int, repeat: int) -> dict:
+    text = extract_text_from_pdf(pdf, None, text_pages, extractor)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        extract_text_from_pdf(pdf, None, text_pages, extractor)
+    per_doc = (time.perf_counter() - t0) / repeat
+    return {
+        "ms_per_doc": round(1000 * per_doc, 2),
+        "chars_per_s": round(len(text) / per_doc) if per_doc else 0,
+        **fidelity(text, truth),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--text-pages", type=int, default=5)
+    args = parser.parse_args()
+
+    backends = [
+        name for name, (module, _) in EXTRACTORS.items() if importlib.util.find_spec(module)
+    ]
+    report: dict[str, dict] = {}
+    for fixture, params in FIXTURES.items():
+        pdf, pages = make_pdf(**params)
+        truth = "\n".join(pages[: args.text_pages])
+        rows = {"pypdf_first_page": bench(pdf, truth, "pypdf", 1, args.repeat)}
+        for backend in backends:
+            rows[backend] = bench(pdf, truth, backend, args.text_pages, args.repeat)
+        report[fixture] = {"bytes": len(pdf), "pages": len(pages), **rows}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Event-loop responsiveness while concurrent uploads are being parsed.
+
+Runs N concurrent CV extractions on the API event loop, either inline (the
+previous path: pypdf called synchronously from the async handler) or in the
+PDF process pool (pdf_extract.extract_text_async), while a ticker coroutine
+measures how late the loop wakes it up. Lag is what every other request
+(health checks, searches awaiting the DB) waits on.
+
+Usage:
+    uv run python bench/pdf_extraction.py
+    uv run python bench/pdf_extraction.py --concurrency 16 --fixture image_heavy
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "api"))
+sys.path.insert(0, str(PROJECT_ROOT / "bench"))
+from pdf_extract import (  # noqa: E402
+    extract_text_async,
+    extract_text_from_pdf,
+    shutdown_pdf_pool,
+    warmup_pdf_pool,
+)
+from pdf_fixtures import FIXTURES, make_pdf  # noqa: E402
+
+TICK_S = 0.005
+
+
+async def _ticker(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK_S)
+        lags.append(time.perf_counter() - t0 - TICK_S)
+
+
+async def _inline(pdf: bytes) -> str:
+    return extract_text_from_pdf(pdf)
+
+
+async def run(mode: str, pdf: bytes, concurrency: int) -> dict[str, float]:
+    extract = _inline if mode == "inline" else extract_text_async
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    await asyncio.sleep(TICK_S * 2)
+    t0 = time.perf_counter()
+    await asyncio.gather(*[extract(pdf) for _ in range(concurrency)])
+    wall = time.perf_counter() - t0
+    stop.set()
+    await ticker
+    ordered = sorted(lags) or [0.0]
+    return {
+        "wall_s": round(wall, 3),
+        "docs_per_s": round(concurrency / wall, 1),
+        "loop_lag_p50_ms": round(1000 * statistics.median(ordered), 2),
+        "loop_lag_p99_ms": round(1000 * ordered[int(len(ordered) * 0.99) - 1], 2),
+        "loop_lag_max_ms": round(1000 * ordered[-1], 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--fixture", choices=sorted(FIXTURES), action="append")
+    args = parser.parse_args()
+
+    warmup_pdf_pool()
+    report: dict[str, object] = {}
+    for name in args.fixture or sorted(FIXTURES):
+        pdf, _ = make_pdf(**FIXTURES[name])
+        report[name] = {
+            "bytes": len(pdf),
+            **{mode: asyncio.run(run(mode, pdf, args.concurrency)) for mode in ("inline", "pool")},
+        }
+    shutdown_pdf_pool()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
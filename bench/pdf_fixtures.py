@@ -0,0 +1,140 @@
+"""Synthetic CV-like PDFs for the extraction benchmarks (no external dependency).
+
+Each page holds lines of French CV vocabulary in Helvetica (WinAnsi encoding,
+so accented characters round-trip) and optionally a large Flate-compressed RGB
+image, to mimic the multi-page and image-heavy CVs users upload.
+"""
+
+import random
+import zlib
+
+WORDS = [
+    "développeur",
+    "ingénieur",
+    "données",
+    "python",
+    "sql",
+    "cloud",
+    "gcp",
+    "docker",
+    "kubernetes",
+    "fastapi",
+    "spark",
+    "airflow",
+    "analyse",
+    "modélisation",
+    "équipe",
+    "projet",
+    "client",
+    "gestion",
+    "expérience",
+    "compétences",
+    "formation",
+    "master",
+    "licence",
+    "stage",
+    "alternance",
+    "autonomie",
+    "rigueur",
+    "communication",
+    "anglais",
+    "courant",
+    "français",
+    "pilotage",
+    "déploiement",
+    "sécurité",
+    "réseau",
+]
+
+
+def _escape(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def make_pdf(
+    pages: int = 1,
+    lines_per_page: int = 40,
+    image_px: int = 0,
+    seed: int = 0,
+) -> tuple[bytes, list[str]]:
+    """Build a PDF and return it with the text of each page (ground truth).
+
+    Args:
+        pages: Number of pages.
+        lines_per_page: Text lines per page (8-12 words each).
+        image_px: If > 0, each page also draws a noisy image_px x image_px RGB image.
+        seed: Random seed (same arguments → same bytes).
+    """
+    rng = random.Random(seed)
+    objects: list[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog_id = add(b"")  # filled in once the page tree id is known
+    pages_id = add(b"")
+    font_id = add(b"<</Type/Font/Subtype/Type1/BaseFont/Helvetica/Encoding/WinAnsiEncoding>>")
+
+    page_ids: list[int] = []
+    page_texts: list[str] = []
+    for _ in range(pages):
+        lines = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 12)))
+            for _ in range(lines_per_page)
+        ]
+        page_texts.append("\n".join(lines))
+
+        ops = [b"BT /F1 10 Tf 12 TL 50 780 Td"]
+        ops += [b"(" + _escape(line) + b") Tj T*" for line in lines]
+        ops.append(b"ET")
+        resources = b"/Font<</F1 %d 0 R>>" % font_id
+        if image_px:
+            pixels = bytes(rng.getrandbits(8) for _ in range(image_px * image_px * 3))
+            data = zlib.compress(pixels)
+            image_id = add(
+                b"<</Type/XObject/Subtype/Image/Width %d/Height %d/ColorSpace/DeviceRGB"
+                b"/BitsPerComponent 8/Filter/FlateDecode/Length %d>>stream\n"
+                % (image_px, image_px, len(data))
+                + data
+                + b"\nendstream"
+            )
+            resources += b"/XObject<</Im1 %d 0 R>>" % image_id
+            ops.append(b"q 200 0 0 200 350 50 cm /Im1 Do Q")
+        stream = b"\n".join(ops)
+        content_id = add(b"<</Length %d>>stream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(
+            add(
+                b"<</Type/Page/Parent %d 0 R/MediaBox[0 0 595 842]/Resources<<%s>>"
+                b"/Contents %d 0 R>>" % (pages_id, resources, content_id)
+            )
+        )
+
+    objects[catalog_id - 1] = b"<</Type/Catalog/Pages %d 0 R>>" % pages_id
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[pages_id - 1] = b"<</Type/Pages/Kids[%s]/Count %d>>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref_start = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer<</Size %d/Root %d 0 R>>\nstartxref\n%d\n%%%%EOF" % (
+        len(objects) + 1,
+        catalog_id,
+        xref_start,
+    )
+    return bytes(out), page_texts
+
+
+FIXTURES: dict[str, dict[str, int]] = {
+    "one_page": {"pages": 1},
+    "two_pages": {"pages": 2},
+    "multi_page": {"pages": 8},
+    "image_heavy": {"pages": 2, "image_px": 600},
+}
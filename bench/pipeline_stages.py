@@ -0,0 +1,214 @@
+"""Throughput and peak memory of each ETL stage on synthetic Bronze files.
+
+Writes F synthetic raw files totalling N France Travail-like offers (HTML
+descriptions, nested competences / formations / qualities, ~5% duplicate ids
+across files) to an fsspec URL — memory:// by default, file:// to include
+real disk I/O — then runs the pipeline stages of functions/pipeline/core.py
+one by one: load, dedup, clean, aggregate, embed, silver, write and,
+optionally, ingest (functions/ingest-db/gcs_sync.main into PostgreSQL).
+
+Reports per stage: seconds, rows/s, peak RSS during the stage and its growth
+over the RSS at stage start (sampled every few ms, so Rust/Arrow allocations
+that tracemalloc cannot see are included).
+
+Usage:
+    uv run python bench/pipeline_stages.py --offers 20000
+    uv run python bench/pipeline_stages.py --offers 5000 --embed random --url file:///tmp/lake
+    # With ingest into the docker-compose database (DB_* from .env)
+    uv run python bench/pipeline_stages.py --offers 5000 --url file:///tmp/lake --ingest
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import structlog
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "functions" / "pipeline"))
+sys.path.insert(0, str(PROJECT_ROOT / "functions" / "ingest-db"))
+sys.path.insert(0, str(PROJECT_ROOT / "bench"))
+import core  # noqa: E402
+from synthetic_corpus import TITLES, french_text  # noqa: E402
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:  # not Linux: peak RSS so far (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+@contextmanager
+def measure(report: dict, stage: str, rows: int):
+    """Time a stage and sample its peak RSS from a background thread."""
+    start_rss = _rss_bytes()
+    peak = [start_rss]
+    stop = threading.Event()
+
+    def sample() -> None:
+        while not stop.wait(0.005):
+            peak[0] = max(peak[0], _rss_bytes())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        stop.set()
+        sampler.join()
+        peak[0] = max(peak[0], _rss_bytes())
+        report[stage] = {
+            "seconds": round(seconds, 3),
+            "rows": rows,
+            "rows_per_s": round(rows / seconds) if seconds else None,
+            "peak_rss_mb": round(peak[0] / 2**20, 1),
+            "rss_growth_mb": round((peak[0] - start_rss) / 2**20, 1),
+        }
+        print(json.dumps({stage: report[stage]}), file=sys.stderr)
+
+
+def synthetic_offer(rng: random.Random, offer_id: str) -> dict:
+    """One raw offer with the nested fields the pipeline reads."""
+    paragraphs = "".join(f"<p>{french_text(rng, rng.randint(20, 80))}</p>" for _ in range(4))
+    return {
+        "id": offer_id,
+        "intitule": rng.choice(TITLES).capitalize(),
+        "description": f"<h2>Missions</h2>{paragraphs}&nbsp;<br/>",
+        "dateCreation": "2026-01-15T08:00:00.000Z",
+        "lieuTravail": {"libelle": "75 - Paris", "codePostal": "75001"},
+        "entreprise": {"nom": f"Entreprise {rng.randrange(5000)}", "entrepriseAdaptee": False},
+        "salaire": {"libelle": "Annuel de 35000 Euros à 45000 Euros"},
+        "competences": [
+            {"code": str(rng.randrange(10**5, 10**6)), "libelle": french_text(rng, 4)}
+            for _ in range(rng.randint(1, 8))
+        ],
+        "formations": [{"domaineLibelle": french_text(rng, 2), "niveauLibelle": "Bac+3"}],
+        "qualitesProfessionnelles": [
+            {"libelle": french_text(rng, 2), "description": french_text(rng, 15)}
+            for _ in range(rng.randint(0, 3))
+        ],
+        "typeContrat": rng.choice(["CDI", "CDD", "MIS"]),
+        "nombrePostes": rng.randint(1, 3),
+    }
+
+
+def write_bronze(url: str, offers: int, files: int, seed: int = 0) -> list[str]:
+    """Write ``offers`` synthetic offers split over ``files`` raw parquet files."""
+    fs, root = core.open_bucket(url)
+    rng = random.Random(seed)
+    per_file = -(-offers // files)
+    paths = []
+    for i in range(files):
+        start = i * per_file
+        # ~5% of each file re-publishes offers of the previous one (updates)
+        ids = [f"B{n:08d}" for n in range(start, min(start + per_file, offers))]
+        if i:
+            ids[: len(ids) // 20] = [f"B{start - 1 - n:08d}" for n in range(len(ids) // 20)]
+        df = pl.DataFrame([synthetic_offer(rng, offer_id) for offer_id in ids])
+        path = f"{root}/{core.PREFIX_RAW}/jobs_raw_20260115_{i:06d}.parquet"
+        with fs.open(path, "wb") as f:
+            df.write_parquet(f)
+        paths.append(path)
+    return paths
+
+
+def _random_embeddings(n: int) -> np.ndarray:
+    x = np.random.default_rng(0).standard_normal((n, 384)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def run(url: str, offers: int, files: int, embed: str, ingest: bool) -> dict:
+    report: dict = {}
+    raw_files = write_bronze(url, offers, files)
+    fs, root = core.open_bucket(url)
+
+    with measure(report, "load", offers):
+        dfs = []
+        for rf in raw_files:
+            with fs.open(rf, "rb") as f:
+                dfs.append(pl.read_parquet(f, use_pyarrow=True))
+        df = pl.concat(dfs, how="diagonal_relaxed")
+    with measure(report, "dedup", df.height):
+        df = core._deduplicate(df)
+    with measure(report, "clean", df.height):
+        df = core.clean_descriptions(df)
+    with measure(report, "aggregate", df.height):
+        df = core.build_vector_text(df)
+    texts = df["vector_text_input"].fill_null("").to_list()
+    if embed == "model":
+        model = core.SentenceTransformer(core.MODEL_NAME, device="cpu")
+        with measure(report, "embed", len(texts)):
+            embeddings = core.embed_texts(texts, model)
+    else:
+        with measure(report, "embed", len(texts)):
+            embeddings = _random_embeddings(len(texts))
+    with measure(report, "silver", df.height):
+        df_silver = core.build_silver(df)
+        df_gold = core.build_gold(df_silver["job_id"].to_list(), embeddings)
+    manifests = f"{root}/{core.PREFIX_BATCHES}/batch_*.json"
+    published_before = set(fs.glob(manifests))
+    with measure(report, "write", df.height):
+        outputs = core.write_outputs(fs, root, df_silver, df_gold)
+    outputs = [*outputs, *(set(fs.glob(manifests)) - published_before)]
+
+    if ingest:
+        from dotenv import load_dotenv
+        from gcs_sync import main as ingest_main
+
+        load_dotenv()
+        with measure(report, "ingest", df.height):
+            ingest_main(
+                bucket_name=url,
+                sb_host=os.getenv("DB_HOST"),
+                sb_port=int(os.getenv("DB_PORT", "5432")),
+                sb_user=os.getenv("DB_USER"),
+                sb_password=os.getenv("DB_PASSWORD"),
+                sb_name=os.getenv("DB_NAME"),
+            )
+    fs.rm(raw_files + outputs)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--offers", type=int, default=10000)
+    parser.add_argument("--files", type=int, default=3, help="raw files (days of backfill)")
+    parser.add_argument("--url", default="memory://bench-lake", help="fsspec bucket URL")
+    parser.add_argument(
+        "--embed",
+        choices=["model", "random"],
+        default="model",
+        help="random: skip the model to measure the other stages quickly",
+    )
+    parser.add_argument("--ingest", action="store_true", help="also ingest into DB_* (.env)")
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    stages = run(args.url, args.offers, args.files, args.embed, args.ingest)
+    print(
+        json.dumps(
+            {"url": args.url, "offers": args.offers, "files": args.files, "stages": stages},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Parse / plan / bind overhead of the hybrid search query.
+
+Compares the previous request path (embedding as a ~8 KB text literal, inputs
+re-sent per placeholder, statement parsed and planned on every call) with the
+current one (named inputs bound once, binary pgvector parameter, server-side
+prepared statement reused per connection).
+
+Usage:
+    # Client-side only: parameter encoding + psycopg query conversion
+    uv run python bench/query_overhead.py
+
+    # Also against the database (DB_* from .env): planning time and
+    # end-to-end latency of unprepared/text vs prepared/binary
+    uv run python bench/query_overhead.py --db --iterations 50
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "api"))
+from utils import build_hybrid_params, build_hybrid_sql  # noqa: E402
+
+TSQUERY = " | ".join(f"'{w}'" for w in ["python", "data", "engineer", "sql", "cloud"] * 40)
+
+
+def _text_literal(embedding: list[float]) -> str:
+    return "[" + ",".join(map(str, embedding)) + "]"
+
+
+def _ms(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean_ms": 1000 * statistics.fmean(ordered),
+        "p50_ms": 1000 * ordered[len(ordered) // 2],
+        "p95_ms": 1000 * ordered[int(len(ordered) * 0.95) - 1],
+    }
+
+
+def client_side(embedding: list[float], iterations: int) -> dict[str, object]:
+    """Cost of encoding the embedding parameter, text literal vs pgvector binary."""
+    from pgvector import Vector
+
+    t_text, t_bin = [], []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        literal = _text_literal(embedding)
+        t1 = time.perf_counter()
+        binary = Vector(embedding).to_binary()
+        t2 = time.perf_counter()
+        t_text.append(t1 - t0)
+        t_bin.append(t2 - t1)
+    return {
+        "text_literal": {"bytes": len(literal.encode()), "times_sent": 2, **_ms(t_text)},
+        "binary_vector": {"bytes": len(binary), "times_sent": 1, **_ms(t_bin)},
+    }
+
+
+def database(embedding: list[float], iterations: int, mode: str) -> dict[str, object]:
+    """Planning time and end-to-end latency of both request paths."""
+    import psycopg
+    from pgvector.psycopg import register_vector
+
+    load_dotenv(PROJECT_ROOT / ".env")
+    conninfo = (
+        f"host={os.getenv('DB_HOST')} dbname={os.getenv('DB_NAME')} user={os.getenv('DB_USER')} "
+        f"password={os.getenv('DB_PASSWORD')} port={os.getenv('DB_PORT', '5432')}"
+    )
+    sql = build_hybrid_sql(mode)
+    params = build_hybrid_params(embedding, TSQUERY)
+    # Previous path: text literal embedding, no server-side prepare
+    text_sql = sql.replace("%(embedding)b", "%(embedding)s")
+    text_params = {**params, "embedding": _text_literal(embedding)}
+
+    with psycopg.connect(conninfo, autocommit=True) as conn:
+        register_vector(conn)
+        cur = conn.cursor()
+        cur.execute(f"EXPLAIN (SUMMARY ON, FORMAT JSON) {text_sql}", text_params)
+        planning_ms = cur.fetchone()[0][0]["Planning Time"]
+
+        timings: dict[str, list[float]] = {"unprepared_text": [], "prepared_binary": []}
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            cur.execute(text_sql, text_params, prepare=False)
+            cur.fetchall()
+            t1 = time.perf_counter()
+            cur.execute(sql, params, prepare=True)
+            cur.fetchall()
+            t2 = time.perf_counter()
+            timings["unprepared_text"].append(t1 - t0)
+            timings["prepared_binary"].append(t2 - t1)
+
+    return {
+        "planning_ms": planning_ms,
+        **{name: _ms(samples) for name, samples in timings.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", action="store_true", help="Also run against the database")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--mode", default="full", choices=["full", "halfvec", "binary"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vec = rng.standard_normal(384).astype(np.float32)
+    embedding = (vec / np.linalg.norm(vec)).tolist()
+
+    report: dict[str, object] = {"client": client_side(embedding, args.iterations)}
+    if args.db:
+        report["database"] = database(embedding, args.iterations, args.mode)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
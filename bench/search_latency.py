@@ -0,0 +1,134 @@
+"""Latency and throughput of the hybrid search at several corpus sizes and concurrencies.
+
+For each corpus size, grows (or shrinks) the synthetic corpus of
+bench/synthetic_corpus.py to that size, then replays the same CV texts and
+query embeddings through the API's search path (clean_text_for_fts +
+utils.search_jobs_vector_hybrid, with the API's connection pool and settings)
+at each concurrency level. The embedding model is not run: query vectors are
+synthetic, so only the search itself is measured.
+
+Reports per (size, concurrency): p50/p95/p99/max latency and searches/second,
+as JSON (stdout, or --output for regression tracking).
+
+Usage:
+    docker compose up -d postgres && uv run alembic upgrade head
+    uv run python bench/search_latency.py                      # DB_* from .env
+    uv run python bench/search_latency.py --sizes 10000,100000 --concurrency 1,4,16 \\
+        --queries 100 --output search_latency.json
+    EMBEDDING_SEARCH_MODE=halfvec uv run python bench/search_latency.py
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import structlog
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "api"))
+sys.path.insert(0, str(PROJECT_ROOT / "bench"))
+import utils  # noqa: E402
+from config import settings  # noqa: E402
+from embed_cv_search import clean_text_for_fts  # noqa: E402
+from synthetic_corpus import cv_texts, query_embeddings, seed_corpus  # noqa: E402
+
+
+def _percentiles(latencies: list[float]) -> dict[str, float]:
+    ordered = sorted(latencies)
+
+    def pct(q: float) -> float:
+        return 1000 * ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+    return {
+        "p50_ms": round(1000 * statistics.median(ordered), 2),
+        "p95_ms": round(pct(0.95), 2),
+        "p99_ms": round(pct(0.99), 2),
+        "max_ms": round(1000 * ordered[-1], 2),
+    }
+
+
+async def _search(text: str, embedding: list[float]) -> float:
+    t0 = time.perf_counter()
+    await utils.search_jobs_vector_hybrid(
+        embedding=embedding, cv_text_fts=clean_text_for_fts(text), cv_text_orig=text
+    )
+    return time.perf_counter() - t0
+
+
+async def replay(
+    queries: list[tuple[str, list[float]]], concurrency: int
+) -> dict[str, float | int]:
+    """Run every query once with at most ``concurrency`` searches in flight."""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run(text: str, embedding: list[float]) -> float:
+        async with slots:
+            return await _search(text, embedding)
+
+    t0 = time.perf_counter()
+    latencies = await asyncio.gather(*(run(text, emb) for text, emb in queries))
+    wall = time.perf_counter() - t0
+    return {
+        "queries": len(latencies),
+        "searches_per_s": round(len(latencies) / wall, 2),
+        **_percentiles(latencies),
+    }
+
+
+async def bench(sizes: list[int], levels: list[int], n_queries: int, seed: int) -> dict:
+    queries = list(zip(cv_texts(n_queries, seed), query_embeddings(n_queries, seed), strict=True))
+    corpora, results = [], []
+    for size in sizes:
+        corpora.append(await asyncio.to_thread(seed_corpus, size, seed))
+        await utils.load_lexeme_stats()
+        # Warm-up: prepared statements, buffer cache, lexeme stats
+        await replay(queries[: min(5, len(queries))], 1)
+        for concurrency in levels:
+            results.append(
+                {
+                    "corpus_jobs": size,
+                    "concurrency": concurrency,
+                    **await replay(queries, concurrency),
+                }
+            )
+            print(json.dumps(results[-1]), file=sys.stderr)
+    pool = await utils._get_pool()
+    await pool.close()
+    return {
+        "embedding_search_mode": settings.embedding_search_mode,
+        "prepare_statements": settings.db_prepare_statements,
+        "pool_max_size": pool.max_size,
+        "python": platform.python_version(),
+        "corpus": corpora,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000", help="corpus sizes (comma list)")
+    parser.add_argument("--concurrency", default="1,4,8", help="in-flight searches (comma list)")
+    parser.add_argument("--queries", type=int, default=50, help="searches per level")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    levels = [int(c) for c in args.concurrency.split(",")]
+    # Keep stdout for the report: drop the per-search info logs
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    report = asyncio.run(bench(sizes, levels, args.queries, args.seed))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
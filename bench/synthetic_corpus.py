@@ -0,0 +1,329 @@
+"""Synthetic job corpus for the search benchmarks (local docker-compose database).
+
+Generates N job offers with French-like titles and descriptions (Zipf-distributed
+vocabulary, so the FTS statistics look like a real corpus), JSONB competences
+and qualities, and clustered unit-norm 384-dim embeddings, then loads them
+with COPY into jobs_silver/jobs_gold under "bench-" ids. Row i is a pure
+function of (seed, i): growing the corpus from 10k to 100k only inserts the
+missing rows, and the same arguments always produce the same corpus.
+
+After loading it fills jobs_gold.fts_tokens (weighted title / description /
+competences tsvector), the compact embedding columns when they exist, rebuilds
+lexeme_stats and runs ANALYZE.
+
+Usage:
+    docker compose up -d postgres && uv run alembic upgrade head
+    uv run python bench/synthetic_corpus.py --jobs 50000     # DB_* from .env
+    uv run python bench/synthetic_corpus.py --reset           # delete bench rows
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "api"))
+from config import settings  # noqa: E402
+
+DIM = 384
+N_CLUSTERS = 64
+ID_PREFIX = "bench-"
+
+TITLES = [
+    "développeur python",
+    "ingénieur données",
+    "data analyst",
+    "chef de projet informatique",
+    "administrateur systèmes",
+    "technicien support",
+    "comptable",
+    "assistant administratif",
+    "commercial terrain",
+    "infirmier",
+    "aide-soignant",
+    "cuisinier",
+    "serveur",
+    "électricien",
+    "plombier",
+    "conducteur poids lourd",
+    "préparateur de commandes",
+    "vendeur",
+    "responsable logistique",
+    "chargé de recrutement",
+]
+
+VOCABULARY = [
+    "expérience",
+    "équipe",
+    "projet",
+    "client",
+    "gestion",
+    "compétences",
+    "formation",
+    "poste",
+    "missions",
+    "entreprise",
+    "développement",
+    "analyse",
+    "données",
+    "qualité",
+    "sécurité",
+    "production",
+    "maintenance",
+    "logistique",
+    "commercial",
+    "relation",
+    "service",
+    "accueil",
+    "organisation",
+    "planification",
+    "reporting",
+    "budget",
+    "suivi",
+    "amélioration",
+    "processus",
+    "python",
+    "sql",
+    "cloud",
+    "docker",
+    "kubernetes",
+    "spark",
+    "airflow",
+    "excel",
+    "sap",
+    "java",
+    "javascript",
+    "réseau",
+    "linux",
+    "windows",
+    "comptabilité",
+    "facturation",
+    "paie",
+    "négociation",
+    "prospection",
+    "vente",
+    "soins",
+    "patients",
+    "hygiène",
+    "cuisine",
+    "restauration",
+    "chantier",
+    "électricité",
+    "plomberie",
+    "conduite",
+    "livraison",
+    "stock",
+    "inventaire",
+    "recrutement",
+    "autonomie",
+    "rigueur",
+    "polyvalence",
+    "anglais",
+    "permis",
+    "horaires",
+    "week-end",
+    "télétravail",
+]
+# Zipf weights: a few very frequent words, a long tail of rare ones
+VOCABULARY_WEIGHTS = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+
+CONTRACTS = ["CDI", "CDD", "Intérim", "Alternance", "Stage"]
+CITIES = ["75 - Paris", "69 - Lyon", "13 - Marseille", "31 - Toulouse", "33 - Bordeaux"]
+QUALITIES = ["Sens de l'organisation", "Travail en équipe", "Autonomie", "Rigueur"]
+
+SILVER_COLUMNS = [
+    "job_id",
+    "intitule",
+    "description",
+    "dateCreation",
+    "lieuTravail",
+    "entreprise",
+    "competences",
+    "qualitesProfessionnelles",
+    "typeContratLibelle",
+    "ingestion_date",
+]
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def cluster_centers(seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((N_CLUSTERS, DIM)).astype(np.float32)
+
+
+def french_text(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, VOCABULARY_WEIGHTS, k=n_words))
+
+
+def make_job(i: int, centers: np.ndarray, seed: int = 0) -> tuple[list[object], np.ndarray]:
+    """Silver column values (SILVER_COLUMNS order) and unit embedding of job ``i``."""
+    rng = random.Random(seed * 1_000_003 + i)
+    cluster = rng.randrange(N_CLUSTERS)
+    noise = np.random.default_rng([seed, i]).standard_normal(DIM).astype(np.float32)
+    embedding = _normalize(centers[cluster] + 0.5 * noise)
+
+    title = f"{TITLES[cluster % len(TITLES)]} {rng.choice(VOCABULARY)}"
+    competences = [
+        {"code": str(rng.randrange(100000, 999999)), "libelle": french_text(rng, 3)}
+        for _ in range(rng.randint(2, 8))
+    ]
+    qualities = [
+        {"libelle": q, "description": french_text(rng, 12)}
+        for q in rng.sample(QUALITIES, rng.randint(1, 3))
+    ]
+    row: list[object] = [
+        f"{ID_PREFIX}{i:08d}",
+        title,
+        french_text(rng, rng.randint(80, 400)),
+        f"2026-0{rng.randint(1, 9)}-{rng.randint(10, 28)}T08:00:00Z",
+        json.dumps({"libelle": rng.choice(CITIES)}),
+        json.dumps({"nom": f"Entreprise {rng.randrange(5000)}"}),
+        json.dumps(competences),
+        json.dumps(qualities),
+        rng.choice(CONTRACTS),
+        "2026-01-01",
+    ]
+    return row, embedding
+
+
+def cv_texts(n: int, seed: int = 0) -> list[str]:
+    """CV-like query texts: a target title plus 150-600 Zipf words (with stopwords)."""
+    rng = random.Random(seed + 7)
+    texts = []
+    for _ in range(n):
+        words = french_text(rng, rng.randint(150, 600)).split()
+        for pos in rng.sample(range(len(words)), len(words) // 5):
+            words[pos] += rng.choice([" de la", " et", " pour les", " avec"])
+        texts.append(f"{rng.choice(TITLES)} {' '.join(words)}")
+    return texts
+
+
+def query_embeddings(n: int, seed: int = 0) -> list[list[float]]:
+    """Unit query vectors near the corpus clusters (like a CV near its job family)."""
+    rng = np.random.default_rng(seed + 7)
+    centers = cluster_centers(seed)
+    picks = centers[rng.integers(0, N_CLUSTERS, n)]
+    noise = rng.standard_normal((n, DIM)).astype(np.float32)
+    return _normalize(picks + 0.7 * noise).tolist()
+
+
+def conninfo() -> str:
+    return (
+        f"host={settings.db_host} dbname={settings.db_name} user={settings.db_user} "
+        f"password={settings.db_password} port={settings.db_port}"
+    )
+
+
+POST_LOAD_SQL = [
+    # fts_tokens is not created by the migrations (it predates them): add it on
+    # a fresh local database so the hybrid query can run.
+    "ALTER TABLE jobs_gold ADD COLUMN IF NOT EXISTS fts_tokens tsvector",
+    f"""
+    UPDATE jobs_gold g
+    SET fts_tokens =
+        setweight(to_tsvector('french', s.intitule), 'A')
+        || setweight(to_tsvector('french', COALESCE(s.description, '')), 'B')
+        || setweight(to_tsvector('french', COALESCE(
+            (SELECT string_agg(e->>'libelle', ' ') FROM jsonb_array_elements(s.competences) e),
+            '')), 'C')
+    FROM jobs_silver s
+    WHERE s.job_id = g.job_id AND g.fts_tokens IS NULL AND g.job_id LIKE '{ID_PREFIX}%'
+    """,
+]
+
+COMPACT_SQL = f"""
+UPDATE jobs_gold
+SET embedding_half = embedding::halfvec(384),
+    embedding_bin = binary_quantize(embedding)::bit(384)
+WHERE embedding_half IS NULL AND job_id LIKE '{ID_PREFIX}%'
+"""
+
+
+def seed_corpus(n_jobs: int, seed: int = 0, batch: int = 5000) -> dict[str, float]:
+    """Grow (or shrink) the bench corpus to ``n_jobs`` rows; existing rows are kept."""
+    import psycopg
+    from pgvector.psycopg import register_vector
+
+    t0 = time.perf_counter()
+    centers = cluster_centers(seed)
+    with psycopg.connect(conninfo()) as conn:
+        register_vector(conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM jobs_silver WHERE job_id LIKE %s", (f"{ID_PREFIX}%",))
+            existing = cur.fetchone()[0]
+            if existing > n_jobs:
+                cur.execute(
+                    "DELETE FROM jobs_silver WHERE job_id LIKE %s AND job_id >= %s",
+                    (f"{ID_PREFIX}%", f"{ID_PREFIX}{n_jobs:08d}"),
+                )
+            for start in range(existing, n_jobs, batch):
+                rows, embeddings = zip(
+                    *(make_job(i, centers, seed) for i in range(start, min(start + batch, n_jobs))),
+                    strict=True,
+                )
+                columns = ", ".join(SILVER_COLUMNS)
+                with cur.copy(f"COPY jobs_silver ({columns}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                with cur.copy("COPY jobs_gold (job_id, embedding) FROM STDIN") as copy:
+                    for row, embedding in zip(rows, embeddings, strict=True):
+                        copy.write_row((row[0], embedding))
+            loaded = time.perf_counter() - t0
+            for sql in POST_LOAD_SQL:
+                cur.execute(sql)
+            cur.execute(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'jobs_gold' AND column_name = 'embedding_half'"
+            )
+            if cur.fetchone():
+                cur.execute(COMPACT_SQL)
+            cur.execute("DELETE FROM lexeme_stats")
+            cur.execute(
+                "INSERT INTO lexeme_stats (lexeme, ndoc, nentry) SELECT word, ndoc, nentry "
+                "FROM ts_stat('SELECT fts_tokens FROM jobs_gold WHERE fts_tokens IS NOT NULL')"
+            )
+        conn.commit()
+        conn.autocommit = True
+        conn.execute("ANALYZE jobs_silver")
+        conn.execute("ANALYZE jobs_gold")
+    return {
+        "jobs": n_jobs,
+        "inserted": max(n_jobs - existing, 0),
+        "load_s": round(loaded, 2),
+        "total_s": round(time.perf_counter() - t0, 2),
+    }
+
+
+def reset_corpus() -> int:
+    """Delete the bench rows (jobs_gold rows go with them, ON DELETE CASCADE)."""
+    import psycopg
+
+    with psycopg.connect(conninfo()) as conn:
+        deleted = conn.execute(
+            "DELETE FROM jobs_silver WHERE job_id LIKE %s", (f"{ID_PREFIX}%",)
+        ).rowcount
+    return deleted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=10000, help="target corpus size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="delete the bench rows and exit")
+    args = parser.parse_args()
+
+    if args.reset:
+        print(json.dumps({"deleted": reset_corpus()}))
+        return
+    print(json.dumps(seed_corpus(args.jobs, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
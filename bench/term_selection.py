@@ -0,0 +1,142 @@
+"""Query latency and relevance of IDF-based query-term selection on saved CVs.
+
+For each CV (.pdf or .txt), builds the previous tsquery (first 1000 cleaned
+words OR-ed) and the bounded one (stems deduplicated, frequent lexemes dropped,
+top MAX_QUERY_TERMS by IDF from lexeme_stats), then runs the FTS + title part
+of the hybrid search with ts_headline for both.
+
+Usage:
+    # Offline: term counts and tsquery sizes (no corpus statistics)
+    uv run python bench/term_selection.py --cvs ./saved_cvs
+
+    # Database (DB_* from .env): latency and top-K overlap of both rankings
+    uv run python bench/term_selection.py --cvs ./saved_cvs --db
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "api"))
+from embed_cv_search import clean_text_for_fts  # noqa: E402
+from pdf_extract import extract_text_from_pdf  # noqa: E402
+from query_terms import build_tsquery, select_query_terms  # noqa: E402
+from utils import extract_french_keywords_from_headline  # noqa: E402
+
+FTS_SQL = """
+WITH q AS MATERIALIZED (SELECT to_tsquery('french', %(tsquery)s) AS tsq),
+ranked AS (
+    SELECT
+        jg.job_id,
+        ROW_NUMBER() OVER (ORDER BY ts_rank('{0, 0.3, 0.6, 1.0}', jg.fts_tokens, q.tsq) DESC) AS fts_rank,
+        ROW_NUMBER() OVER (ORDER BY ts_rank(js.title_tsv, q.tsq, 2) DESC) AS title_rank
+    FROM jobs_gold jg
+    JOIN jobs_silver js ON js.job_id = jg.job_id
+    CROSS JOIN q
+    WHERE jg.fts_tokens IS NOT NULL
+),
+top_ranked AS (
+    SELECT job_id, 1.0 / (60 + fts_rank) + 3.0 / (60 + title_rank) AS score
+    FROM ranked
+    ORDER BY score DESC
+    LIMIT 100
+)
+SELECT t.job_id,
+       ts_headline('french', js.intitule || ' ' || COALESCE(js.description, ''), q.tsq,
+                   'StartSel=<b>, StopSel=</b>, MaxWords=100, MinWords=50')
+FROM top_ranked t
+JOIN jobs_silver js ON js.job_id = t.job_id
+CROSS JOIN q
+ORDER BY t.score DESC;
+"""
+
+
+def load_cv_texts(folder: Path) -> dict[str, str]:
+    texts = {}
+    for path in sorted(folder.iterdir()):
+        if path.suffix.lower() == ".pdf":
+            texts[path.name] = extract_text_from_pdf(path.read_bytes())
+        elif path.suffix.lower() == ".txt":
+            texts[path.name] = path.read_text(encoding="utf-8")
+    return texts
+
+
+def _legacy_tsquery(words: list[str]) -> str:
+    return " | ".join(f"'{w}'" for w in words[:1000])
+
+
+def _run(cur, tsquery: str) -> tuple[float, list[str], float]:
+    t0 = time.perf_counter()
+    cur.execute(FTS_SQL, {"tsquery": tsquery or "'placeholder'"})
+    rows = cur.fetchall()
+    elapsed = time.perf_counter() - t0
+    top10_terms = [len(extract_french_keywords_from_headline(h)) for _, h in rows[:10]]
+    return elapsed, [job_id for job_id, _ in rows], statistics.fmean(top10_terms or [0])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cvs", type=Path, required=True, help="Folder of .pdf/.txt CVs")
+    parser.add_argument("--db", action="store_true", help="Run the FTS ranking on the database")
+    args = parser.parse_args()
+
+    cvs = load_cv_texts(args.cvs)
+    doc_freq: dict[str, int] = {}
+    total_docs = 0
+    conn = None
+    if args.db:
+        import psycopg
+
+        load_dotenv(PROJECT_ROOT / ".env")
+        conn = psycopg.connect(
+            f"host={os.getenv('DB_HOST')} dbname={os.getenv('DB_NAME')} "
+            f"user={os.getenv('DB_USER')} password={os.getenv('DB_PASSWORD')} "
+            f"port={os.getenv('DB_PORT', '5432')}"
+        )
+        with conn.cursor() as cur:
+            cur.execute("SELECT lexeme, ndoc FROM lexeme_stats")
+            doc_freq = dict(cur.fetchall())
+            cur.execute("SELECT count(*) FROM jobs_gold WHERE fts_tokens IS NOT NULL")
+            total_docs = cur.fetchone()[0]
+
+    report = []
+    for name, text in cvs.items():
+        words = clean_text_for_fts(text).split()
+        legacy = _legacy_tsquery(words)
+        selected = select_query_terms(words, doc_freq, total_docs)
+        bounded = build_tsquery(selected)
+        row: dict[str, object] = {
+            "cv": name,
+            "legacy_terms": min(len(words), 1000),
+            "selected_terms": len(selected),
+            "legacy_tsquery_chars": len(legacy),
+            "selected_tsquery_chars": len(bounded),
+        }
+        if conn is not None:
+            with conn.cursor() as cur:
+                t_old, ids_old, kw_old = _run(cur, legacy)
+                t_new, ids_new, kw_new = _run(cur, bounded)
+            row.update(
+                legacy_ms=round(1000 * t_old, 1),
+                selected_ms=round(1000 * t_new, 1),
+                overlap_at_10=len(set(ids_old[:10]) & set(ids_new[:10])) / 10,
+                overlap_at_100=len(set(ids_old) & set(ids_new)) / max(len(ids_old), 1),
+                legacy_top10_matched_terms=round(kw_old, 1),
+                selected_top10_matched_terms=round(kw_new, 1),
+            )
+        report.append(row)
+
+    if conn is not None:
+        conn.close()
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
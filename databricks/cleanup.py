@@ -2,7 +2,8 @@
 # COMMAND ----------
 # ---------------------------------------------------------------------------
 # CVEE Databricks — Cleanup
-# Deletes Delta rows older than 60 days to keep tables lean.
+# Deletes Delta rows older than 60 days to keep tables lean, keeps both tables
+# partitioned by ingestion_date, and VACUUMs them once a week.
 # ---------------------------------------------------------------------------
 # COMMAND ----------
 
@@ -10,24 +11,43 @@ from datetime import datetime, timedelta
 
 from delta.tables import DeltaTable
 
+from common import last_operation_metrics, last_operation_time, partition_by_ingestion_date
+
 # COMMAND ----------
 
 RETENTION_DAYS = 60
 SILVER_TABLE = "cvee.jobs_silver"
 GOLD_TABLE = "cvee.jobs_gold"
+VACUUM_INTERVAL_DAYS = 7
+VACUUM_RETAIN_HOURS = 168  # Delta's default minimum: time travel over the last week
 
 cutoff = (datetime.now() - timedelta(days=RETENTION_DAYS)).strftime("%Y-%m-%d")
-print(f"Deleting rows older than {cutoff} ({RETENTION_DAYS} days) ...")
 
 # COMMAND ----------
 
+# One-time layout migration of tables created before partitioning: the
+# retention delete below then drops whole partitions (no file is rewritten).
+for _table in (SILVER_TABLE, GOLD_TABLE):
+    try:
+        if partition_by_ingestion_date(spark, _table):
+            print(f"{_table} rewritten partitioned by ingestion_date")
+    except Exception as e:
+        print(f"{_table}: partitioning skipped: {e}")
+
+# COMMAND ----------
+
+print(f"Deleting rows older than {cutoff} ({RETENTION_DAYS} days) ...")
+
 print(f"Silver table ({SILVER_TABLE}) ...")
 try:
-    silver_before = spark.table(SILVER_TABLE).count()
     delta_silver = DeltaTable.forName(spark, SILVER_TABLE)
     delta_silver.delete(f"ingestion_date < '{cutoff}'")
-    silver_after = spark.table(SILVER_TABLE).count()
-    print(f"  {silver_before} → {silver_after} ({silver_before - silver_after} deleted)")
+    metrics = last_operation_metrics(delta_silver)
+    print(
+        f"  {metrics.get('numDeletedRows', 0)} deleted "
+        f"({metrics.get('numRemovedFiles', 0)} files removed, "
+        f"{metrics.get('numAddedFiles', 0)} rewritten)"
+    )
 except Exception as e:
     print(f"  Skipped: {e}")
 
@@ -35,12 +55,38 @@ except Exception as e:
 
 print(f"Gold table ({GOLD_TABLE}) ...")
 try:
-    gold_before = spark.table(GOLD_TABLE).count()
     delta_gold = DeltaTable.forName(spark, GOLD_TABLE)
     delta_gold.delete(f"ingestion_date < '{cutoff}'")
-    gold_after = spark.table(GOLD_TABLE).count()
-    print(f"  {gold_before} → {gold_after} ({gold_before - gold_after} deleted)")
+    metrics = last_operation_metrics(delta_gold)
+    print(
+        f"  {metrics.get('numDeletedRows', 0)} deleted "
+        f"({metrics.get('numRemovedFiles', 0)} files removed, "
+        f"{metrics.get('numAddedFiles', 0)} rewritten)"
+    )
 except Exception as e:
     print(f"  Skipped: {e}")
 
+# COMMAND ----------
+
+# VACUUM deletes the data files no longer referenced (retention deletes,
+# OPTIMIZE rewrites) — at most once every VACUUM_INTERVAL_DAYS, tracked through
+# the "VACUUM END" commits of the table history.
+spark.conf.set("spark.databricks.delta.vacuum.logging.enabled", "true")
+for _table in (SILVER_TABLE, GOLD_TABLE):
+    try:
+        delta_table = DeltaTable.forName(spark, _table)
+        last_vacuum = last_operation_time(delta_table, "VACUUM END")
+        if last_vacuum and datetime.now() - last_vacuum < timedelta(days=VACUUM_INTERVAL_DAYS):
+            print(f"{_table}: last VACUUM {last_vacuum:%Y-%m-%d}, next in <{VACUUM_INTERVAL_DAYS}d")
+            continue
+        files_before = delta_table.detail().select("numFiles").collect()[0].numFiles
+        print(
+            f"VACUUM {_table} (RETAIN {VACUUM_RETAIN_HOURS} HOURS, {files_before} live files) ..."
+        )
+        delta_table.vacuum(VACUUM_RETAIN_HOURS)
+        metrics = last_operation_metrics(delta_table)
+        print(f"  {metrics.get('numDeletedFiles', '?')} unreferenced files deleted")
+    except Exception as e:
+        print(f"{_table}: VACUUM skipped: {e}")
+
 print("Cleanup — DONE")
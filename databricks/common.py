@@ -1,5 +1,6 @@
 """Shared utilities for Databricks pipeline notebooks."""
 
+import hashlib
 import json
 import re
 from datetime import datetime
@@ -71,16 +72,198 @@ def find_latest_raw_file(gcs_raw_path):
 
     if not parquet_files:
         raise FileNotFoundError(f"No parquet files in {gcs_raw_path}")
-    return max(parquet_files, key=_extract_date_from_name)
+    return max(parquet_files, key=extract_date_from_name)
 
 
-def _extract_date_from_name(path):
+def extract_date_from_name(path):
+    """Return the export timestamp in a raw file name (``YYYYMMDD_HHMMSS``).
+
+    Args:
+        path: Raw parquet file path or URI.
+
+    Returns:
+        The timestamp as a datetime, or ``datetime.min`` if the name has none.
+    """
     match = re.search(r"(\d{8}_\d{6})", path)
     if match:
         return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
     return datetime.min
 
 
+def batch_checksum(silver_ids, gold_ids):
+    """Return the sha256 of a batch's job ids, as recorded in its manifest.
+
+    Must stay identical to ``functions/pipeline/core.py`` ``batch_checksum``:
+    ingest-db skips a batch whose checksum matches an already applied one,
+    whichever producer published it.
+
+    Args:
+        silver_ids: Job ids of the silver file.
+        gold_ids: Job ids of the gold file.
+
+    Returns:
+        The hex digest.
+    """
+    digest = hashlib.sha256()
+    for layer, ids in (("silver", silver_ids), ("gold", gold_ids)):
+        digest.update(f"{layer}\n".encode())
+        digest.update("\n".join(sorted(str(i) for i in ids)).encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def last_operation_metrics(delta_table):
+    """Return the operation metrics of the latest commit of a Delta table.
+
+    Read from the table history (the transaction log), so no data is scanned.
+
+    Args:
+        delta_table: ``delta.tables.DeltaTable`` just written by a MERGE,
+            DELETE or WRITE.
+
+    Returns:
+        Dict of integer metrics, e.g. ``numTargetRowsInserted`` for a MERGE,
+        ``numDeletedRows`` for a DELETE, ``numOutputRows`` for a WRITE.
+    """
+    row = delta_table.history(1).select("operationMetrics").collect()[0]
+    return {k: int(v) for k, v in (row.operationMetrics or {}).items() if v.isdigit()}
+
+
+def latest_ingestion_date(delta_table, lookback=100):
+    """Return the ingestion date of the latest commit that inserted rows.
+
+    The silver notebook records ``{"ingestion_date": ...}`` as the commit
+    ``userMetadata`` of its MERGE, so the latest batch date comes from the
+    table history instead of a ``max(ingestion_date)`` aggregation.
+
+    Args:
+        delta_table: ``delta.tables.DeltaTable`` of the silver table.
+        lookback: Number of history entries to inspect.
+
+    Returns:
+        The ISO date string, or None if no recent commit carries one.
+    """
+    history = delta_table.history(lookback).select("userMetadata", "operationMetrics")
+    for row in history.collect():
+        if not row.userMetadata:
+            continue
+        try:
+            ingestion_date = json.loads(row.userMetadata).get("ingestion_date")
+        except (ValueError, AttributeError):
+            continue
+        metrics = row.operationMetrics or {}
+        inserted = metrics.get("numTargetRowsInserted", metrics.get("numOutputRows", "0"))
+        if ingestion_date and int(inserted) > 0:
+            return ingestion_date
+    return None
+
+
+PARTITION_COLUMN = "ingestion_date"
+ZORDER_COLUMN = "job_id"
+
+
+def is_partitioned_by_ingestion_date(delta_table):
+    """Return whether a Delta table is partitioned by ``ingestion_date`` alone.
+
+    Args:
+        delta_table: ``delta.tables.DeltaTable`` to inspect.
+
+    Returns:
+        True if ``ingestion_date`` is its only partition column.
+    """
+    detail = delta_table.detail().select("partitionColumns").collect()[0]
+    return list(detail.partitionColumns) == [PARTITION_COLUMN]
+
+
+def partition_by_ingestion_date(spark, table_name):
+    """Rewrite a Delta table partitioned by ``ingestion_date`` if it is not already.
+
+    Tables created before partitioning was introduced are rewritten once, in
+    a single overwrite commit (readers keep seeing the previous version).
+
+    Args:
+        spark: Active SparkSession.
+        table_name: Fully qualified Delta table name.
+
+    Returns:
+        True if the table was rewritten, False if it was already partitioned.
+    """
+    from delta.tables import DeltaTable
+
+    if is_partitioned_by_ingestion_date(DeltaTable.forName(spark, table_name)):
+        return False
+    (
+        spark.table(table_name)
+        .write.format("delta")
+        .mode("overwrite")
+        .option("overwriteSchema", "true")
+        .partitionBy(PARTITION_COLUMN)
+        .saveAsTable(table_name)
+    )
+    return True
+
+
+def optimize_partitions(delta_table, since):
+    """Compact and Z-order by ``job_id`` the partitions written since a date.
+
+    Only the partitions a run wrote are rewritten, so the cost stays
+    proportional to the batch rather than to the table. The ``WHERE`` clause
+    only accepts partition columns: check the layout first with
+    :func:`is_partitioned_by_ingestion_date`.
+
+    Args:
+        delta_table: ``delta.tables.DeltaTable`` partitioned by ``ingestion_date``.
+        since: ISO date string of the oldest partition to optimize.
+
+    Returns:
+        Tuple ``(files_removed, files_added)``.
+    """
+    result = (
+        delta_table.optimize()
+        .where(f"{PARTITION_COLUMN} >= '{since}'")
+        .executeZOrderBy(ZORDER_COLUMN)
+    )
+    metrics = result.select("metrics.numFilesRemoved", "metrics.numFilesAdded").collect()[0]
+    return metrics.numFilesRemoved, metrics.numFilesAdded
+
+
+def files_scanned(df, delta_table):
+    """Return how many files of a Delta table a DataFrame reads, and the total.
+
+    Counted from the query's input files after partition pruning and data
+    skipping, without running the query.
+
+    Args:
+        df: DataFrame reading (among others) ``delta_table``.
+        delta_table: ``delta.tables.DeltaTable`` to count the files of.
+
+    Returns:
+        Tuple ``(scanned, total)``.
+    """
+    detail = delta_table.detail().select("location", "numFiles").collect()[0]
+    location = detail.location.rstrip("/") + "/"
+    scanned = sum(1 for path in df.inputFiles() if path.startswith(location))
+    return scanned, detail.numFiles
+
+
+def last_operation_time(delta_table, operation, lookback=500):
+    """Return the timestamp of the latest commit of a given operation.
+
+    Args:
+        delta_table: ``delta.tables.DeltaTable`` to inspect.
+        operation: Operation name as in the history, e.g. ``"VACUUM END"``.
+        lookback: Number of history entries to inspect.
+
+    Returns:
+        A ``datetime``, or None if the operation is not in the recent history.
+    """
+    history = delta_table.history(lookback).select("operation", "timestamp")
+    for row in history.collect():
+        if row.operation == operation:
+            return row.timestamp
+    return None
+
+
 JSON_COLS = [
     "lieuTravail",
     "entreprise",
@@ -16,20 +16,25 @@
 # COMMAND ----------
 
 from datetime import datetime
-import json as _json, io as _io
+import hashlib as _hashlib, json as _json, io as _io
 
+import numpy as _np
 import pandas as _pd
+import pyarrow as _pa
+import pyarrow.parquet as _pq
 import pyspark.sql.functions as F
+from delta.tables import DeltaTable
 from google.cloud import storage
 from google.oauth2 import service_account
 
-from common import JSON_COLS
+from common import JSON_COLS, batch_checksum, files_scanned, latest_ingestion_date
 
 # COMMAND ----------
 
 GCS_BUCKET = "cvee-20260208"
 SILVER_TABLE = "cvee.jobs_silver"
 GOLD_TABLE = "cvee.jobs_gold"
+EMBEDDING_DIM = 384
 
 _creds = service_account.Credentials.from_service_account_info(
     {
@@ -47,16 +52,27 @@ print("GCS client ready.")
 
 # COMMAND ----------
 
+# Latest batch date from the silver table history (recorded by silver.py), so
+# both reads below are a literal filter on the ingestion_date partition column.
+# Tables written before that metadata existed fall back to max(ingestion_date).
+max_date = latest_ingestion_date(DeltaTable.forName(spark, SILVER_TABLE))
+if max_date is None:
+    max_date = str(spark.table(SILVER_TABLE).agg(F.max("ingestion_date")).collect()[0][0])
+print(f"Exporting batch of {max_date}")
+
 print("Reading silver Delta table ...")
-df_silver = spark.table(SILVER_TABLE).drop("vector_text_input")
+df_silver = (
+    spark.table(SILVER_TABLE)
+    .filter(F.col("ingestion_date") == F.lit(max_date).cast("date"))
+    .drop("vector_text_input")
+)
 
 for col_name in JSON_COLS:
     if col_name in df_silver.columns:
         df_silver = df_silver.withColumn(col_name, F.to_json(F.col(col_name)))
 
-max_date = df_silver.agg(F.max("ingestion_date")).collect()[0][0]
-df_silver = df_silver.filter(F.col("ingestion_date") == max_date)
-
+_scanned, _total = files_scanned(df_silver, DeltaTable.forName(spark, SILVER_TABLE))
+print(f"  {_scanned}/{_total} files scanned")
 _pdf_silver = df_silver.toPandas()
 _pdf_silver.attrs = {}
 print(f"  {len(_pdf_silver)} rows in silver")
@@ -65,31 +81,62 @@ print(f"  {len(_pdf_silver)} rows in silver")
 
 print("Reading gold Delta table ...")
 df_gold = spark.table(GOLD_TABLE)
-df_gold = df_gold.filter(F.col("ingestion_date") == max_date)
+df_gold = df_gold.filter(F.col("ingestion_date") == F.lit(max_date))
 
-_pdf_gold = df_gold.toPandas()
+_scanned, _total = files_scanned(df_gold, DeltaTable.forName(spark, GOLD_TABLE))
+print(f"  {_scanned}/{_total} files scanned")
+_pdf_gold = df_gold.select("job_id", "embedding").toPandas()
 _pdf_gold.attrs = {}
-_pdf_gold["embedding"] = _pdf_gold["embedding"].apply(
-    lambda x: _json.dumps(x.tolist() if hasattr(x, "tolist") else x)
+# Canonical gold schema (same as functions/pipeline/core.py build_gold):
+# job_id string, embedding FixedSizeList<float32, 384>
+if len(_pdf_gold):
+    _emb = _np.stack(_pdf_gold["embedding"].to_numpy()).astype(_np.float32)
+else:
+    # Gold not run (or failed) for this date yet: an empty gold file, as before
+    print(f"  No gold rows for {max_date} — exporting an empty gold file")
+    _emb = _np.empty((0, EMBEDDING_DIM), dtype=_np.float32)
+_gold_table = _pa.table(
+    {
+        "job_id": _pa.array(_pdf_gold["job_id"].astype(str), type=_pa.string()),
+        "embedding": _pa.FixedSizeListArray.from_arrays(_pa.array(_emb.ravel()), EMBEDDING_DIM),
+    }
 )
 print(f"  {len(_pdf_gold)} rows in gold")
 
 # COMMAND ----------
 
 ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+_files = {}
+
+_silver_table = _pa.Table.from_pandas(_pdf_silver, preserve_index=False)
+
+for _layer, _table in (("silver", _silver_table), ("gold", _gold_table)):
+    _path = f"jobs_{_layer}/jobs_{_layer}_{ts}.parquet"
+    print(f"Uploading {_layer} -> {_path} ...")
+    _buf = _io.BytesIO()
+    _pq.write_table(_table, _buf)
+    _data = _buf.getvalue()
+    _bucket.blob(_path).upload_from_string(_data)
+    _files[_layer] = [
+        {"path": _path, "rows": _table.num_rows, "sha256": _hashlib.sha256(_data).hexdigest()}
+    ]
+    print(f"  {_table.num_rows} jobs uploaded")
 
-print(f"Uploading silver -> jobs_silver/jobs_silver_{ts}.parquet ...")
-_buf = _io.BytesIO()
-_pdf_silver.to_parquet(_buf, engine="pyarrow", index=False)
-_buf.seek(0)
-_bucket.blob(f"jobs_silver/jobs_silver_{ts}.parquet").upload_from_file(_buf)
-print(f"  {len(_pdf_silver)} jobs uploaded")
-
-print(f"Uploading gold -> jobs_gold/jobs_gold_{ts}.parquet ...")
-_buf2 = _io.BytesIO()
-_pdf_gold.to_parquet(_buf2, engine="pyarrow", index=False)
-_buf2.seek(0)
-_bucket.blob(f"jobs_gold/jobs_gold_{ts}.parquet").upload_from_file(_buf2)
-print(f"  {len(_pdf_gold)} jobs uploaded")
+# COMMAND ----------
+# Batch manifest, published last (a GCS object upload is atomic): ingest-db only
+# applies batches that have one, so a run that failed above is never ingested.
+# Same format and checksum as functions/pipeline/core.py (batch_checksum).
+
+_manifest = {
+    "batch_id": f"{ts}-databricks",
+    "producer": "databricks",
+    "created_at": datetime.now().isoformat(timespec="seconds"),
+    "checksum": batch_checksum(_pdf_silver["job_id"], _pdf_gold["job_id"]),
+    "files": _files,
+}
+_bucket.blob(f"batches/batch_{_manifest['batch_id']}.json").upload_from_string(
+    _json.dumps(_manifest, indent=1), content_type="application/json"
+)
+print(f"Published batch {_manifest['batch_id']}")
 
 print("Export — DONE")
@@ -2,8 +2,13 @@
 # COMMAND ----------
 # ---------------------------------------------------------------------------
 # CVEE Databricks — Gold Layer
-# Collects unprocessed jobs from Silver, generates embeddings on driver
-# (no Pandas UDF to avoid OOM on Community Edition), merges into Delta.
+# Embeds the Silver jobs not yet in Gold and merges them into Delta.
+# Two paths (widget "embed_mode"):
+#   distributed — mapInPandas over bounded Arrow batches, model loaded once
+#                 per executor Python worker from a local-disk copy
+#   driver      — collect + encode on the driver (single-node / Community
+#                 Edition clusters, where a Pandas UDF would OOM)
+# "auto" (default) picks distributed when the cluster has workers.
 # ---------------------------------------------------------------------------
 # COMMAND ----------
 # MAGIC %pip install sentence-transformers==2.2.2 torch huggingface_hub==0.24.0 --quiet
@@ -11,87 +16,232 @@
 # COMMAND ----------
 
 import os
+from datetime import date, timedelta
 
 from delta.tables import DeltaTable
 from pyspark.sql import functions as F
 
+from common import (
+    PARTITION_COLUMN,
+    files_scanned,
+    is_partitioned_by_ingestion_date,
+    last_operation_metrics,
+    optimize_partitions,
+)
+
 os.environ["TRANSFORMERS_CACHE"] = "/tmp/huggingface"
 
 # COMMAND ----------
 
 SILVER_TABLE = "cvee.jobs_silver"
 GOLD_TABLE = "cvee.jobs_gold"
-MAX_JOBS = 10000  # Covers a full daily raw batch (~3k jobs max)
+MODEL_NAME = "antoinelouis/french-me5-small"
+MAX_JOBS = 10000  # Driver path only: covers a full daily raw batch (~3k jobs max)
+# Silver partitions searched for jobs without an embedding (0 = whole table,
+# e.g. after gold has been failing for longer than that).
+LOOKBACK_DAYS = 7
+
+# Distributed path: rows per Arrow batch handed to the model (bounds executor
+# memory), encode batch size, and where the driver publishes the model weights
+# for the executors (copied once to each node's local disk).
+EMBED_BATCH_ROWS = 2048
+EMBED_BATCH_SIZE = 32
+MODEL_SHARED_DIR = "/dbfs/tmp/cvee/models/french-me5-small"
+MODEL_LOCAL_DIR = "/local_disk0/tmp/cvee/models/french-me5-small"
+
+try:
+    embed_mode = dbutils.widgets.get("embed_mode")
+except Exception:
+    embed_mode = "auto"
+
+workers = int(spark.conf.get("spark.databricks.clusterUsageTags.clusterWorkers", "0"))
+if embed_mode == "auto":
+    embed_mode = "distributed" if workers > 0 else "driver"
+print(f"Embedding mode: {embed_mode} ({workers} workers)")
+
+try:
+    lookback_days = int(dbutils.widgets.get("lookback_days"))
+except Exception:
+    lookback_days = LOOKBACK_DAYS
+since = (date.today() - timedelta(days=lookback_days)).isoformat() if lookback_days else None
 
 # COMMAND ----------
 
 print(f"Reading {SILVER_TABLE} and filtering already processed jobs ...")
 
+gold_exists = spark.catalog.tableExists(GOLD_TABLE)
 df_silver = spark.table(SILVER_TABLE).select("job_id", "vector_text_input", "ingestion_date")
-df_gold = spark.table(GOLD_TABLE).select("job_id")
-df_to_process = df_silver.join(df_gold, on="job_id", how="left_anti")
+if since:
+    # A gold row carries its silver row's ingestion_date: both sides prune to
+    # the same partitions.
+    print(f"  Partitions since {since}")
+    df_silver = df_silver.filter(F.col("ingestion_date") >= F.lit(since).cast("date"))
+if gold_exists:
+    df_gold = spark.table(GOLD_TABLE).select("job_id", "ingestion_date")
+    if since:
+        df_gold = df_gold.filter(F.col("ingestion_date") >= F.lit(since))
+    df_silver = df_silver.join(df_gold.select("job_id"), on="job_id", how="left_anti")
+df_to_process = df_silver.select(
+    "job_id",
+    F.col("ingestion_date").cast("string").alias("ingestion_date"),
+    F.substring(F.coalesce(F.col("vector_text_input"), F.lit("")), 1, 5000).alias("text_input"),
+)
+for _name in (SILVER_TABLE, GOLD_TABLE) if gold_exists else (SILVER_TABLE,):
+    _scanned, _total = files_scanned(df_to_process, DeltaTable.forName(spark, _name))
+    print(f"  {_name}: {_scanned}/{_total} files scanned")
 
-total_new = df_to_process.count()
-print(f"  {total_new} new offers to embed")
+# COMMAND ----------
 
-if total_new > MAX_JOBS:
-    print(f"  Limiting to {MAX_JOBS} jobs")
-    df_to_process = df_to_process.limit(MAX_JOBS)
 
-rows = df_to_process.select(
-    "job_id",
-    "ingestion_date",
-    F.coalesce(F.col("vector_text_input"), F.lit("")).alias("text_input"),
-).collect()
+def _executor_model():
+    """Model of this Python worker: loaded once, from the node's local-disk copy."""
+    import shutil
 
-job_ids = [r.job_id for r in rows]
-dates = [r.ingestion_date for r in rows]
-texts = [r.text_input[:5000] for r in rows]
+    import sentence_transformers
+    import torch
+
+    # Cached on an imported module: notebook globals are re-created each time
+    # a task unpickles this function, the reused Python worker's modules are not.
+    model = getattr(sentence_transformers, "_cvee_model", None)
+    if model is not None:
+        return model
+
+    if not os.path.exists(os.path.join(MODEL_LOCAL_DIR, "modules.json")):
+        tmp_dir = f"{MODEL_LOCAL_DIR}.tmp-{os.getpid()}"
+        shutil.copytree(MODEL_SHARED_DIR, tmp_dir, dirs_exist_ok=True)
+        try:
+            os.rename(tmp_dir, MODEL_LOCAL_DIR)  # atomic: concurrent workers keep one copy
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    torch.set_num_threads(1)  # one core per Spark task
+    model = sentence_transformers.SentenceTransformer(MODEL_LOCAL_DIR, device="cpu")
+    sentence_transformers._cvee_model = model
+    return model
+
+
+def embed_batches(batches):
+    """mapInPandas: (job_id, ingestion_date, text_input) batches → embedding batches."""
+    import numpy as np
+    import pandas as pd
+    import torch
 
-print(f"  Processing {len(texts)} offers")
+    model = None
+    for pdf in batches:
+        if model is None:  # empty partitions never load it
+            model = _executor_model()
+        with torch.no_grad():
+            embeddings = model.encode(
+                pdf["text_input"].tolist(),
+                batch_size=EMBED_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+        yield pd.DataFrame(
+            {
+                "job_id": pdf["job_id"],
+                "ingestion_date": pdf["ingestion_date"],
+                "embedding": list(embeddings.astype(np.float32)),
+            }
+        )
 
-if len(texts) == 0:
-    print("  No new jobs — skipping embeddings generation.")
-else:
-    print("Generating embeddings (driver-side, no UDF) ...")
 
+def embed_on_driver(df):
+    """Collect at most MAX_JOBS rows and encode them on the driver."""
+    import pandas as pd
     import torch
     from sentence_transformers import SentenceTransformer
 
-    torch.set_num_threads(1)
-    model = SentenceTransformer("antoinelouis/french-me5-small", device="cpu")
+    rows = df.limit(MAX_JOBS).collect()
+    if not rows:
+        return None
+    if len(rows) == MAX_JOBS:
+        print(f"  Limiting to {MAX_JOBS} jobs")
+    print(f"  Processing {len(rows)} offers (driver-side, no UDF)")
 
+    torch.set_num_threads(1)
+    model = SentenceTransformer(MODEL_NAME, device="cpu")
     with torch.no_grad():
         embeddings = model.encode(
-            texts, batch_size=16, show_progress_bar=True, convert_to_numpy=True
+            [r.text_input for r in rows],
+            batch_size=16,
+            show_progress_bar=True,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
         )
-
     print(f"  {len(embeddings)} embeddings ({embeddings.shape[1]} dims)")
 
-    import pandas as pd
-
     _pdf = pd.DataFrame(
         {
-            "job_id": job_ids,
-            "ingestion_date": [str(d) for d in dates],
+            "job_id": [r.job_id for r in rows],
+            "ingestion_date": [r.ingestion_date for r in rows],
             "embedding": [emb.tolist() for emb in embeddings],
         }
     )
+    return spark.createDataFrame(_pdf)
+
+
+# COMMAND ----------
+
+if embed_mode == "distributed":
+    if not os.path.exists(os.path.join(MODEL_SHARED_DIR, "modules.json")):
+        from sentence_transformers import SentenceTransformer
+
+        print(f"Publishing {MODEL_NAME} weights to {MODEL_SHARED_DIR} ...")
+        SentenceTransformer(MODEL_NAME, device="cpu").save(MODEL_SHARED_DIR)
+
+    # Bounded Arrow batches; a few tasks per worker so all cores encode
+    spark.conf.set("spark.sql.execution.arrow.maxRecordsPerBatch", str(EMBED_BATCH_ROWS))
+    print(f"Generating embeddings on executors (batches of {EMBED_BATCH_ROWS} rows) ...")
+    df_final = df_to_process.repartition(max(workers, 1) * 4).mapInPandas(
+        embed_batches, "job_id string, ingestion_date string, embedding array<float>"
+    )
+else:
+    print("Generating embeddings (driver-side, no UDF) ...")
+    df_final = embed_on_driver(df_to_process)
+    if df_final is None:
+        print("  No new jobs — skipping embeddings generation.")
 
-    df_final = spark.createDataFrame(_pdf)
+# COMMAND ----------
 
+if df_final is not None:
     print(f"Merging into {GOLD_TABLE} ...")
 
-    try:
+    # The embeddings are computed while the merge reads its source: an
+    # insert-only MERGE makes a single pass over it. Any failure (executor OOM,
+    # model copy, ...) propagates: only a missing table is ever created here.
+    if gold_exists:
         gold_table = DeltaTable.forName(spark, GOLD_TABLE)
+        target_type = gold_table.toDF().schema["embedding"].dataType
+        df_final = df_final.withColumn("embedding", F.col("embedding").cast(target_type))
+        condition = "target.job_id = source.job_id"
+        if since:
+            condition += f" AND target.ingestion_date >= '{since}'"
         gold_table.alias("target").merge(
-            df_final.alias("source"), "target.job_id = source.job_id"
+            df_final.alias("source"), condition
         ).whenNotMatchedInsertAll().execute()
-        print("  Merge completed successfully.")
-    except Exception:
+        metrics = last_operation_metrics(gold_table)
+        print(f"  {metrics.get('numTargetRowsInserted', 0)} new embeddings inserted")
+        print(
+            f"  merge scanned {metrics.get('numTargetFilesAfterSkipping', '?')}"
+            f"/{metrics.get('numTargetFilesBeforeSkipping', '?')} target files"
+        )
+    else:
         print("  Table does not exist yet — creating ...")
-        df_final.write.format("delta").mode("overwrite").saveAsTable(GOLD_TABLE)
-        final_count = spark.table(GOLD_TABLE).count()
-        print(f"  Table created with {final_count} rows")
+        df_final.write.format("delta").mode("errorifexists").partitionBy(
+            PARTITION_COLUMN
+        ).saveAsTable(GOLD_TABLE)
+        metrics = last_operation_metrics(DeltaTable.forName(spark, GOLD_TABLE))
+        print(f"  Table created with {metrics.get('numOutputRows', 0)} rows")
+
+    # A table created before partitioning is rewritten by cleanup.py first.
+    gold_table = DeltaTable.forName(spark, GOLD_TABLE)
+    if not is_partitioned_by_ingestion_date(gold_table):
+        print(f"{GOLD_TABLE} not partitioned by ingestion_date yet — OPTIMIZE skipped")
+    elif metrics.get("numTargetRowsInserted", metrics.get("numOutputRows", 0)):
+        _oldest = since or "0000-01-01"
+        print(f"Optimizing {GOLD_TABLE} partitions since {_oldest} (ZORDER BY job_id) ...")
+        removed, added = optimize_partitions(gold_table, _oldest)
+        print(f"  {removed} files compacted into {added}")
 
 print("Gold layer — DONE")
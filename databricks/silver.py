@@ -2,66 +2,142 @@
 # COMMAND ----------
 # ---------------------------------------------------------------------------
 # CVEE Databricks — Silver Layer
-# Reads raw jobs from GCS, cleans HTML, aggregates JSON fields,
-# merges into Delta table cvee.jobs_silver.
+# Reads raw jobs from GCS (one file, or several for a backfill), cleans HTML,
+# aggregates JSON fields, merges into Delta table cvee.jobs_silver.
 # ---------------------------------------------------------------------------
 # COMMAND ----------
 
-import re
-from datetime import datetime
+import json
+import urllib.parse
+import urllib.request
+from datetime import date, datetime, timedelta
 
 from delta.tables import DeltaTable
+from pyspark.sql import Window
 from pyspark.sql import functions as F
-from pyspark.sql.functions import col, concat_ws, current_date, udf
+from pyspark.sql.functions import col, concat_ws, udf
 from pyspark.sql.types import StringType
 
-from common import clean_html
+from common import (
+    PARTITION_COLUMN,
+    clean_html,
+    extract_date_from_name,
+    is_partitioned_by_ingestion_date,
+    last_operation_metrics,
+    optimize_partitions,
+)
 
 # COMMAND ----------
 
-GCS_RAW_PATH = "gs://cvee-20260208/jobs_raw/"
+GCS_BUCKET = "cvee-20260208"
+GCS_RAW_PATH = f"gs://{GCS_BUCKET}/jobs_raw/"
 SILVER_TABLE = "cvee.jobs_silver"
+INGESTION_DATE = date.today().isoformat()
+
+
+def _widget(name):
+    try:
+        return dbutils.widgets.get(name)
+    except Exception:
+        return ""
+
+
+# Raw files to ingest, in one job:
+#   raw_file      — File Arrival trigger: the file that arrived
+#   raw_files     — comma-separated gs:// paths (explicit backfill)
+#   backfill_days — every raw file stamped in the last N days
+#   (none)        — the latest raw file
+raw_files = [f.strip() for f in _widget("raw_files").split(",") if f.strip()]
+if _widget("raw_file"):
+    raw_files = [_widget("raw_file")]
+    print(f"Triggered by file arrival: {raw_files[0]}")
+backfill_days = int(_widget("backfill_days") or 0)
+
+
+def _list_raw_files():
+    """All raw parquet files, via the public GCS JSON API (paginated)."""
+    files, page_token = [], ""
+    while True:
+        query = urllib.parse.urlencode({"prefix": "jobs_raw/", "pageToken": page_token})
+        api_url = f"https://storage.googleapis.com/storage/v1/b/{GCS_BUCKET}/o?{query}"
+        listing = json.loads(urllib.request.urlopen(api_url).read())
+        files += [
+            f"gs://{GCS_BUCKET}/{item['name']}"
+            for item in listing.get("items", [])
+            if item["name"].endswith(".parquet")
+        ]
+        page_token = listing.get("nextPageToken")
+        if not page_token:
+            return files
+
+
+if not raw_files:
+    print(f"Listing raw files from {GCS_RAW_PATH} ...")
+    parquet_files = _list_raw_files()
+    if not parquet_files:
+        raise FileNotFoundError(f"No parquet files in {GCS_RAW_PATH}")
+    if backfill_days:
+        since = datetime.now() - timedelta(days=backfill_days)
+        raw_files = sorted(
+            (f for f in parquet_files if extract_date_from_name(f) >= since),
+            key=extract_date_from_name,
+        )
+        if not raw_files:
+            raise FileNotFoundError(
+                f"No raw file stamped in the last {backfill_days} days in {GCS_RAW_PATH}"
+            )
+        print(f"  Backfill of the last {backfill_days} days")
+    else:
+        raw_files = [max(parquet_files, key=extract_date_from_name)]
+
+for _rf in raw_files:
+    print(f"  → {_rf}")
 
-# File Arrival trigger passes the path via a widget — use it if available
-raw_file = None
-try:
-    raw_file = dbutils.widgets.get("raw_file")
-    print(f"Triggered by file arrival: {raw_file}")
-except Exception:
-    pass
-
-if not raw_file:
-    # Manual run: list latest file via public GCS API
-    print(f"Listing latest raw file from {GCS_RAW_PATH} ...")
-    import urllib.request, json as _json
-
-    _api_url = "https://storage.googleapis.com/storage/v1/b/cvee-20260208/o?prefix=jobs_raw/"
-    _resp = urllib.request.urlopen(_api_url)
-    _items = _json.loads(_resp.read()).get("items", [])
-    parquet_files = [
-        "gs://cvee-20260208/" + item["name"] for item in _items if item["name"].endswith(".parquet")
-    ]
-
-    def _extract_date_from_name(path):
-        match = re.search(r"(\d{8}_\d{6})", path)
-        if match:
-            return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
-        return datetime.min
-
-    raw_file = max(parquet_files, key=_extract_date_from_name)
-
-print(f"  → {raw_file}")
-
-# Download raw parquet via HTTP into memory (no local file, no GCS auth)
-import io
-
-import pandas as _pd
+# COMMAND ----------
 
-_http_url = raw_file.replace("gs://cvee-20260208/", "https://storage.googleapis.com/cvee-20260208/")
-_resp = urllib.request.urlopen(_http_url)
-_pdf = _pd.read_parquet(io.BytesIO(_resp.read()), engine="pyarrow")
-df_raw = spark.createDataFrame(_pdf)
-print(f"  {df_raw.count()} raw jobs loaded")
+# Spark's Parquet reader: executors read the files directly (schema merged
+# across files), nothing goes through the driver. Where the GCS connector is
+# unavailable (Spark Connect), the files are downloaded over public HTTP as
+# Arrow tables and handed to Spark with Arrow-enabled conversion.
+try:
+    df_raw = (
+        spark.read.option("mergeSchema", "true")
+        .parquet(*raw_files)
+        .withColumn("_raw_file", F.col("_metadata.file_path"))
+    )
+    df_raw.schema  # resolves the files: fails here if gs:// is not readable
+    print(f"  {len(raw_files)} raw file(s) read with the Spark Parquet reader")
+except Exception as e:
+    print(f"  Spark Parquet reader unavailable ({type(e).__name__}) — Arrow fallback")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    _tables = []
+    for _rf in raw_files:
+        _http_url = _rf.replace(
+            f"gs://{GCS_BUCKET}/", f"https://storage.googleapis.com/{GCS_BUCKET}/"
+        )
+        _table = pq.read_table(pa.BufferReader(urllib.request.urlopen(_http_url).read()))
+        _tables.append(_table.append_column("_raw_file", pa.array([_rf] * _table.num_rows)))
+    _arrow_raw = pa.concat_tables(_tables, promote_options="default")
+    del _tables
+    spark.conf.set("spark.sql.execution.arrow.pyspark.enabled", "true")
+    try:
+        df_raw = spark.createDataFrame(_arrow_raw)  # PySpark >= 4.0 takes Arrow directly
+    except (TypeError, ValueError):
+        df_raw = spark.createDataFrame(_arrow_raw.to_pandas())
+    print(f"  {_arrow_raw.num_rows} raw jobs loaded from {len(raw_files)} file(s)")
+    del _arrow_raw
+
+# Same offer in several files of a backfill: keep the latest file's version,
+# ordered by the export timestamp ending each file name (backfill exports,
+# jobs_raw_<from>_<to>_<ts>.parquet, do not sort by full path).
+if len(raw_files) > 1:
+    _file_ts = F.regexp_extract("_raw_file", r"(\d{8}_\d{6})\.parquet$", 1)
+    _latest = Window.partitionBy("id").orderBy(_file_ts.desc(), F.col("_raw_file").desc())
+    df_raw = df_raw.withColumn("_rank", F.row_number().over(_latest)).filter("_rank = 1")
+    df_raw = df_raw.drop("_rank")
+df_raw = df_raw.drop("_raw_file")
 
 # COMMAND ----------
 
@@ -107,11 +183,9 @@ df_final = df_final.drop(
 df_final = (
     df_final.withColumnRenamed("id", "job_id")
     .withColumnRenamed("description_clean", "description")
-    .withColumn("ingestion_date", current_date())
+    .withColumn("ingestion_date", F.lit(INGESTION_DATE).cast("date"))
 )
 
-print(f"  {df_final.count()} jobs after dedup")
-
 # COMMAND ----------
 
 print("No translation needed — multilingual embedding model handles French natively.")
@@ -120,27 +194,55 @@ print("No translation needed — multilingual embedding model handles French nat
 
 print(f"Merging into Delta table {SILVER_TABLE} ...")
 
+# Row counts come from the commit's operation metrics, and the batch date is
+# recorded in its userMetadata for export.py (latest_ingestion_date).
+spark.conf.set(
+    "spark.databricks.delta.commitInfo.userMetadata",
+    json.dumps({"ingestion_date": INGESTION_DATE}),
+)
+# A failed merge propagates: only a missing table is ever created here.
 try:
-    target_schema = spark.table(SILVER_TABLE).schema
-    df_source_aligned = df_final.select(
-        F.from_json(F.to_json(F.struct("*")), target_schema).alias("data")
-    ).select("data.*")
-
-    delta_table = DeltaTable.forName(spark, SILVER_TABLE)
-    old_count = delta_table.toDF().count()
-
-    delta_table.alias("target").merge(
-        df_source_aligned.alias("source"), "target.job_id = source.job_id"
-    ).whenNotMatchedInsertAll().execute()
-
-    new_count = delta_table.toDF().count()
-    added = new_count - old_count
-    print(f"  {added} new rows inserted ({new_count} total)")
-
-except Exception:
-    print("  Table does not exist yet — creating ...")
-    df_final.write.format("delta").mode("overwrite").saveAsTable(SILVER_TABLE)
-    final_count = spark.table(SILVER_TABLE).count()
-    print(f"  Table created with {final_count} rows")
+    if spark.catalog.tableExists(SILVER_TABLE):
+        target_schema = spark.table(SILVER_TABLE).schema
+        df_source_aligned = df_final.select(
+            F.from_json(F.to_json(F.struct("*")), target_schema).alias("data")
+        ).select("data.*")
+
+        delta_table = DeltaTable.forName(spark, SILVER_TABLE)
+        delta_table.alias("target").merge(
+            df_source_aligned.alias("source"), "target.job_id = source.job_id"
+        ).whenNotMatchedInsertAll().execute()
+
+        metrics = last_operation_metrics(delta_table)
+        print(
+            f"  {metrics.get('numSourceRows', 0)} jobs after dedup, "
+            f"{metrics.get('numTargetRowsInserted', 0)} new rows inserted"
+        )
+        print(
+            f"  merge scanned {metrics.get('numTargetFilesAfterSkipping', '?')}"
+            f"/{metrics.get('numTargetFilesBeforeSkipping', '?')} target files"
+        )
+    else:
+        print("  Table does not exist yet — creating ...")
+        df_final.write.format("delta").mode("errorifexists").partitionBy(
+            PARTITION_COLUMN
+        ).saveAsTable(SILVER_TABLE)
+        metrics = last_operation_metrics(DeltaTable.forName(spark, SILVER_TABLE))
+        print(f"  Table created with {metrics.get('numOutputRows', 0)} rows")
+finally:
+    spark.conf.unset("spark.databricks.delta.commitInfo.userMetadata")
+
+# COMMAND ----------
+
+# Today's partition only: the Z-order on job_id lets the next merges and the
+# gold anti-join skip the files that cannot hold a given job_id.
+# A table created before partitioning is rewritten by cleanup.py first.
+delta_table = DeltaTable.forName(spark, SILVER_TABLE)
+if is_partitioned_by_ingestion_date(delta_table):
+    print(f"Optimizing {SILVER_TABLE} partition {INGESTION_DATE} (ZORDER BY job_id) ...")
+    removed, added = optimize_partitions(delta_table, INGESTION_DATE)
+    print(f"  {removed} files compacted into {added}")
+else:
+    print(f"{SILVER_TABLE} not partitioned by ingestion_date yet — OPTIMIZE skipped")
 
 print("Silver layer — DONE")
@@ -1,6 +1,8 @@
+import json
+import re
 from datetime import datetime
 
-import gcsfs
+import fsspec
 import pandas as pd
 import requests
 import structlog
@@ -12,6 +14,12 @@ FT_SCOPE = "o2dsoffre api_offresdemploiv2"
 DEFAULT_PAGE_SIZE = 150
 DEFAULT_MAX_INDEX = 3000
 
+# Manifest of the raw prefix: file name → export time and row count, read by
+# the pipeline (core._raw_file_index) instead of listing and stat-ing files.
+RAW_MANIFEST = "_manifest.json"
+RAW_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+RAW_TIMESTAMP_RE = re.compile(r"(\d{8}_\d{6})\.parquet$")
+
 logger = structlog.get_logger()
 
 
@@ -114,12 +122,52 @@ def fetch_jobs_data(
 
 
 def _make_filename(date_min, date_max):
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ts = datetime.now().strftime(RAW_TIMESTAMP_FORMAT)
     if date_min and date_max:
         return f"jobs_raw_{date_min}_{date_max}_{ts}.parquet"
     return f"jobs_raw_{ts}.parquet"
 
 
+def _written_at(name, info):
+    match = RAW_TIMESTAMP_RE.search(name)
+    if match:
+        return datetime.strptime(match.group(1), RAW_TIMESTAMP_FORMAT).isoformat()
+    updated = info.get("updated") or info.get("mtime") or info.get("created")
+    if isinstance(updated, (int, float)):
+        return datetime.fromtimestamp(updated).isoformat()
+    if isinstance(updated, datetime):
+        return updated.astimezone().replace(tzinfo=None).isoformat()
+    if updated:
+        parsed = datetime.fromisoformat(str(updated).replace("Z", "+00:00"))
+        return parsed.astimezone().replace(tzinfo=None).isoformat()
+    return datetime.min.isoformat()
+
+
+def update_raw_manifest(fs, raw_dir, filename, rows):
+    """Add a raw file to the prefix manifest (written after the file itself).
+
+    The first time, the manifest is bootstrapped from one detailed listing of
+    the files already there (row counts unknown). Single writer assumed: the
+    api-to-gcs function (max 1 instance) or the backfill script.
+    """
+    path = f"{raw_dir}/{RAW_MANIFEST}"
+    try:
+        manifest = json.loads(fs.cat_file(path))
+    except FileNotFoundError:
+        listing = fs.glob(f"{raw_dir}/*.parquet", detail=True)
+        manifest = {
+            "files": {
+                p.rsplit("/", 1)[-1]: {"written_at": _written_at(p, info), "rows": None}
+                for p, info in listing.items()
+            }
+        }
+    manifest["files"][filename] = {
+        "written_at": _written_at(filename, {}),
+        "rows": rows,
+    }
+    fs.pipe_file(path, json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8"))
+
+
 def export_to_gcs(jobs, bucket_name, date_min=None, date_max=None):
     """Export jobs DataFrame to GCS as Parquet using Application Default Credentials"""
     if not jobs:
@@ -127,15 +175,19 @@ def export_to_gcs(jobs, bucket_name, date_min=None, date_max=None):
         return
 
     filename = _make_filename(date_min, date_max)
-    gcs_path = f"gs://{bucket_name}/jobs_raw/{filename}"
+    # bucket_name may also be an fsspec URL (file://, memory://) for local runs
+    base = bucket_name.rstrip("/") if "://" in bucket_name else f"gs://{bucket_name}"
+    gcs_path = f"{base}/jobs_raw/{filename}"
 
     df = pd.DataFrame(jobs)
 
     for col in df.columns:
         df[col] = df[col].apply(lambda x: None if isinstance(x, dict) and len(x) == 0 else x)
 
-    fs = gcsfs.GCSFileSystem()
-    df.to_parquet(gcs_path, engine="pyarrow", index=False, filesystem=fs)
+    options = {"auto_mkdir": True} if gcs_path.startswith("file://") else {}
+    fs, path = fsspec.core.url_to_fs(gcs_path, **options)
+    df.to_parquet(path, engine="pyarrow", index=False, filesystem=fs)
+    update_raw_manifest(fs, path.rsplit("/", 1)[0], filename, len(df))
     logger.info("export_completed", gcs_path=gcs_path, job_count=len(jobs))
 
 
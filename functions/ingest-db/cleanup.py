@@ -4,6 +4,7 @@ import time
 import aiohttp
 import psycopg2
 import structlog
+from lexeme_stats import subtract_lexeme_stats
 
 logger = structlog.get_logger()
 
@@ -147,6 +148,7 @@ def delete_dead_jobs(dead_ids: set, db_host, db_port, db_user, db_password, db_n
         # Delete dead jobs from jobs_silver (parent table)
         # ON DELETE CASCADE will automatically delete from jobs_gold (child table)
         dead_ids_list = list(dead_ids)
+        subtract_lexeme_stats(cur, dead_ids_list)
         placeholders = ",".join(["%s"] * len(dead_ids_list))
         delete_sql = f"DELETE FROM jobs_silver WHERE job_id IN ({placeholders});"  # nosec B608 -- parameterized via %s
 
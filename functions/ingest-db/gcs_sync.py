@@ -1,29 +1,118 @@
+import hashlib
+import io
 import json
+import struct
 from datetime import datetime
 
-import gcsfs
+import fsspec
 import numpy as np
-import pandas as pd
 import psycopg2
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 import structlog
+from lexeme_stats import add_lexeme_stats, subtract_lexeme_stats
+from psycopg2 import sql
 
 DAYS_BEFORE_PURGE = 30
 
+EMBEDDING_DIM = 384
+
+# Gold files are loaded with a binary COPY into a temporary staging table, then
+# moved into jobs_gold. Embeddings are re-normalized on insert: the API ranks by
+# inner product, which is cosine only on unit vectors (older gold files were not
+# normalized). RETURNING gives the newly inserted ids for lexeme_stats.
+GOLD_STAGE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS gold_stage (job_id TEXT, embedding vector(384))
+ON COMMIT DELETE ROWS;
+TRUNCATE gold_stage;
+"""
+
+# Silver files are loaded the same way: CSV COPY into a staging copy of
+# jobs_silver (the JSON columns go in as text and are parsed into JSONB by
+# PostgreSQL), then one INSERT ... SELECT of the file's columns.
+SILVER_STAGE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS silver_stage (LIKE jobs_silver) ON COMMIT DELETE ROWS;
+TRUNCATE silver_stage;
+"""
+
+SILVER_COLUMNS_SQL = """
+SELECT column_name FROM information_schema.columns
+WHERE table_schema = current_schema() AND table_name = 'jobs_silver'
+  AND is_generated = 'NEVER';
+"""
+
+GOLD_INSERT_SQL = """
+INSERT INTO jobs_gold (job_id, embedding)
+SELECT job_id, l2_normalize(embedding) FROM gold_stage
+ON CONFLICT (job_id) DO NOTHING
+RETURNING job_id;
+"""
+
+# Opt-in (compact_embeddings=True): also store the halfvec and binary-quantized
+# copies used by the API's coarse retrieval modes (migration 5d1e8b3c7f20).
+GOLD_INSERT_COMPACT_SQL = """
+INSERT INTO jobs_gold (job_id, embedding, embedding_half, embedding_bin)
+SELECT job_id, v, v::halfvec(384), binary_quantize(v)::bit(384)
+FROM (SELECT job_id, l2_normalize(embedding) AS v FROM gold_stage) AS src
+ON CONFLICT (job_id) DO NOTHING
+RETURNING job_id;
+"""
+
+# Batch manifests published by the producers (functions/pipeline/core.py,
+# databricks/export.py) once all files of a batch are written:
+# batches/batch_<batch_id>.json → {batch_id, producer, created_at, checksum,
+# files: {silver: [{path, rows, sha256}], gold: [...]}}, paths relative to the
+# bucket root. Applied batches are recorded in ingest_batches (migration e4b8d2f1a9c3).
+PREFIX_BATCHES = "batches/"
+
+JSON_COLS = [
+    "lieuTravail",
+    "entreprise",
+    "contact",
+    "agence",
+    "origineOffre",
+    "contexteTravail",
+    "salaire",
+    "competences",
+    "formations",
+    "langues",
+    "permis",
+    "qualitesProfessionnelles",
+]
+
 logger = structlog.get_logger()
 
 
+def open_bucket(bucket_name):
+    """Return (filesystem, root path) for a bucket name (gs://) or an fsspec URL (file://, memory://)"""
+    url = bucket_name if "://" in bucket_name else f"gs://{bucket_name}"
+    fs, root = fsspec.core.url_to_fs(url)
+    return fs, root.rstrip("/")
+
+
 def _parse_gcs_time(t):
     if isinstance(t, datetime):
         return t
+    if isinstance(t, (int, float)):
+        return datetime.fromtimestamp(t)
     return datetime.fromisoformat(str(t).replace("Z", "+00:00"))
 
 
+def _modified_time(info):
+    """Last modification time of a listing entry (GCS "updated", local "mtime", memory "created")"""
+    for key in ("updated", "mtime", "created"):
+        if info.get(key) is not None:
+            return _parse_gcs_time(info[key])
+    return datetime.min
+
+
 def get_latest_batch_parquet_files(bucket, prefix):
-    """Return list of parquet GCS URIs from the most recent day"""
-    fs = gcsfs.GCSFileSystem()
-    base = f"gs://{bucket}/{prefix}"
+    """Return list of parquet paths (on the bucket's filesystem) from the most recent day"""
+    fs, root = open_bucket(bucket)
     try:
-        all_files = fs.ls(base, detail=True)
+        all_files = fs.ls(f"{root}/{prefix}", detail=True)
     except FileNotFoundError:
         return []
 
@@ -34,139 +123,315 @@ def get_latest_batch_parquet_files(bucket, prefix):
     if not parquet_files:
         return []
 
-    latest_day = max(_parse_gcs_time(f["updated"]).date() for f in parquet_files)
-    return [f["name"] for f in parquet_files if _parse_gcs_time(f["updated"]).date() == latest_day]
+    latest_day = max(_modified_time(f).date() for f in parquet_files)
+    return [f["name"] for f in parquet_files if _modified_time(f).date() == latest_day]
+
 
+def read_table_from_gcs(bucket, path):
+    """Read a parquet file of the bucket into an Arrow table"""
+    fs, _ = open_bucket(bucket)
+    return pq.read_table(path, filesystem=fs)
 
-def read_parquet_from_gcs(gcs_path):
-    """Read parquet file from GCS into DataFrame"""
-    fs = gcsfs.GCSFileSystem()
-    return pd.read_parquet(gcs_path, filesystem=fs)
+
+def _batch_id(manifest_path):
+    name = manifest_path.rsplit("/", 1)[-1]
+    return name[len("batch_") : -len(".json")]
+
+
+def list_pending_batches(bucket, applied_ids):
+    """Return the manifests of the published batches not in ``applied_ids``, oldest first.
+
+    One listing of batches/ plus one read per pending manifest: batch ids are
+    taken from the manifest names, so already-applied batches are not read.
+    """
+    fs, root = open_bucket(bucket)
+    try:
+        paths = fs.glob(f"{root}/{PREFIX_BATCHES}batch_*.json")
+    except FileNotFoundError:
+        return []
+    pending = sorted(p for p in paths if _batch_id(p) not in applied_ids)
+    manifests = [json.loads(fs.cat_file(p)) for p in pending]
+    return sorted(manifests, key=lambda m: (m["created_at"], m["batch_id"]))
+
+
+def read_batch_file(bucket, entry):
+    """Read one file of a batch manifest as an Arrow table, checking its sha256 and row count"""
+    fs, root = open_bucket(bucket)
+    data = fs.cat_file(f"{root}/{entry['path']}")
+    if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+        raise ValueError(f"checksum mismatch for {entry['path']}")
+    table = pq.read_table(io.BytesIO(data))
+    if table.num_rows != entry["rows"]:
+        raise ValueError(f"{entry['path']}: {table.num_rows} rows, manifest says {entry['rows']}")
+    return table
+
+
+def gold_embeddings(table):
+    """Return (job ids, float32 matrix of shape (n, 384)) from a gold table.
+
+    The canonical gold column is FixedSizeList<float32, 384>, whose values
+    buffer is viewed as the matrix without a per-row conversion. Older files
+    (list<double> from the Polars pipeline, one JSON string per row from
+    Databricks) are still read. Rows with a missing or non-finite embedding
+    are dropped: pgvector rejects NaN.
+    """
+    table = table.filter(pc.is_valid(table.column("embedding")))
+    column = table.column("embedding").combine_chunks()
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        matrix = np.array([json.loads(v) for v in column.to_pylist()], dtype=np.float32)
+    else:
+        if pa.types.is_fixed_size_list(column.type):
+            values = column.values.slice(
+                column.offset * column.type.list_size, len(column) * column.type.list_size
+            )
+        else:
+            values = column.flatten()
+        matrix = values.to_numpy(zero_copy_only=False).astype(np.float32, copy=False)
+    matrix = matrix.reshape(len(column), EMBEDDING_DIM)
+    job_ids = table.column("job_id").to_pylist()
+
+    finite = np.isfinite(matrix).all(axis=1)
+    if not finite.all():
+        logger.warning("gold_non_finite_embeddings", dropped=int((~finite).sum()))
+        matrix = matrix[finite]
+        job_ids = [job_id for job_id, ok in zip(job_ids, finite, strict=True) if ok]
+    return job_ids, matrix
+
+
+def gold_copy_payload(job_ids, embeddings):
+    """PostgreSQL binary COPY data for (job_id TEXT, embedding vector) rows.
+
+    A vector is sent as int16 dim, int16 unused, then dim big-endian float4:
+    the matrix is byte-swapped once and each row's bytes are sliced from it.
+    """
+    dim = embeddings.shape[1]
+    vectors = np.ascontiguousarray(embeddings, dtype=">f4")
+    vector_header = struct.pack(">ihh", 4 + 4 * dim, dim, 0)
+    parts = [b"PGCOPY\n\xff\r\n\x00", struct.pack(">ii", 0, 0)]
+    for job_id, vector in zip(job_ids, vectors, strict=True):
+        encoded = str(job_id).encode("utf-8")
+        parts += [struct.pack(">hi", 2, len(encoded)), encoded, vector_header, vector.tobytes()]
+    parts.append(struct.pack(">h", -1))
+    return b"".join(parts)
+
+
+def _applied_batches(cursor):
+    """Return ({batch_id}, {checksum of an applied batch}) from ingest_batches"""
+    cursor.execute("SELECT batch_id, checksum, status FROM ingest_batches;")
+    rows = cursor.fetchall()
+    return {r[0] for r in rows}, {r[1] for r in rows if r[2] == "applied"}
+
+
+def _record_batch(cursor, manifest, status, error=None):
+    files = manifest["files"]
+    cursor.execute(
+        "INSERT INTO ingest_batches "
+        "(batch_id, producer, checksum, silver_rows, gold_rows, status, error) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s) ON CONFLICT (batch_id) DO NOTHING;",
+        (
+            manifest["batch_id"],
+            manifest["producer"],
+            manifest["checksum"],
+            sum(f["rows"] for f in files.get("silver", [])),
+            sum(f["rows"] for f in files.get("gold", [])),
+            status,
+            error,
+        ),
+    )
+
+
+def silver_copy_table(table, columns):
+    """Columns of a silver table that jobs_silver has (``columns``, lower case), JSON as text.
+
+    The producers write the JSON columns as strings (core.json_encode_expr,
+    Spark to_json), which are copied as is. A nested column from an older
+    file is encoded per row.
+    """
+    keep = [name for name in table.column_names if name.lower() in columns]
+    ignored = [name for name in table.column_names if name.lower() not in columns]
+    if ignored:
+        logger.info("silver_columns_ignored", columns=ignored)
+    table = table.select(keep)
+    for name in JSON_COLS:
+        if name not in keep:
+            continue
+        dtype = table.schema.field(name).type
+        if pa.types.is_string(dtype) or pa.types.is_large_string(dtype):
+            continue
+        values = table.column(name).to_pylist()
+        encoded = [None if v is None else json.dumps(v, ensure_ascii=False) for v in values]
+        table = table.set_column(keep.index(name), name, pa.array(encoded, pa.string()))
+    return table
+
+
+def silver_csv(table):
+    """CSV body for COPY ... WITH (FORMAT csv): strings quoted, NULL as an unquoted empty field.
+
+    PostgreSQL reads an unquoted empty field as NULL and "" as an empty string,
+    and quoted fields may hold quotes (doubled) and newlines.
+    """
+    buf = io.BytesIO()
+    pa_csv.write_csv(table, buf, pa_csv.WriteOptions(include_header=False))
+    buf.seek(0)
+    return buf
+
+
+def insert_silver(cursor, table):
+    """Insert silver rows (JSON columns as JSONB), skipping known job ids"""
+    cursor.execute(SILVER_COLUMNS_SQL)
+    table = silver_copy_table(table, {row[0] for row in cursor.fetchall()})
+    buf = silver_csv(table)
+
+    # Unquoted in the schema, so the column names are stored lower case
+    columns = sql.SQL(", ").join(sql.Identifier(name.lower()) for name in table.column_names)
+    cursor.execute(SILVER_STAGE_SQL)
+    copy_sql = sql.SQL("COPY silver_stage ({}) FROM STDIN WITH (FORMAT csv)").format(columns)
+    cursor.copy_expert(copy_sql.as_string(cursor), buf)
+    cursor.execute(
+        sql.SQL(
+            "INSERT INTO jobs_silver ({columns}) SELECT {columns} FROM silver_stage "
+            "ON CONFLICT (job_id) DO NOTHING;"
+        ).format(columns=columns)
+    )
+
+
+def insert_gold(cursor, table, compact_embeddings=False):
+    """Insert gold embeddings, skipping known job ids; update lexeme_stats for the new ones"""
+    job_ids, embeddings = gold_embeddings(table)
+    cursor.execute(GOLD_STAGE_SQL)
+    cursor.copy_expert(
+        "COPY gold_stage (job_id, embedding) FROM STDIN WITH (FORMAT binary)",
+        io.BytesIO(gold_copy_payload(job_ids, embeddings)),
+    )
+    cursor.execute(GOLD_INSERT_COMPACT_SQL if compact_embeddings else GOLD_INSERT_SQL)
+    add_lexeme_stats(cursor, [row[0] for row in cursor.fetchall()])
 
 
 def delete_old_records(cursor, days=DAYS_BEFORE_PURGE):
-    """Delete old records from jobs_silver table"""
+    """Delete old records from jobs_silver table (cascades to jobs_gold)"""
+    cursor.execute(
+        "SELECT job_id FROM jobs_silver WHERE ingestion_date < CURRENT_DATE - INTERVAL '%s days';",
+        (days,),
+    )
+    subtract_lexeme_stats(cursor, [row[0] for row in cursor.fetchall()])
     sql = "DELETE FROM jobs_silver WHERE ingestion_date < CURRENT_DATE - INTERVAL '%s days';"
     cursor.execute(sql, (days,))
     logger.info("old_records_deleted", count=cursor.rowcount)
 
 
-def main(bucket_name, sb_host, sb_port, sb_user, sb_password, sb_name):
-    """Ingest jobs from GCS (silver + gold) → Supabase"""
+def apply_batch(conn, bucket_name, manifest, compact_embeddings=False):
+    """Ingest the silver then gold files of a batch and record it, in one transaction"""
+    cur = conn.cursor()
+    for entry in manifest["files"].get("silver", []):
+        logger.info("processing_silver", path=entry["path"], batch_id=manifest["batch_id"])
+        insert_silver(cur, read_batch_file(bucket_name, entry))
+    for entry in manifest["files"].get("gold", []):
+        logger.info("processing_gold", path=entry["path"], batch_id=manifest["batch_id"])
+        insert_gold(cur, read_batch_file(bucket_name, entry), compact_embeddings)
+    _record_batch(cur, manifest, "applied")
+    conn.commit()
+    logger.info("batch_applied", batch_id=manifest["batch_id"], producer=manifest["producer"])
+
 
+def ingest_latest_files(conn, bucket_name, compact_embeddings=False):
+    """Legacy path for buckets without batch manifests: files of the most recent day"""
     PREFIX_SILVER = "jobs_silver/"
     PREFIX_GOLD = "jobs_gold/"
 
-    json_cols = [
-        "lieuTravail",
-        "entreprise",
-        "contact",
-        "agence",
-        "origineOffre",
-        "contexteTravail",
-        "salaire",
-        "competences",
-        "formations",
-        "langues",
-        "permis",
-        "qualitesProfessionnelles",
-    ]
-
-    # Get latest batch files from GCS
     silver_keys = get_latest_batch_parquet_files(bucket_name, PREFIX_SILVER)
     gold_keys = get_latest_batch_parquet_files(bucket_name, PREFIX_GOLD)
     logger.info("gcs_listing", silver_count=len(silver_keys), gold_count=len(gold_keys))
-    if gold_keys:
-        logger.info("gold_files", files=gold_keys)
-
-    # Connect to Supabase
-    conn = psycopg2.connect(
-        host=sb_host, database=sb_name, user=sb_user, password=sb_password, port=sb_port
-    )
     cur = conn.cursor()
 
-    # --- Processing Silver Table ---
     if not silver_keys:
         logger.info("no_silver_files")
-    else:
-        for gcs_path in silver_keys:
-            logger.info("processing_silver", path=gcs_path)
-            df_silver = read_parquet_from_gcs(gcs_path)
-
-            for col in json_cols:
-                if col in df_silver.columns:
-                    df_silver[col] = df_silver[col].apply(
-                        lambda x: json.loads(x) if isinstance(x, str) and pd.notnull(x) else x
-                    )
-
-            for _, row in df_silver.iterrows():
-                cols = row.index.tolist()
-                values = []
-                for c in cols:
-                    val = row[c]
-                    if isinstance(val, (list, np.ndarray)):
-                        pass  # collection, not NaN
-                    elif pd.isna(val):
-                        val = None
-
-                    if c in json_cols and val is not None:
-                        values.append(json.dumps(val))
-                    else:
-                        values.append(val)
-
-                placeholders = ", ".join(["%s"] * len(cols))
-                sql = f"INSERT INTO jobs_silver ({', '.join(cols)}) VALUES ({placeholders}) ON CONFLICT (job_id) DO NOTHING;"  # nosec B608 -- parameterized via %s
-                cur.execute(sql, values)
-
-            conn.commit()
-            logger.info("silver_inserted", path=gcs_path)
+    for gcs_path in silver_keys:
+        logger.info("processing_silver", path=gcs_path)
+        insert_silver(cur, read_table_from_gcs(bucket_name, gcs_path))
+        conn.commit()
+        logger.info("silver_inserted", path=gcs_path)
 
-    # --- Processing Gold Table ---
     if not gold_keys:
         logger.info("no_gold_files")
-    else:
-        for gcs_path in gold_keys:
-            logger.info("processing_gold", path=gcs_path)
-            try:
-                df_gold = read_parquet_from_gcs(gcs_path)
-                logger.info(
-                    "gold_read",
-                    path=gcs_path,
-                    shape=list(df_gold.shape),
-                    columns=list(df_gold.columns),
-                )
-            except Exception as e:
-                logger.error(
-                    "gold_read_failed", path=gcs_path, error=str(e), error_type=type(e).__name__
-                )
-                raise
-            df_gold = df_gold[["job_id", "embedding"]]
-
-            df_gold["embedding"] = df_gold["embedding"].apply(
-                lambda x: (
-                    x.tolist()
-                    if hasattr(x, "tolist")
-                    else (json.loads(x) if isinstance(x, str) else x)
-                )
+    for gcs_path in gold_keys:
+        logger.info("processing_gold", path=gcs_path)
+        try:
+            gold_table = read_table_from_gcs(bucket_name, gcs_path)
+            logger.info(
+                "gold_read",
+                path=gcs_path,
+                rows=gold_table.num_rows,
+                schema=str(gold_table.schema.field("embedding").type),
+            )
+        except Exception as e:
+            logger.error(
+                "gold_read_failed", path=gcs_path, error=str(e), error_type=type(e).__name__
             )
+            raise
+        insert_gold(cur, gold_table, compact_embeddings)
+        conn.commit()
+        logger.info("gold_inserted", path=gcs_path, compact=compact_embeddings)
 
-            for _, row in df_gold.iterrows():
-                job_id = row["job_id"]
-                embedding = row["embedding"]
 
-                if embedding is not None and any(pd.isna(i) for i in embedding):
-                    embedding = [None if pd.isna(i) else i for i in embedding]
+def main(bucket_name, sb_host, sb_port, sb_user, sb_password, sb_name, compact_embeddings=False):
+    """Ingest jobs from GCS (silver + gold) → Supabase
 
-                sql = "INSERT INTO jobs_gold (job_id, embedding) VALUES (%s, %s) ON CONFLICT (job_id) DO NOTHING;"
-                cur.execute(sql, (job_id, embedding))
+    bucket_name → GCS bucket name, or an fsspec URL (file://, memory://)
+    compact_embeddings → also write embedding_half / embedding_bin for each gold row
 
+    Applies, oldest first, the batch manifests not yet in ingest_batches. A
+    batch whose checksum matches an applied one (same job ids) is recorded as
+    skipped without reading its files. A batch with a missing file or a file
+    that does not match its manifest (sha256, row count, unreadable parquet)
+    is rolled back and recorded as failed, and the next batch is applied.
+    Buckets without any manifest fall back to the files of the most recent day.
+    """
+    conn = psycopg2.connect(
+        host=sb_host, database=sb_name, user=sb_user, password=sb_password, port=sb_port
+    )
+    try:
+        sync_batches(conn, bucket_name, compact_embeddings)
+    finally:
+        conn.close()
+
+
+def sync_batches(conn, bucket_name, compact_embeddings=False):
+    """Apply the pending batches (or the legacy latest files), then purge old records"""
+    cur = conn.cursor()
+    applied_ids, applied_checksums = _applied_batches(cur)
+    pending = list_pending_batches(bucket_name, applied_ids)
+    logger.info("batches_pending", count=len(pending), known=len(applied_ids))
+
+    if not pending and not applied_ids:
+        logger.info("no_batch_manifests")
+        ingest_latest_files(conn, bucket_name, compact_embeddings)
+    failed = 0
+    for manifest in pending:
+        if manifest["checksum"] in applied_checksums:
+            _record_batch(cur, manifest, "skipped")
             conn.commit()
-            logger.info("gold_inserted", path=gcs_path)
+            logger.info("batch_unchanged_skipped", batch_id=manifest["batch_id"])
+            continue
+        try:
+            apply_batch(conn, bucket_name, manifest, compact_embeddings)
+        except (FileNotFoundError, ValueError) as e:
+            # A bad batch is never retried first on every run: later batches go on
+            conn.rollback()
+            _record_batch(cur, manifest, "failed", f"{type(e).__name__}: {e}")
+            conn.commit()
+            failed += 1
+            logger.error(
+                "batch_failed",
+                batch_id=manifest["batch_id"],
+                error=str(e),
+                error_type=type(e).__name__,
+            )
+            continue
+        applied_checksums.add(manifest["checksum"])
 
-    delete_old_records(cur, days=30)
+    delete_old_records(cur, days=DAYS_BEFORE_PURGE)
     conn.commit()
-    conn.close()
-    logger.info("ingest_supabase_completed")
+    logger.info("ingest_supabase_completed", batches=len(pending), failed=failed)
 
 
 if __name__ == "__main__":
@@ -182,4 +447,5 @@ if __name__ == "__main__":
         sb_user=os.getenv("SB_USER"),
         sb_password=os.getenv("SB_PASSWORD"),
         sb_name=os.getenv("SB_NAME"),
+        compact_embeddings=os.getenv("EMBEDDING_COMPACT", "false").lower() == "true",
     )
@@ -0,0 +1,84 @@
+import structlog
+
+logger = structlog.get_logger()
+
+# ts_stat() only accepts a query string, so the delta rows are staged in a
+# temporary table and selected from there.
+_DELTA_TOKENS_QUERY = (
+    "SELECT g.fts_tokens FROM jobs_gold g "
+    "JOIN lexeme_delta_ids d ON d.job_id = g.job_id "
+    "WHERE g.fts_tokens IS NOT NULL"
+)
+
+
+def rebuild_lexeme_stats(cursor):
+    """Rebuild lexeme_stats from scratch with ts_stat over all jobs_gold.fts_tokens"""
+    cursor.execute("DELETE FROM lexeme_stats;")
+    cursor.execute(
+        """
+        INSERT INTO lexeme_stats (lexeme, ndoc, nentry)
+        SELECT word, ndoc, nentry
+        FROM ts_stat('SELECT fts_tokens FROM jobs_gold WHERE fts_tokens IS NOT NULL');
+        """
+    )
+    logger.info("lexeme_stats_rebuilt", count=cursor.rowcount)
+
+
+def _stage_delta_ids(cursor, job_ids):
+    cursor.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS lexeme_delta_ids (job_id TEXT PRIMARY KEY) "
+        "ON COMMIT DELETE ROWS;"
+    )
+    cursor.execute("TRUNCATE lexeme_delta_ids;")
+    cursor.execute(
+        "INSERT INTO lexeme_delta_ids (job_id) SELECT DISTINCT unnest(%s::text[]);",
+        (list(job_ids),),
+    )
+
+
+def add_lexeme_stats(cursor, job_ids):
+    """Add the lexemes of newly inserted jobs_gold rows to lexeme_stats.
+
+    Must run in the same transaction as the inserts, after fts_tokens is set.
+    Bootstraps with a full rebuild when the table is still empty.
+    """
+    if not job_ids:
+        return
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM lexeme_stats);")
+    if not cursor.fetchone()[0]:
+        rebuild_lexeme_stats(cursor)
+        return
+    _stage_delta_ids(cursor, job_ids)
+    cursor.execute(
+        f"""
+        INSERT INTO lexeme_stats (lexeme, ndoc, nentry)
+        SELECT word, ndoc, nentry FROM ts_stat('{_DELTA_TOKENS_QUERY}')
+        ON CONFLICT (lexeme) DO UPDATE
+        SET ndoc = lexeme_stats.ndoc + EXCLUDED.ndoc,
+            nentry = lexeme_stats.nentry + EXCLUDED.nentry;
+        """  # nosec B608 -- constant query, no user input
+    )
+    logger.info("lexeme_stats_added", jobs=len(job_ids), lexemes=cursor.rowcount)
+
+
+def subtract_lexeme_stats(cursor, job_ids):
+    """Remove the lexemes of jobs_gold rows about to be deleted from lexeme_stats.
+
+    Must run before the DELETE (the rows' fts_tokens are read here).
+    """
+    if not job_ids:
+        return
+    _stage_delta_ids(cursor, job_ids)
+    cursor.execute(
+        f"""
+        UPDATE lexeme_stats s
+        SET ndoc = s.ndoc - d.ndoc, nentry = s.nentry - d.nentry
+        FROM ts_stat('{_DELTA_TOKENS_QUERY}') d
+        WHERE s.lexeme = d.word;
+        """  # nosec B608 -- constant query, no user input
+    )
+    updated = cursor.rowcount
+    cursor.execute("DELETE FROM lexeme_stats WHERE ndoc <= 0;")
+    logger.info(
+        "lexeme_stats_subtracted", jobs=len(job_ids), lexemes=updated, dropped=cursor.rowcount
+    )
@@ -1,10 +1,12 @@
 import asyncio
 
 import functions_framework
+import psycopg2
 import structlog
 from cleanup import cleanup_dead_jobs_main
 from gcs_sync import main as ingest_db_main
 from shared.config import get_config
+from snapshot import publish_search_snapshot
 
 structlog.configure(
     processors=[
@@ -38,11 +40,26 @@ def ingest_db_cf(request):
             sb_user=config["SB_USER"],
             sb_password=config["SB_PASSWORD"],
             sb_name=config["SB_NAME"],
+            compact_embeddings=str(config.get("EMBEDDING_COMPACT", "false")).lower() == "true",
         )
 
         logger.info("step_cleanup")
         cleanup_result = asyncio.run(cleanup_dead_jobs_main(config))
 
+        if config.get("SNAPSHOT_DIR"):
+            logger.info("step_snapshot")
+            conn = psycopg2.connect(
+                host=config["SB_HOST"],
+                database=config["SB_NAME"],
+                user=config["SB_USER"],
+                password=config["SB_PASSWORD"],
+                port=int(config["SB_PORT"]),
+            )
+            try:
+                publish_search_snapshot(conn.cursor(), config["SNAPSHOT_DIR"])
+            finally:
+                conn.close()
+
         logger.info("ingest_db_completed", deleted_count=cleanup_result.get("deleted_count"))
         return {"status": "success", "cleanup_result": cleanup_result}, 200
 
@@ -0,0 +1,147 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import UTC, datetime
+
+import gcsfs
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+# Versioned search snapshot read by the API (api/vector_index.py), on a local
+# path or a gs:// prefix. Every array is a plain .npy file, memory-mappable
+# once local:
+#   {snapshot_dir}/LATEST                  name of the current version
+#   {snapshot_dir}/{version}/job_ids.npy   + embeddings.npy (float32, unit vectors)
+#   {snapshot_dir}/{version}/{intitule,entreprise,lieu,type_contrat,date_creation}.npy
+#   {snapshot_dir}/{version}/lexemes.npy   + lexeme_ndoc.npy (lexeme_stats)
+#   {snapshot_dir}/{version}/meta.json
+LATEST_FILE = "LATEST"
+VERSION_FORMAT = "%Y%m%d_%H%M%S"
+KEEP_VERSIONS = 3
+EMBEDDING_DIM = 384
+
+SNAPSHOT_JOBS_SQL = """
+SELECT g.job_id, g.embedding::text, js.intitule, js.entreprise->>'nom',
+       js.lieuTravail->>'libelle', js.typeContratLibelle, js.dateCreation::text
+FROM jobs_gold g
+JOIN jobs_silver js ON js.job_id = g.job_id
+WHERE g.fts_tokens IS NOT NULL AND g.embedding IS NOT NULL
+ORDER BY g.job_id;
+"""
+
+METADATA_COLUMNS = ["intitule", "entreprise", "lieu", "type_contrat", "date_creation"]
+
+
+def _write_version_dir(path, version, created_at, job_ids, embeddings, metadata, lexeme_stats):
+    # float32, the dtype the API multiplies with: it maps the file without a copy
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    np.save(os.path.join(path, "job_ids.npy"), np.asarray(job_ids, dtype=str))
+    np.save(os.path.join(path, "embeddings.npy"), embeddings)
+    for name, values in (metadata or {}).items():
+        np.save(os.path.join(path, f"{name}.npy"), np.asarray(values, dtype=str))
+    if lexeme_stats:
+        lexemes, ndoc = zip(*lexeme_stats, strict=True)
+        np.save(os.path.join(path, "lexemes.npy"), np.asarray(lexemes, dtype=str))
+        np.save(os.path.join(path, "lexeme_ndoc.npy"), np.asarray(ndoc, dtype=np.int32))
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": version,
+                "rows": len(job_ids),
+                "dim": int(embeddings.shape[1]),
+                "dtype": "float32",
+                "total_docs": len(job_ids),
+                "created_at": created_at,
+            },
+            f,
+        )
+
+
+def _publish_local(snapshot_dir, version, tmp_dir, keep):
+    os.makedirs(snapshot_dir, exist_ok=True)
+    target = os.path.join(snapshot_dir, version)
+    # Re-publishing within the same second replaces that version
+    shutil.rmtree(target, ignore_errors=True)
+    shutil.move(tmp_dir, target)
+
+    latest_tmp = os.path.join(snapshot_dir, f".{LATEST_FILE}.tmp")
+    with open(latest_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(snapshot_dir, LATEST_FILE))
+
+    versions = sorted(
+        d
+        for d in os.listdir(snapshot_dir)
+        if not d.startswith(".") and os.path.isdir(os.path.join(snapshot_dir, d))
+    )
+    for old in versions[:-keep]:
+        shutil.rmtree(os.path.join(snapshot_dir, old), ignore_errors=True)
+
+
+def _publish_gcs(snapshot_dir, version, tmp_dir, keep):
+    fs = gcsfs.GCSFileSystem()
+    base = snapshot_dir.rstrip("/")
+    # LATEST is written last (a single object write is atomic on GCS), so
+    # readers only ever see fully uploaded versions
+    fs.put(tmp_dir + "/", f"{base}/{version}/", recursive=True)
+    fs.pipe(f"{base}/{LATEST_FILE}", version.encode("utf-8"))
+
+    versions = sorted(
+        p.rstrip("/").rsplit("/", 1)[-1] for p in fs.ls(base, detail=False) if fs.isdir(p)
+    )
+    for old in versions[:-keep]:
+        fs.rm(f"{base}/{old}", recursive=True)
+
+
+def write_snapshot(
+    snapshot_dir, job_ids, embeddings, metadata=None, lexeme_stats=None, keep=KEEP_VERSIONS
+):
+    """Write a new snapshot version, then point LATEST at it.
+
+    The version is fully written before LATEST is switched to it (atomic rename
+    locally, single object write on GCS), so readers never see a partial version.
+    Versions beyond the ``keep`` most recent are removed.
+
+    Args:
+        snapshot_dir: Local directory or gs://bucket/prefix.
+        job_ids: Job ids, row order of ``embeddings``.
+        embeddings: Array (n, 384) of unit vectors, stored as float32.
+        metadata: Optional column name → list of n strings.
+        lexeme_stats: Optional list of (lexeme, ndoc) rows.
+        keep: Number of versions kept.
+
+    Returns the new version name.
+    """
+    created_at = time.time()
+    version = datetime.fromtimestamp(created_at, tz=UTC).strftime(VERSION_FORMAT)
+    with tempfile.TemporaryDirectory() as tmp_root:
+        tmp_dir = os.path.join(tmp_root, version)
+        os.makedirs(tmp_dir)
+        _write_version_dir(
+            tmp_dir, version, created_at, job_ids, embeddings, metadata, lexeme_stats
+        )
+        if snapshot_dir.startswith("gs://"):
+            _publish_gcs(snapshot_dir, version, tmp_dir, keep)
+        else:
+            _publish_local(snapshot_dir, version, tmp_dir, keep)
+
+    logger.info("snapshot_published", version=version, rows=len(job_ids), path=snapshot_dir)
+    return version
+
+
+def publish_search_snapshot(cursor, snapshot_dir, keep=KEEP_VERSIONS):
+    """Export the searchable jobs (embeddings, title metadata, lexeme_stats) as a new version"""
+    cursor.execute(SNAPSHOT_JOBS_SQL)
+    rows = cursor.fetchall()
+    job_ids = [row[0] for row in rows]
+    embeddings = np.array([json.loads(row[1]) for row in rows], dtype=np.float32).reshape(
+        len(rows), EMBEDDING_DIM
+    )
+    metadata = {name: [row[i + 2] or "" for row in rows] for i, name in enumerate(METADATA_COLUMNS)}
+    cursor.execute("SELECT lexeme, ndoc FROM lexeme_stats ORDER BY lexeme;")
+    lexeme_stats = cursor.fetchall()
+    return write_snapshot(snapshot_dir, job_ids, embeddings, metadata, lexeme_stats, keep=keep)
@@ -1,10 +1,11 @@
+import hashlib
 import json
 import math
 import os
 import re
 from datetime import datetime, timedelta
 
-import gcsfs
+import fsspec
 import numpy as np
 import polars as pl
 import structlog
@@ -21,11 +22,32 @@ logger = structlog.get_logger()
 
 MODEL_NAME = "antoinelouis/french-me5-small"
 BATCH_SIZE = 32
+EMBEDDING_DIM = 384
+# Texts handed to the model at once: only this many Python strings are alive
+# while encoding (the texts stay in the silver frame's Arrow buffer otherwise)
+EMBED_CHUNK = 2048
+# Rows per Parquet row group of the outputs: the writer encodes a whole row
+# group in memory, so the default (one group for a daily batch) doubles the
+# frame's footprint while writing
+ROW_GROUP_SIZE = 10_000
 
 PREFIX_RAW = "jobs_raw"
 PREFIX_SILVER = "jobs_silver"
 PREFIX_GOLD = "jobs_gold"
 
+# Raw file names end with their export time (ft_client._make_filename); the
+# manifest of the raw prefix maps each file name to that time and its row count.
+RAW_MANIFEST = "_manifest.json"
+RAW_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+RAW_TIMESTAMP_RE = re.compile(r"(\d{8}_\d{6})\.parquet$")
+
+# Each run publishes a batch manifest as its last step (write_outputs): the
+# files of the batch with their row counts and sha256, and a checksum of the
+# batch's job ids. ingest-db (gcs_sync) only applies the batches it has not
+# recorded yet. Databricks (databricks/export.py) writes the same format.
+PREFIX_BATCHES = "batches"
+PRODUCER = "polars"
+
 JSON_COLS = [
     "lieuTravail",
     "entreprise",
@@ -47,6 +69,9 @@ def _is_na(val):
     return val is None or (isinstance(val, float) and math.isnan(val))
 
 
+HTML_RE = r"<.*?>|&([a-zA-Z0-9]+|#[0-9]{1,6}|#x[0-9a-fA-F]{1,6});"
+
+
 def clean_html(text):
     """Strip HTML tags and entities, collapse whitespace.
 
@@ -59,13 +84,25 @@ def clean_html(text):
     if _is_na(text):
         return ""
     text = str(text)
-    clean_re = re.compile(r"<.*?>|&([a-zA-Z0-9]+|#[0-9]{1,6}|#x[0-9a-fA-F]{1,6});")
-    text = re.sub(clean_re, "", text)
+    text = re.sub(HTML_RE, "", text)
     text = text.replace("\n", " ").replace("\r", " ").replace("\t", " ")
     text = re.sub(r" +", " ", text).strip()
     return text
 
 
+def clean_html_expr(col):
+    """clean_html as a Polars expression (runs in Rust, no Python call per row)"""
+    return (
+        pl.col(col)
+        .cast(pl.String)
+        .fill_null("")
+        .str.replace_all(HTML_RE, "")
+        .str.replace_all(r"[\n\r\t]", " ")
+        .str.replace_all(r" +", " ")
+        .str.strip_chars()
+    )
+
+
 def _extract_field(val, field="libelle"):
     if _is_na(val):
         return ""
@@ -89,6 +126,38 @@ def _extract_field(val, field="libelle"):
     return str(val)
 
 
+def extract_field_expr(col, dtype, field="libelle"):
+    """_extract_field as a Polars expression for the column's type.
+
+    Lists of structs (the France Travail nested fields), lists of scalars and
+    structs are handled natively; anything else (JSON strings, objects) falls
+    back to _extract_field per row.
+    """
+    if dtype is None:
+        return pl.lit("")
+    if isinstance(dtype, pl.List) and isinstance(dtype.inner, pl.Struct):
+        if field not in {f.name for f in dtype.inner.fields}:
+            return pl.lit("")
+        value = pl.element().struct.field(field).cast(pl.String)
+        return (
+            pl.col(col)
+            .list.eval(value.filter(value.is_not_null() & (value != "")))
+            .list.join(" ")
+            .fill_null("")
+        )
+    if isinstance(dtype, pl.List) and not dtype.inner.is_nested():
+        return pl.col(col).list.eval(pl.element().cast(pl.String)).list.join(" ").fill_null("")
+    if isinstance(dtype, pl.Struct):
+        if field not in {f.name for f in dtype.fields}:
+            return pl.lit("")
+        return pl.col(col).struct.field(field).cast(pl.String).fill_null("")
+    return (
+        pl.col(col)
+        .map_elements(lambda x: _extract_field(x, field), return_dtype=pl.String)
+        .fill_null("")
+    )
+
+
 def serialize_json_col(val):
     """Convert nested dict/list/ndarray to JSON string for JSONB compatibility.
 
@@ -106,6 +175,29 @@ def serialize_json_col(val):
     return json.dumps(val, ensure_ascii=False, default=_numpy_to_python)
 
 
+def json_encode_expr(col, dtype):
+    """serialize_json_col as a Polars expression: nested columns are JSON-encoded natively.
+
+    Structs use struct.json_encode; lists are wrapped in a one-field struct
+    whose {"v": ...} envelope is stripped. Strings pass through and other
+    types fall back to serialize_json_col per row.
+    """
+    if dtype == pl.String:
+        return pl.col(col)
+    if isinstance(dtype, pl.Struct):
+        encoded = pl.col(col).struct.json_encode()
+    elif isinstance(dtype, (pl.List, pl.Array)):
+        encoded = (
+            pl.struct(pl.col(col).alias("v"))
+            .struct.json_encode()
+            .str.strip_prefix('{"v":')
+            .str.strip_suffix("}")
+        )
+    else:
+        return pl.col(col).map_elements(serialize_json_col, return_dtype=pl.String)
+    return pl.when(pl.col(col).is_not_null()).then(encoded).alias(col)
+
+
 def _numpy_to_python(obj):
     """Convert numpy/polars types to JSON-serializable Python types."""
     if isinstance(obj, (np.integer,)):
@@ -121,70 +213,309 @@ def _numpy_to_python(obj):
     return str(obj)
 
 
+def open_bucket(bucket_name):
+    """Return (filesystem, root path) for a bucket name or an fsspec URL.
+
+    A plain name is a GCS bucket (gs://); any fsspec URL also works, e.g.
+    ``file:///tmp/lake`` or ``memory://lake`` to run the pipeline locally.
+    """
+    url = bucket_name if "://" in bucket_name else f"gs://{bucket_name}"
+    options = {"auto_mkdir": True} if url.startswith("file://") else {}
+    fs, root = fsspec.core.url_to_fs(url, **options)
+    return fs, root.rstrip("/")
+
+
 def _databricks_already_produced(bucket_name):
-    """Check if Databricks already produced today's silver+gold output in GCS.
+    """Check if Databricks already published a batch manifest for today.
 
-    Both silver AND gold must exist to confirm a complete Databricks run.
-    Incomplete runs (silver only) are treated as NOT done → GCP fallback.
+    The manifest is written after both silver and gold files, so it only
+    exists for complete runs; incomplete runs are treated as NOT done → GCP
+    fallback.
     """
-    fs = gcsfs.GCSFileSystem()
+    fs, root = open_bucket(bucket_name)
     today = datetime.now().strftime("%Y%m%d")
     try:
-        silver_exists = (
-            len(fs.glob(f"gs://{bucket_name}/{PREFIX_SILVER}/jobs_silver_{today}*.parquet")) > 0
-        )
-        gold_exists = (
-            len(fs.glob(f"gs://{bucket_name}/{PREFIX_GOLD}/jobs_gold_{today}*.parquet")) > 0
-        )
+        return len(fs.glob(f"{root}/{PREFIX_BATCHES}/batch_{today}_*-databricks.json")) > 0
     except FileNotFoundError:
         return False
-    return silver_exists and gold_exists
+
+
+def _file_time(name, info=None):
+    """Write time of a raw file: the jobs_raw_..._YYYYMMDD_HHMMSS stamp in its name,
+    else the listing's modification time (GCS "updated", local "mtime")."""
+    match = RAW_TIMESTAMP_RE.search(name)
+    if match:
+        return datetime.strptime(match.group(1), RAW_TIMESTAMP_FORMAT)
+    info = info or {}
+    updated = info.get("updated") or info.get("mtime") or info.get("created")
+    if isinstance(updated, (int, float)):
+        return datetime.fromtimestamp(updated)
+    if isinstance(updated, str):
+        updated = datetime.fromisoformat(updated.replace("Z", "+00:00"))
+    if isinstance(updated, datetime):
+        return updated.astimezone().replace(tzinfo=None) if updated.tzinfo else updated
+    return datetime.min
+
+
+def _raw_file_index(fs, raw_dir):
+    """Return {path: (write time, row count or None)} for the raw parquet files.
+
+    One detailed listing (no per-file metadata request) is the source of
+    truth for which files exist; the prefix manifest written by api-to-gcs
+    (_manifest.json, file name → written_at, rows) supplies the write time and
+    row count of the files it registers. Manifest entries whose file is gone
+    are skipped, files it does not register (bench, manual backfill copies)
+    fall back to their name stamp or listing time; both are logged.
+    """
+    listing = fs.glob(f"{raw_dir}/*.parquet", detail=True)
+    try:
+        manifest = json.loads(fs.cat_file(f"{raw_dir}/{RAW_MANIFEST}"))
+    except FileNotFoundError:
+        manifest = None
+    if manifest is None:
+        return {path: (_file_time(path, info), None) for path, info in listing.items()}
+
+    entries = manifest.get("files", {})
+    index, unregistered = {}, []
+    for path, info in listing.items():
+        entry = entries.get(path.rsplit("/", 1)[-1])
+        if entry is None:
+            unregistered.append(path)
+            index[path] = (_file_time(path, info), None)
+        else:
+            index[path] = (datetime.fromisoformat(entry["written_at"]), entry.get("rows"))
+    listed = {path.rsplit("/", 1)[-1] for path in listing}
+    missing = sorted(name for name in entries if name not in listed)
+    if missing:
+        logger.warning("raw_manifest_missing_files", files=missing)
+    if unregistered:
+        logger.warning("raw_files_unregistered", files=sorted(unregistered))
+    return index
 
 
 def _list_raw_files(bucket_name, days=None):
-    """Return sorted list of raw parquet file URIs from GCS.
+    """Return raw parquet file paths (on the bucket's filesystem), oldest first.
 
     days=None → latest file only
-    days=N   → all files from last N days
+    days=N   → all files from last N days (latest file if none)
     """
-    fs = gcsfs.GCSFileSystem()
-    base = f"gs://{bucket_name}/{PREFIX_RAW}/"
+    fs, root = open_bucket(bucket_name)
     try:
-        all_files = fs.glob(f"{base}*.parquet")
+        index = _raw_file_index(fs, f"{root}/{PREFIX_RAW}")
     except FileNotFoundError:
         return []
-
-    if not all_files:
+    if not index:
         return []
 
-    if days is None:
-        return [max(all_files)]
-
-    cutoff = datetime.now() - timedelta(days=days)
-    recent = []
-    for f in all_files:
-        try:
-            info = fs.info(f)
-            updated = info.get("updated", datetime.min)
-            if isinstance(updated, str):
-                updated = datetime.fromisoformat(updated.replace("Z", "+00:00"))
-            if updated.replace(tzinfo=None) >= cutoff:
-                recent.append(f)
-        except Exception:
-            continue
-    return sorted(recent) if recent else [max(all_files)]
+    by_time = sorted(index, key=lambda path: (index[path][0], path))
+    selected = by_time[-1:]
+    if days is not None:
+        cutoff = datetime.now() - timedelta(days=days)
+        selected = [path for path in by_time if index[path][0] >= cutoff] or selected
+    rows = [index[path][1] for path in selected]
+    logger.info(
+        "raw_files_selected",
+        files=len(selected),
+        rows=sum(rows) if None not in rows else None,
+    )
+    return selected
 
 
 def _deduplicate(df):
-    """Deduplicate by id, keeping first occurrence."""
-    if "id" not in df.columns:
+    """Deduplicate by id, keeping the last occurrence (DataFrame or LazyFrame).
+
+    Raw files are scanned oldest first, so an offer present in several files
+    keeps its latest version, as in the Databricks silver notebook.
+    """
+    if "id" not in df.collect_schema().names():
         return df
-    return df.unique(subset=["id"], keep="first", maintain_order=True)
+    return df.unique(subset=["id"], keep="last", maintain_order=True)
+
+
+def _duplicate_counts(lf):
+    """(rows, distinct ids) of the raw frame, reading only its id column."""
+    if "id" not in lf.collect_schema().names():
+        return None
+    return lf.select(pl.len(), pl.col("id").n_unique()).collect().row(0)
+
+
+def scan_raw(fs, raw_files):
+    """Lazy frame over the raw parquet files.
+
+    Only the compressed bytes are fetched here; decoding happens inside the
+    transform plan, so the raw columns (HTML descriptions) are never
+    materialized as a full frame next to the silver one.
+    """
+    frames = []
+    for rf in raw_files:
+        logger.info("loading_raw", file=rf)
+        frames.append(pl.scan_parquet(fs.cat_file(rf)))
+    return pl.concat(frames, how="diagonal_relaxed")
+
+
+def clean_descriptions(df):
+    """Add description_clean (HTML stripped)"""
+    if "description" in df.collect_schema().names():
+        return df.with_columns(clean_html_expr("description").alias("description_clean"))
+    return df.with_columns(pl.lit("").alias("description_clean"))
+
+
+def build_vector_text(df):
+    """Add vector_text_input: title, description, competences, formations, qualities"""
+    schema = df.collect_schema()
+    parts = [
+        pl.col("intitule").fill_null(""),
+        pl.col("description_clean").fill_null(""),
+        extract_field_expr("competences", schema.get("competences"), "libelle"),
+        extract_field_expr("formations", schema.get("formations"), "domaineLibelle"),
+        extract_field_expr(
+            "qualitesProfessionnelles", schema.get("qualitesProfessionnelles"), "libelle"
+        ),
+    ]
+    return df.with_columns(
+        pl.concat_str(parts, separator=" ").str.slice(0, 5000).alias("vector_text_input")
+    )
+
+
+def build_silver(df):
+    """Silver table: job_id, cleaned description, ingestion_date, JSON columns as strings"""
+    schema = df.collect_schema()
+    return (
+        df.with_columns(
+            pl.col("id").cast(pl.String).alias("job_id"),
+            pl.lit(datetime.now().strftime("%Y-%m-%d")).alias("ingestion_date"),
+            *(json_encode_expr(col, schema[col]) for col in JSON_COLS if col in schema),
+        )
+        .drop(["id", "description"], strict=False)
+        .rename({"description_clean": "description"})
+    )
+
+
+def transform(lf, max_jobs=None):
+    """Raw offers → silver rows (with vector_text_input), as one lazy query plan.
+
+    Deduplication, the max_jobs limit, HTML cleaning, text aggregation and the
+    silver columns are planned together and materialized once by the caller,
+    without intermediate full-frame copies.
+    """
+    lf = _deduplicate(lf)
+    if max_jobs:
+        lf = lf.head(max_jobs)
+    return build_silver(build_vector_text(clean_descriptions(lf)))
+
+
+def embed_texts(texts, model=None):
+    """Unit-normalized float32 embeddings of ``texts`` (loads MODEL_NAME unless a model is given).
+
+    ``texts`` is a list or a Polars Series; it is encoded EMBED_CHUNK texts at
+    a time into one preallocated matrix.
+    """
+    if model is None:
+        model = SentenceTransformer(MODEL_NAME, device="cpu")
+    embeddings = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    for start in range(0, len(texts), EMBED_CHUNK):
+        chunk = texts[start : start + EMBED_CHUNK]
+        if isinstance(chunk, pl.Series):
+            chunk = chunk.fill_null("").to_list()
+        embeddings[start : start + len(chunk)] = model.encode(
+            chunk,
+            batch_size=BATCH_SIZE,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+        logger.info("embedding_progress", done=start + len(chunk), total=len(texts))
+    return embeddings
+
+
+def build_gold(job_ids, embeddings):
+    """Gold table: job_id, embedding.
+
+    The embedding column is Array(Float32, 384), written to Parquet as Arrow
+    FixedSizeList<float32, 384> straight from the NumPy matrix (no per-row
+    Python lists). This is the canonical gold schema, also written by
+    databricks/export.py.
+    """
+    return pl.DataFrame(
+        {
+            "job_id": pl.Series(job_ids, dtype=pl.String),
+            "embedding": pl.Series(
+                np.asarray(embeddings, dtype=np.float32),
+                dtype=pl.Array(pl.Float32, EMBEDDING_DIM),
+            ),
+        }
+    )
+
+
+def batch_checksum(silver_ids, gold_ids):
+    """sha256 of the batch's job ids: two batches with the same offers have the same checksum
+
+    The Databricks export computes it with databricks/common.py batch_checksum,
+    which must stay identical (ingest-db compares checksums across producers).
+    """
+    digest = hashlib.sha256()
+    for layer, ids in (("silver", silver_ids), ("gold", gold_ids)):
+        digest.update(f"{layer}\n".encode())
+        digest.update("\n".join(sorted(str(i) for i in ids)).encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def publish_batch_manifest(fs, root, manifest):
+    """Publish a batch manifest under batches/; return its path.
+
+    Written to a temporary name then moved, so a reader listing
+    batches/batch_*.json never sees a partial manifest.
+    """
+    name = f"batch_{manifest['batch_id']}.json"
+    tmp_path = f"{root}/{PREFIX_BATCHES}/_tmp_{name}"
+    path = f"{root}/{PREFIX_BATCHES}/{name}"
+    fs.pipe_file(tmp_path, json.dumps(manifest, indent=1).encode("utf-8"))
+    fs.mv(tmp_path, path)
+    return path
+
+
+class _HashingWriter:
+    """Write-through file wrapper computing the sha256 of what is written (no buffer copy)"""
+
+    def __init__(self, f):
+        self._f = f
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return self._f.write(data)
+
+
+def write_outputs(fs, root, df_silver, df_gold):
+    """Write silver and gold parquet files, then their batch manifest; return the file URLs"""
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    files = {}
+    for layer, prefix, df in (("silver", PREFIX_SILVER, df_silver), ("gold", PREFIX_GOLD, df_gold)):
+        path = f"{prefix}/jobs_{layer}_{ts}.parquet"
+        with fs.open(f"{root}/{path}", "wb") as f:
+            writer = _HashingWriter(f)
+            df.write_parquet(writer, row_group_size=ROW_GROUP_SIZE)
+        files[layer] = [{"path": path, "rows": df.height, "sha256": writer.sha256.hexdigest()}]
+
+    manifest = {
+        "batch_id": f"{ts}-{PRODUCER}",
+        "producer": PRODUCER,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "checksum": batch_checksum(df_silver["job_id"], df_gold["job_id"]),
+        "files": files,
+    }
+    manifest_path = publish_batch_manifest(fs, root, manifest)
+    logger.info("batch_published", batch_id=manifest["batch_id"], manifest=manifest_path)
+    silver_path = f"{root}/{files['silver'][0]['path']}"
+    gold_path = f"{root}/{files['gold'][0]['path']}"
+    return fs.unstrip_protocol(silver_path), fs.unstrip_protocol(gold_path)
 
 
 def run_pipeline(bucket_name, days=None, max_jobs=None, force=False):
     """Bronze → Silver → Gold.
 
+    bucket_name → GCS bucket name, or an fsspec URL (file://, memory://, gs://)
     days=None → latest raw file only (daily mode)
     days=N   → last N days of raw files, deduplicated (manual backfill)
     max_jobs → limit number of jobs processed (for fast tests)
@@ -202,107 +533,30 @@ def run_pipeline(bucket_name, days=None, max_jobs=None, force=False):
     mode = f"last {days} days" if days else "daily (latest file)"
     logger.info("pipeline_mode", mode=mode, file_count=len(raw_files))
 
-    fs = gcsfs.GCSFileSystem()
-    dfs = []
-    for rf in raw_files:
-        logger.info("loading_raw", file=rf)
-        with fs.open(rf, "rb") as f:
-            dfs.append(pl.read_parquet(f, use_pyarrow=True))
-    df = pl.concat(dfs, how="diagonal_relaxed")
-    total_before = df.height
-    df = _deduplicate(df)
-    total_after = df.height
-    if total_before != total_after:
-        logger.info(
-            "deduplication",
-            removed=total_before - total_after,
-            kept=total_after,
-        )
-    logger.info("jobs_loaded", count=total_after)
-
-    if max_jobs and max_jobs < total_after:
-        logger.info("limiting_jobs", limit=max_jobs, total=total_after)
-        df = df.head(max_jobs)
-
-    logger.info("step_clean_html")
-    if "description" in df.columns:
-        df = df.with_columns(
-            pl.col("description")
-            .map_elements(clean_html, return_dtype=pl.String)
-            .alias("description_clean")
-        )
-    else:
-        df = df.with_columns(pl.lit("").alias("description_clean"))
+    fs, root = open_bucket(bucket_name)
+    if max_jobs:
+        logger.info("limiting_jobs", limit=max_jobs)
 
-    logger.info("step_aggregate")
-    competences_text = df["competences"].map_elements(
-        lambda x: _extract_field(x, "libelle"), return_dtype=pl.String
-    )
-    formations_text = df["formations"].map_elements(
-        lambda x: _extract_field(x, "domaineLibelle"), return_dtype=pl.String
-    )
-    qualites_text = pl.Series("qualites", [""] * df.height)
-    if "qualitesProfessionnelles" in df.columns:
-        qualites_text = df["qualitesProfessionnelles"].map_elements(
-            lambda x: _extract_field(x, "libelle"), return_dtype=pl.String
-        )
+    lf_raw = scan_raw(fs, raw_files)
+    counts = _duplicate_counts(lf_raw)
+    if counts and counts[0] != counts[1]:
+        logger.info("deduplication", removed=counts[0] - counts[1], kept=counts[1])
 
-    df = df.with_columns(
-        (
-            pl.col("intitule").fill_null("")
-            + pl.lit(" ")
-            + pl.col("description_clean").fill_null("")
-            + pl.lit(" ")
-            + competences_text.fill_null("")
-            + pl.lit(" ")
-            + formations_text.fill_null("")
-            + pl.lit(" ")
-            + qualites_text.fill_null("")
-        )
-        .str.slice(0, 5000)
-        .alias("vector_text_input")
-    )
+    # Single materialization point: raw files → deduplicated silver rows
+    logger.info("step_transform")
+    df_silver = transform(lf_raw, max_jobs=max_jobs).collect()
+    logger.info("jobs_loaded", count=df_silver.height)
 
     logger.info("step_embeddings", model=MODEL_NAME)
-    model = SentenceTransformer(MODEL_NAME, device="cpu")
-    texts = df["vector_text_input"].fill_null("").to_list()
-    embeddings = model.encode(
-        texts, batch_size=BATCH_SIZE, show_progress_bar=True, convert_to_numpy=True
-    )
+    embeddings = embed_texts(df_silver["vector_text_input"])
     logger.info("embeddings_generated", count=len(embeddings), dims=embeddings.shape[1])
 
-    logger.info("step_silver")
-    df_silver = df.clone()
-    df_silver = df_silver.with_columns(pl.col("id").cast(pl.String).alias("job_id"))
-    df_silver = df_silver.drop(["id", "description"])
-    df_silver = df_silver.rename({"description_clean": "description"})
-    df_silver = df_silver.with_columns(
-        pl.lit(datetime.now().strftime("%Y-%m-%d")).alias("ingestion_date")
-    )
-
-    for col in JSON_COLS:
-        if col in df_silver.columns:
-            df_silver = df_silver.with_columns(
-                pl.col(col).map_elements(serialize_json_col, return_dtype=pl.String).alias(col)
-            )
-
     logger.info("step_gold")
-    df_gold = pl.DataFrame(
-        {
-            "job_id": df_silver["job_id"].to_list(),
-            "embedding": [emb.tolist() for emb in embeddings],
-        }
-    )
+    df_gold = build_gold(df_silver["job_id"], embeddings)
+    del embeddings
 
     logger.info("step_write")
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    silver_path = f"gs://{bucket_name}/{PREFIX_SILVER}/jobs_silver_{ts}.parquet"
-    gold_path = f"gs://{bucket_name}/{PREFIX_GOLD}/jobs_gold_{ts}.parquet"
-
-    with fs.open(silver_path, "wb") as f:
-        df_silver.write_parquet(f)
-    with fs.open(gold_path, "wb") as f:
-        df_gold.write_parquet(f)
+    silver_path, gold_path = write_outputs(fs, root, df_silver, df_gold)
 
     logger.info("silver_written", path=silver_path, count=df_silver.height)
     logger.info("gold_written", path=gold_path, count=df_gold.height)
@@ -10,7 +10,8 @@ def get_config():
     Returns a dict with all project configuration keys:
         FT_CLIENT_ID, FT_CLIENT_SECRET, GCS_BUCKET_NAME, GCP_PROJECT_ID,
         SB_HOST, SB_PORT, SB_NAME, SB_USER, SB_PASSWORD,
-        DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, EMBEDDING_API_URL
+        DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, EMBEDDING_API_URL,
+        EMBEDDING_COMPACT, SNAPSHOT_DIR (optional)
     """
     project_id = os.getenv("GCP_PROJECT_ID", "cvee-20260208")
     client = secretmanager.SecretManagerServiceClient()
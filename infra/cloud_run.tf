@@ -63,6 +63,22 @@ resource "google_cloud_run_v2_service" "api" {
         # No standing cost: stays compatible with the always-free tier.
         startup_cpu_boost = true
       }
+      # Traffic is held until the model is loaded (dummy encode) and the DB pool is
+      # open (DB_CONNECT_TIMEOUT bounds the wait, well within the probe window)
+      startup_probe {
+        http_get {
+          path = "/health/ready"
+        }
+        period_seconds    = 2
+        failure_threshold = 60
+        timeout_seconds   = 2
+      }
+      liveness_probe {
+        http_get {
+          path = "/health/live"
+        }
+        period_seconds = 30
+      }
     }
     timeout = "300s"
     scaling {
@@ -0,0 +1,50 @@
+"""add jobs_gold compact embedding columns (halfvec + binary)
+
+Revision ID: 5d1e8b3c7f20
+Revises: 3a9f1c7b2d84
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "5d1e8b3c7f20"
+down_revision: str | Sequence[str] | None = "3a9f1c7b2d84"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Opt-in compact copies of jobs_gold.embedding (requires pgvector >= 0.7):
+    # - embedding_half: halfvec(384), half the bytes of vector(384)
+    # - embedding_bin: 1 bit per dimension (binary quantization), 48 bytes
+    # Additive and nullable: the full-precision column stays the source of
+    # truth and is still used for exact rescoring of the coarse candidates.
+    # Nothing reads these columns until EMBEDDING_SEARCH_MODE is switched.
+    op.execute("ALTER TABLE jobs_gold ADD COLUMN IF NOT EXISTS embedding_half halfvec(384);")
+    op.execute("ALTER TABLE jobs_gold ADD COLUMN IF NOT EXISTS embedding_bin bit(384);")
+    op.execute(
+        """
+        UPDATE jobs_gold
+        SET embedding_half = embedding::halfvec(384),
+            embedding_bin = binary_quantize(embedding)::bit(384)
+        WHERE embedding IS NOT NULL AND embedding_half IS NULL;
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_gold_embedding_half_hnsw "
+        "ON jobs_gold USING hnsw (embedding_half halfvec_l2_ops);"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_gold_embedding_bin_hnsw "
+        "ON jobs_gold USING hnsw (embedding_bin bit_hamming_ops);"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_gold_embedding_bin_hnsw;")
+    op.execute("DROP INDEX IF EXISTS idx_gold_embedding_half_hnsw;")
+    op.execute("ALTER TABLE jobs_gold DROP COLUMN IF EXISTS embedding_bin;")
+    op.execute("ALTER TABLE jobs_gold DROP COLUMN IF EXISTS embedding_half;")
@@ -0,0 +1,79 @@
+"""normalize jobs_gold embeddings and index them for inner product
+
+Revision ID: 9b4f6a2d1e57
+Revises: 5d1e8b3c7f20
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "9b4f6a2d1e57"
+down_revision: str | Sequence[str] | None = "5d1e8b3c7f20"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+BATCH_SIZE = 2000
+
+
+def upgrade() -> None:
+    # The search now ranks by negative inner product (<#>), which equals cosine
+    # ordering only on unit vectors. New embeddings are normalized at encode
+    # time; rewrite the existing ones in keyset batches, each committed on its
+    # own so a large table never holds one long transaction / row-lock set.
+    # Compact copies (migration 5d1e8b3c7f20) are re-derived from the result.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        last_job_id = ""
+        while True:
+            job_ids = (
+                conn.execute(
+                    sa.text(
+                        "SELECT job_id FROM jobs_gold WHERE job_id > :last "
+                        "ORDER BY job_id LIMIT :batch"
+                    ),
+                    {"last": last_job_id, "batch": BATCH_SIZE},
+                )
+                .scalars()
+                .all()
+            )
+            if not job_ids:
+                break
+            conn.execute(
+                sa.text(
+                    """
+                    UPDATE jobs_gold
+                    SET embedding = l2_normalize(embedding),
+                        embedding_half = CASE WHEN embedding_half IS NULL THEN NULL
+                            ELSE l2_normalize(embedding)::halfvec(384) END,
+                        embedding_bin = CASE WHEN embedding_bin IS NULL THEN NULL
+                            ELSE binary_quantize(l2_normalize(embedding))::bit(384) END
+                    WHERE job_id = ANY(:ids) AND embedding IS NOT NULL;
+                    """
+                ),
+                {"ids": list(job_ids)},
+            )
+            last_job_id = job_ids[-1]
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_gold_embedding_hnsw_ip "
+        "ON jobs_gold USING hnsw (embedding vector_ip_ops);"
+    )
+    op.execute("DROP INDEX IF EXISTS idx_gold_embedding_half_hnsw;")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_gold_embedding_half_hnsw_ip "
+        "ON jobs_gold USING hnsw (embedding_half halfvec_ip_ops);"
+    )
+
+
+def downgrade() -> None:
+    # Normalization is not reverted: unit vectors rank identically under L2.
+    op.execute("DROP INDEX IF EXISTS idx_gold_embedding_half_hnsw_ip;")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_gold_embedding_half_hnsw "
+        "ON jobs_gold USING hnsw (embedding_half halfvec_l2_ops);"
+    )
+    op.execute("DROP INDEX IF EXISTS idx_gold_embedding_hnsw_ip;")
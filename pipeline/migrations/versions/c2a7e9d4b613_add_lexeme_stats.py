@@ -0,0 +1,42 @@
+"""add lexeme_stats (document frequency per French lexeme)
+
+Revision ID: c2a7e9d4b613
+Revises: 9b4f6a2d1e57
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "c2a7e9d4b613"
+down_revision: str | Sequence[str] | None = "9b4f6a2d1e57"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Corpus statistics for query-term selection in the API (IDF = ln(N / ndoc)).
+    # Rebuilt by ingest-db from ts_stat over jobs_gold.fts_tokens after each ingest.
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS lexeme_stats (
+            lexeme TEXT PRIMARY KEY,
+            ndoc INTEGER NOT NULL,
+            nentry INTEGER NOT NULL
+        );
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO lexeme_stats (lexeme, ndoc, nentry)
+        SELECT word, ndoc, nentry
+        FROM ts_stat('SELECT fts_tokens FROM jobs_gold WHERE fts_tokens IS NOT NULL')
+        ON CONFLICT (lexeme) DO NOTHING;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS lexeme_stats;")
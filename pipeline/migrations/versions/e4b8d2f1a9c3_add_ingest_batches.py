@@ -0,0 +1,46 @@
+"""add ingest_batches (batch manifests applied by ingest-db)
+
+Revision ID: e4b8d2f1a9c3
+Revises: c2a7e9d4b613
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "e4b8d2f1a9c3"
+down_revision: str | Sequence[str] | None = "c2a7e9d4b613"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # One row per batch manifest (batches/batch_<batch_id>.json in the bucket)
+    # consumed by ingest-db: 'applied' when its files were ingested, 'skipped'
+    # when an applied batch already had the same checksum (same job ids),
+    # 'failed' when a file was missing or did not match the manifest (error
+    # says why; delete the row to retry the batch).
+    # ingest-db only reads the manifests whose batch_id is not in this table.
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ingest_batches (
+            batch_id TEXT PRIMARY KEY,
+            producer TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            silver_rows INTEGER NOT NULL,
+            gold_rows INTEGER NOT NULL,
+            status TEXT NOT NULL CHECK (status IN ('applied', 'skipped', 'failed')),
+            error TEXT,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ingest_batches_checksum_idx ON ingest_batches (checksum);"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS ingest_batches;")
@@ -0,0 +1,116 @@
+"""Aggregate the sampled hybrid-query plans logged by the API.
+
+With EXPLAIN_SAMPLE_RATE > 0 the API logs a "query_plan_sample" line per
+sampled search (api/query_plan.py), whose ``sample=`` field is the plan
+summary as JSON. This reads those lines from log files (or stdin) and reports,
+per plan node, how often it appears, its self time (p50/p95/max) and how often
+it spilled to disk, sorted by p95 self time.
+
+Usage:
+    gcloud logging read 'textPayload:query_plan_sample' --format='value(textPayload)' \\
+        | uv run python scripts/plan_samples.py
+    uv run python scripts/plan_samples.py api.log --json
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+from collections import defaultdict
+from collections.abc import Iterable
+
+EVENT = "query_plan_sample"
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def parse_samples(lines: Iterable[str]) -> list[dict]:
+    """Extract the plan summaries from console-rendered log lines."""
+    decoder = json.JSONDecoder()
+    samples = []
+    for line in lines:
+        line = ANSI_ESCAPE.sub("", line)
+        if EVENT not in line or "sample=" not in line:
+            continue
+        start = line.index("sample=") + len("sample=")
+        if line[start] == "'":  # rendered with repr()
+            start += 1
+        try:
+            sample, _ = decoder.raw_decode(line, start)
+        except json.JSONDecodeError:
+            continue
+        samples.append(sample)
+    return samples
+
+
+def _pct(ordered: list[float], q: float) -> float:
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def aggregate(samples: list[dict]) -> dict:
+    self_ms: dict[str, list[float]] = defaultdict(list)
+    spills: dict[str, int] = defaultdict(int)
+    for sample in samples:
+        for node in sample["nodes"]:
+            self_ms[node["node"]].append(node["self_ms"])
+            spills[node["node"]] += bool(node["spilled"])
+
+    nodes = []
+    for name, values in self_ms.items():
+        ordered = sorted(values)
+        nodes.append(
+            {
+                "node": name,
+                "count": len(ordered),
+                "self_p50_ms": round(statistics.median(ordered), 3),
+                "self_p95_ms": round(_pct(ordered, 0.95), 3),
+                "self_max_ms": round(ordered[-1], 3),
+                "spill_rate": round(spills[name] / len(ordered), 3),
+            }
+        )
+    nodes.sort(key=lambda n: n["self_p95_ms"], reverse=True)
+
+    execution = sorted(s["execution_ms"] for s in samples)
+    return {
+        "samples": len(samples),
+        "execution_p50_ms": round(statistics.median(execution), 3) if execution else 0.0,
+        "execution_p95_ms": round(_pct(execution, 0.95), 3) if execution else 0.0,
+        "planning_p50_ms": (
+            round(statistics.median(s["planning_ms"] for s in samples), 3) if samples else 0.0
+        ),
+        "spill_rate": round(sum(s["spilled"] for s in samples) / max(len(samples), 1), 3),
+        "nodes": nodes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="*", help="log files (default: stdin)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--top", type=int, default=15, help="nodes shown in the table")
+    args = parser.parse_args()
+
+    lines: list[str] = []
+    for path in args.logs:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines.extend(f)
+    report = aggregate(parse_samples(lines if args.logs else sys.stdin))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"{report['samples']} samples — execution p50 {report['execution_p50_ms']} ms, "
+        f"p95 {report['execution_p95_ms']} ms, planning p50 {report['planning_p50_ms']} ms, "
+        f"spilled {100 * report['spill_rate']:.0f}%"
+    )
+    print(f"{'node':<50} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'spill':>6}")
+    for node in report["nodes"][: args.top]:
+        print(
+            f"{node['node'][:50]:<50} {node['count']:>5} {node['self_p50_ms']:>9} "
+            f"{node['self_p95_ms']:>9} {node['self_max_ms']:>9} {node['spill_rate']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
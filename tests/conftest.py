@@ -99,17 +99,18 @@ def _mock_api_module_deps():
     with (
         patch("embed_cv_search._get_model", return_value=MagicMock()),
         patch("utils._get_pool", new_callable=AsyncMock),
+        patch("utils._load_lexeme_stats", new_callable=AsyncMock),
     ):
         yield
 
 
 @pytest.fixture(autouse=True)
 def _add_src_to_path():
-    """Add api/ and functions/pipeline/ to sys.path for test imports."""
+    """Add api/, functions/pipeline/ and functions/ingest-db/ to sys.path for test imports."""
     from pathlib import Path
 
     root = Path(__file__).parent.parent
-    for subdir in ("api", "functions/pipeline"):
+    for subdir in ("functions/ingest-db", "api", "functions/pipeline"):
         p = root / subdir
         if str(p) not in sys.path:
             sys.path.insert(0, str(p))
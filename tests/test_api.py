@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -6,8 +6,9 @@ from fastapi.testclient import TestClient
 
 @pytest.fixture
 def client() -> TestClient:
-    from app import app
+    from app import app, limiter
 
+    limiter.reset()  # each test starts with a fresh /embed-cv rate-limit window
     return TestClient(app)
 
 
@@ -18,6 +19,126 @@ async def test_health_endpoint(client: TestClient) -> None:
     assert response.json() == {"status": "healthy"}
 
 
+@pytest.mark.asyncio
+async def test_health_live(client: TestClient) -> None:
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+@pytest.mark.asyncio
+async def test_health_ready_503_until_warm(client: TestClient) -> None:
+    with patch("app._ready", False):
+        response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming_up"
+
+
+@pytest.mark.asyncio
+async def test_warmup_runs_phases_and_sets_ready(client: TestClient) -> None:
+    import app
+
+    with (
+        patch("app._ready", False),
+        patch("app._warmup_phases", {}),
+        patch("app._warmup_errors", {}),
+        patch("app.warmup_model") as mock_model,
+        patch("app.warmup_pdf_pool"),
+        patch("app.warmup_pool", new_callable=AsyncMock) as mock_pool,
+        patch("app.load_lexeme_stats", new_callable=AsyncMock, side_effect=OSError("no db")),
+    ):
+        await app._warmup(load_stats=True)
+        mock_model.assert_called_once()
+        mock_pool.assert_awaited_once()
+        assert set(app._warmup_phases) == {"model", "pdf_pool", "db_pool"}
+        assert "lexeme_stats" in app._warmup_errors
+
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+
+@pytest.mark.asyncio
+async def test_warmup_ready_once_model_and_db_pool_are_up(client: TestClient) -> None:
+    import app
+
+    def pdf_pool() -> None:
+        # Model loaded and DB pool open: the remaining phases do not hold readiness
+        assert client.get("/health/ready").status_code == 200
+
+    with (
+        patch("app._ready", False),
+        patch("app._warmup_phases", {}),
+        patch("app._warmup_errors", {}),
+        patch("app.warmup_model"),
+        patch("app.warmup_pdf_pool", side_effect=pdf_pool),
+        patch("app.warmup_pool", new_callable=AsyncMock),
+    ):
+        await app._warmup(load_stats=False)
+        assert app._warmup_phases.keys() == {"model", "db_pool", "pdf_pool"}
+        assert app._ready is True
+
+
+@pytest.mark.asyncio
+async def test_warmup_not_ready_when_db_pool_fails(client: TestClient) -> None:
+    import app
+    from psycopg_pool import PoolTimeout
+
+    with (
+        patch("app._ready", False),
+        patch("app._warmup_phases", {}),
+        patch("app._warmup_errors", {}),
+        patch("app.warmup_model"),
+        patch("app.warmup_pdf_pool"),
+        patch("app.warmup_pool", side_effect=PoolTimeout("pool initialization incomplete")),
+    ):
+        await app._warmup(load_stats=False)
+        assert "db_pool" in app._warmup_errors
+        assert app._ready is False
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_warmup_not_ready_when_model_fails(client: TestClient) -> None:
+    import app
+
+    with (
+        patch("app._ready", False),
+        patch("app._warmup_phases", {}),
+        patch("app._warmup_errors", {}),
+        patch("app.warmup_model", side_effect=OSError("no model")),
+        patch("app.warmup_pdf_pool"),
+        patch("app.warmup_pool", new_callable=AsyncMock),
+    ):
+        await app._warmup(load_stats=False)
+        assert app._ready is False
+        assert client.get("/health/ready").status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_health_reports_vector_index(client: TestClient) -> None:
+    mock_index = MagicMock()
+    mock_index.status = MagicMock(
+        return_value={
+            "enabled": True,
+            "loaded": True,
+            "version": "20260101_000000",
+            "latest_version": "20260101_000000",
+            "rows": 3,
+            "age_seconds": 12.0,
+            "stale": False,
+        }
+    )
+    with patch("app.get_vector_index", return_value=mock_index):
+        response = client.get("/health")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["vector_index"]["version"] == "20260101_000000"
+    assert body["vector_index"]["stale"] is False
+
+
 @pytest.mark.asyncio
 async def test_embed_cv_pdf_success(
     client: TestClient, mock_search_results: list[dict], sample_pdf_bytes: bytes
@@ -36,6 +157,31 @@ async def test_embed_cv_pdf_success(
         assert data["top_jobs"][0]["job_id"] == "123ABC"
 
 
+@pytest.mark.asyncio
+async def test_embed_cv_records_stage_metrics(
+    client: TestClient, mock_search_results: list[dict], sample_pdf_bytes: bytes
+) -> None:
+    from prometheus_client import REGISTRY
+
+    def count(stage: str) -> float:
+        name = "cv_search_stage_duration_seconds_count"
+        return REGISTRY.get_sample_value(name, {"stage": stage}) or 0.0
+
+    before = {stage: count(stage) for stage in ("file_read", "pdf_extract", "total")}
+    with patch("app.embed_cv_and_search_async", new_callable=AsyncMock) as mock_search:
+        mock_search.return_value = mock_search_results
+        client.post(
+            "/embed-cv",
+            files={"file": ("test.pdf", sample_pdf_bytes, "application/pdf")},
+        )
+    for stage, value in before.items():
+        assert count(stage) == value + 1
+
+    metrics = client.get("/metrics").text
+    assert 'cv_search_stage_duration_seconds_bucket{le="0.1",stage="pdf_extract"}' in metrics
+    assert "cv_search_empty_text_total" in metrics
+
+
 @pytest.mark.asyncio
 async def test_embed_cv_rejects_non_pdf(client: TestClient) -> None:
     response = client.post(
@@ -57,3 +203,138 @@ async def test_embed_cv_empty_results(client: TestClient, sample_pdf_bytes: byte
         )
         assert response.status_code == 200
         assert response.json() == {"top_jobs": []}
+
+
+@pytest.mark.asyncio
+async def test_embed_cv_oversize_pdf_rejected_413(
+    client: TestClient, sample_pdf_bytes: bytes
+) -> None:
+    with patch("pdf_extract.settings.max_upload_bytes", 100):
+        response = client.post(
+            "/embed-cv",
+            files={"file": ("test.pdf", sample_pdf_bytes, "application/pdf")},
+        )
+    assert response.status_code == 413
+    assert response.json()["detail"]["error"] == "too_large"
+
+
+@pytest.mark.asyncio
+async def test_pdf_extraction_shares_upload_limit(sample_pdf_bytes: bytes) -> None:
+    from config import settings
+    from pdf_extract import PdfExtractionError, extract_text_async
+
+    assert not hasattr(settings, "pdf_max_bytes")
+    with (
+        patch("pdf_extract.settings.max_upload_bytes", len(sample_pdf_bytes) - 1),
+        pytest.raises(PdfExtractionError) as exc_info,
+    ):
+        await extract_text_async(sample_pdf_bytes)
+    assert exc_info.value.code == "too_large"
+
+
+@pytest.mark.asyncio
+async def test_embed_cv_pdf_timeout_structured_error(
+    client: TestClient, sample_pdf_bytes: bytes
+) -> None:
+    from pdf_extract import PdfExtractionError
+
+    with patch(
+        "app.extract_text_async",
+        new_callable=AsyncMock,
+        side_effect=PdfExtractionError("timeout", "PDF extraction exceeded 5.0s"),
+    ):
+        response = client.post(
+            "/embed-cv",
+            files={"file": ("test.pdf", sample_pdf_bytes, "application/pdf")},
+        )
+    assert response.status_code == 422
+    assert response.json()["detail"] == {
+        "error": "timeout",
+        "message": "PDF extraction exceeded 5.0s",
+    }
+
+
+@pytest.mark.asyncio
+async def test_embed_cv_oversize_upload_rejected_before_parsing(client: TestClient) -> None:
+    with patch("app.read_upload", new_callable=AsyncMock) as mock_read:
+        response = client.post(
+            "/embed-cv",
+            files={"file": ("big.pdf", b"0" * (6 * 1024 * 1024), "application/pdf")},
+        )
+    assert response.status_code == 413
+    assert response.json()["detail"]["error"] == "too_large"
+    mock_read.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_upload_limit_applies_to_chunked_body() -> None:
+    from fastapi import FastAPI, File, UploadFile
+    from upload import UploadSizeLimitMiddleware
+
+    small_app = FastAPI()
+    small_app.add_middleware(UploadSizeLimitMiddleware, path="/upload", max_bytes=1000)
+
+    @small_app.post("/upload")
+    async def upload(file: UploadFile = File(...)) -> dict[str, int]:
+        return {"size": len(await file.read())}
+
+    boundary = "testboundary"
+    body = (
+        (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="a.pdf"\r\n'
+            f"Content-Type: application/pdf\r\n\r\n"
+        ).encode()
+        + b"0" * 100_000
+        + f"\r\n--{boundary}--\r\n".encode()
+    )
+
+    def chunks():  # no Content-Length: sent with chunked transfer encoding
+        for i in range(0, len(body), 4096):
+            yield body[i : i + 4096]
+
+    response = TestClient(small_app).post(
+        "/upload",
+        content=chunks(),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("value", [b"abc", b"-1", b""])
+async def test_upload_limit_rejects_malformed_content_length(value: bytes) -> None:
+    import json
+
+    from upload import UploadSizeLimitMiddleware
+
+    inner = AsyncMock()
+    middleware = UploadSizeLimitMiddleware(inner, path="/upload", max_bytes=1000)
+    sent: list[dict] = []
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/upload", "headers": [(b"content-length", value)]}
+    await middleware(scope, AsyncMock(), send)
+
+    inner.assert_not_called()
+    assert sent[0]["status"] == 400
+    assert json.loads(sent[1]["body"])["detail"]["error"] == "invalid_content_length"
+
+
+@pytest.mark.asyncio
+async def test_read_upload_hashes_and_enforces_limit() -> None:
+    import hashlib
+    import io
+
+    from fastapi import HTTPException, UploadFile
+    from upload import read_upload
+
+    data = b"%PDF-1.4 " * 20_000
+    content, digest = await read_upload(UploadFile(io.BytesIO(data)), max_bytes=len(data))
+    assert content == data
+    assert digest == hashlib.sha256(data).hexdigest()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await read_upload(UploadFile(io.BytesIO(data)), max_bytes=len(data) - 1)
+    assert exc_info.value.status_code == 413
@@ -136,6 +136,26 @@ async def test_filter_dead_jobs_removes_dead() -> None:
         assert all(j["job_id"] in ("A", "C") for j in result)
 
 
+@pytest.mark.asyncio
+async def test_filter_dead_jobs_counts_dead_links() -> None:
+    from embed_cv_search import filter_dead_jobs
+    from prometheus_client import REGISTRY
+
+    def sample(name: str) -> float:
+        return REGISTRY.get_sample_value(name) or 0.0
+
+    checked, dead = sample("cv_search_links_checked_total"), sample("cv_search_dead_links_total")
+    jobs = [{"job_id": "A"}, {"job_id": "B"}]
+
+    async def mock_verify(job_id: str, timeout: float = 0.2) -> dict:
+        return {"job_id": job_id, "alive": job_id == "A", "status": 200}
+
+    with patch("embed_cv_search.verify_job_link", side_effect=mock_verify):
+        await filter_dead_jobs(jobs)
+    assert sample("cv_search_links_checked_total") == checked + 2
+    assert sample("cv_search_dead_links_total") == dead + 1
+
+
 @pytest.mark.asyncio
 async def test_filter_dead_jobs_empty() -> None:
     from embed_cv_search import filter_dead_jobs
@@ -235,3 +255,4 @@ async def test_embed_cv_and_search_returns_results() -> None:
         results = await embed_cv_and_search("Développeur Python expérimenté")
         assert len(results) == 1
         assert results[0]["job_id"] == "123ABC"
+        assert mock_model.encode.call_args.kwargs["normalize_embeddings"] is True
@@ -0,0 +1,351 @@
+import hashlib
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+
+def _parquet(table: pa.Table) -> bytes:
+    buf = io.BytesIO()
+    pq.write_table(table, buf)
+    return buf.getvalue()
+
+
+def _publish_batch(fs, root: str, batch_id: str, created_at: str, job_ids: list[str]) -> dict:
+    """Write a silver file and its batch manifest, as the producers do."""
+    data = _parquet(pa.table({"job_id": job_ids, "intitule": ["Dev"] * len(job_ids)}))
+    path = f"jobs_silver/jobs_silver_{batch_id}.parquet"
+    fs.pipe_file(f"{root}/{path}", data)
+    manifest = {
+        "batch_id": batch_id,
+        "producer": "polars",
+        "created_at": created_at,
+        "checksum": f"sum-{'-'.join(job_ids)}",
+        "files": {
+            "silver": [
+                {"path": path, "rows": len(job_ids), "sha256": hashlib.sha256(data).hexdigest()}
+            ],
+            "gold": [],
+        },
+    }
+    fs.pipe_file(f"{root}/batches/batch_{batch_id}.json", json.dumps(manifest).encode())
+    return manifest
+
+
+@pytest.fixture
+def bucket():
+    import fsspec
+
+    fs = fsspec.filesystem("memory")
+    yield fs, "/sync-test"
+    if fs.exists("/sync-test"):
+        fs.rm("/sync-test", recursive=True)
+
+
+def _conn(applied_rows: list[tuple[str, str, str]]) -> tuple[MagicMock, MagicMock]:
+    cursor = MagicMock()
+    cursor.fetchall.return_value = applied_rows
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    return conn, cursor
+
+
+def _recorded(cursor: MagicMock) -> list[tuple]:
+    """(batch_id, status, error) of each ingest_batches insert."""
+    inserts = [c.args[1] for c in cursor.execute.call_args_list if "ingest_batches (" in c.args[0]]
+    return [(params[0], params[5], params[6]) for params in inserts]
+
+
+@pytest.mark.asyncio
+async def test_list_pending_batches_skips_applied_oldest_first(bucket) -> None:
+    from gcs_sync import list_pending_batches
+
+    fs, root = bucket
+    _publish_batch(fs, root, "20260103_000000-polars", "2026-01-03T00:00:00", ["J3"])
+    _publish_batch(fs, root, "20260101_000000-polars", "2026-01-01T00:00:00", ["J1"])
+    _publish_batch(fs, root, "20260102_000000-databricks", "2026-01-02T00:00:00", ["J2"])
+
+    pending = list_pending_batches("memory://sync-test", {"20260102_000000-databricks"})
+    assert [m["batch_id"] for m in pending] == [
+        "20260101_000000-polars",
+        "20260103_000000-polars",
+    ]
+    assert list_pending_batches("memory://absent-bucket", set()) == []
+
+
+@pytest.mark.asyncio
+async def test_read_batch_file_rejects_mismatches(bucket) -> None:
+    from gcs_sync import read_batch_file
+
+    fs, root = bucket
+    manifest = _publish_batch(fs, root, "b1", "2026-01-01T00:00:00", ["J1", "J2"])
+    entry = manifest["files"]["silver"][0]
+    assert read_batch_file("memory://sync-test", entry).num_rows == 2
+
+    with pytest.raises(ValueError, match="checksum mismatch"):
+        read_batch_file("memory://sync-test", {**entry, "sha256": "0" * 64})
+    with pytest.raises(ValueError, match="2 rows, manifest says 3"):
+        read_batch_file("memory://sync-test", {**entry, "rows": 3})
+    with pytest.raises(FileNotFoundError):
+        read_batch_file("memory://sync-test", {**entry, "path": "jobs_silver/gone.parquet"})
+
+
+@pytest.mark.asyncio
+async def test_sync_batches_skips_batch_with_applied_checksum(bucket) -> None:
+    from gcs_sync import sync_batches
+
+    fs, root = bucket
+    manifest = _publish_batch(fs, root, "b2", "2026-01-02T00:00:00", ["J1"])
+    conn, cursor = _conn([("b1", manifest["checksum"], "applied")])
+
+    with (
+        patch("gcs_sync.apply_batch") as mock_apply,
+        patch("gcs_sync.ingest_latest_files") as mock_legacy,
+        patch("gcs_sync.delete_old_records"),
+    ):
+        sync_batches(conn, "memory://sync-test")
+
+    mock_apply.assert_not_called()
+    mock_legacy.assert_not_called()
+    assert _recorded(cursor) == [("b2", "skipped", None)]
+
+
+@pytest.mark.asyncio
+async def test_sync_batches_records_failed_batch_and_continues(bucket) -> None:
+    from gcs_sync import sync_batches
+
+    fs, root = bucket
+    bad = _publish_batch(fs, root, "b1", "2026-01-01T00:00:00", ["J1"])
+    fs.rm(f"{root}/{bad['files']['silver'][0]['path']}")
+    _publish_batch(fs, root, "b2", "2026-01-02T00:00:00", ["J2"])
+    conn, cursor = _conn([])
+
+    with (
+        patch("gcs_sync.insert_silver") as mock_insert,
+        patch("gcs_sync.delete_old_records"),
+    ):
+        sync_batches(conn, "memory://sync-test")
+
+    conn.rollback.assert_called_once()
+    (failed, applied) = _recorded(cursor)
+    assert failed[:2] == ("b1", "failed")
+    assert failed[2].startswith("FileNotFoundError")
+    assert applied == ("b2", "applied", None)
+    (table,) = [c.args[1] for c in mock_insert.call_args_list]
+    assert table.column("job_id").to_pylist() == ["J2"]
+
+
+@pytest.mark.asyncio
+async def test_sync_batches_legacy_fallback_without_manifests(bucket) -> None:
+    from gcs_sync import sync_batches
+
+    conn, cursor = _conn([])
+    with (
+        patch("gcs_sync.ingest_latest_files") as mock_legacy,
+        patch("gcs_sync.delete_old_records") as mock_purge,
+    ):
+        sync_batches(conn, "memory://sync-test")
+
+    mock_legacy.assert_called_once_with(conn, "memory://sync-test", False)
+    mock_purge.assert_called_once()
+    assert _recorded(cursor) == []
+
+
+@pytest.mark.asyncio
+async def test_main_closes_connection_on_error() -> None:
+    import gcs_sync
+
+    conn = MagicMock()
+    with (
+        patch("gcs_sync.psycopg2.connect", return_value=conn),
+        patch("gcs_sync.sync_batches", side_effect=RuntimeError("db down")),
+        pytest.raises(RuntimeError),
+    ):
+        gcs_sync.main("memory://sync-test", "host", 5432, "user", "pw", "db")
+    conn.close.assert_called_once()
+
+
+def _unit_rows(n: int, seed: int = 0):
+    import numpy as np
+
+    x = np.random.default_rng(seed).standard_normal((n, 384)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def _gold_tables(matrix) -> dict[str, pa.Table]:
+    """The same embeddings in each gold format found in the bucket."""
+    job_ids = [f"J{i}" for i in range(len(matrix))]
+    return {
+        "fixed_size_list": pa.table(
+            {"job_id": job_ids, "embedding": pa.FixedSizeListArray.from_arrays(matrix.ravel(), 384)}
+        ),
+        "list_double": pa.table(
+            {"job_id": job_ids, "embedding": matrix.astype("float64").tolist()}
+        ),
+        "json_string": pa.table(
+            {"job_id": job_ids, "embedding": [json.dumps(row.tolist()) for row in matrix]}
+        ),
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", ["fixed_size_list", "list_double", "json_string"])
+async def test_gold_embeddings_decodes_each_format(fmt: str) -> None:
+    import numpy as np
+    from gcs_sync import gold_embeddings
+
+    matrix = _unit_rows(5)
+    table = _gold_tables(matrix)[fmt]
+    # Round trip through parquet, as read from the bucket
+    table = pq.read_table(io.BytesIO(_parquet(table)))
+
+    job_ids, decoded = gold_embeddings(table)
+    assert job_ids == [f"J{i}" for i in range(5)]
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, matrix, rtol=1e-6)
+
+    # A slice (non-zero offset into the values buffer) decodes its own rows
+    job_ids, decoded = gold_embeddings(table.slice(2, 2))
+    assert job_ids == ["J2", "J3"]
+    np.testing.assert_allclose(decoded, matrix[2:4], rtol=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_gold_embeddings_empty_file() -> None:
+    from gcs_sync import gold_embeddings
+
+    # What databricks/export.py writes when gold has no rows for the batch date
+    table = _gold_tables(_unit_rows(0))["fixed_size_list"]
+    job_ids, decoded = gold_embeddings(pq.read_table(io.BytesIO(_parquet(table))))
+    assert job_ids == []
+    assert decoded.shape == (0, 384)
+
+
+@pytest.mark.asyncio
+async def test_gold_embeddings_drops_null_and_non_finite_rows() -> None:
+    import numpy as np
+    from gcs_sync import gold_embeddings
+
+    matrix = _unit_rows(4, seed=1)
+    matrix[1, 7] = np.nan
+    matrix[2, 0] = np.inf
+    values = pa.FixedSizeListArray.from_arrays(matrix.ravel(), 384)
+    embeddings = pa.array(
+        [*values.to_pylist(), None], type=pa.list_(pa.float32(), 384)
+    )  # 5th row: null
+    table = pa.table({"job_id": ["J0", "J1", "J2", "J3", "J4"], "embedding": embeddings})
+
+    job_ids, decoded = gold_embeddings(table)
+    assert job_ids == ["J0", "J3"]
+    np.testing.assert_array_equal(decoded, matrix[[0, 3]])
+
+
+@pytest.mark.asyncio
+async def test_gold_copy_payload_layout() -> None:
+    import struct
+
+    import numpy as np
+    from gcs_sync import gold_copy_payload
+
+    matrix = _unit_rows(2, seed=2)
+    payload = gold_copy_payload(["J1", "Jé"], matrix)
+
+    # Header: signature, flags, header extension length
+    assert payload[:11] == b"PGCOPY\n\xff\r\n\x00"
+    assert struct.unpack(">ii", payload[11:19]) == (0, 0)
+    pos = 19
+    for job_id, row in zip(["J1", "Jé"], matrix, strict=True):
+        encoded = job_id.encode("utf-8")
+        # 2-field tuple: job_id text
+        assert struct.unpack(">hi", payload[pos : pos + 6]) == (2, len(encoded))
+        pos += 6
+        assert payload[pos : pos + len(encoded)] == encoded
+        pos += len(encoded)
+        # vector: length 4 + 4 * dim, then int16 dim, int16 unused, big-endian float4
+        assert struct.unpack(">ihh", payload[pos : pos + 8]) == (4 + 4 * 384, 384, 0)
+        pos += 8
+        vector = np.frombuffer(payload[pos : pos + 4 * 384], dtype=">f4")
+        np.testing.assert_array_equal(vector, row)
+        pos += 4 * 384
+    # Trailer
+    assert payload[pos:] == struct.pack(">h", -1)
+
+
+@pytest.mark.asyncio
+async def test_insert_gold_copies_binary_payload() -> None:
+    from gcs_sync import GOLD_INSERT_SQL, gold_copy_payload, insert_gold
+
+    matrix = _unit_rows(3, seed=3)
+    table = _gold_tables(matrix)["fixed_size_list"]
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [("J0",), ("J2",)]
+
+    with patch("gcs_sync.add_lexeme_stats") as mock_stats:
+        insert_gold(cursor, table)
+
+    copy_sql, buf = cursor.copy_expert.call_args.args
+    assert "FORMAT binary" in copy_sql
+    assert buf.getvalue() == gold_copy_payload(["J0", "J1", "J2"], matrix)
+    cursor.execute.assert_any_call(GOLD_INSERT_SQL)
+    mock_stats.assert_called_once_with(cursor, ["J0", "J2"])
+
+
+@pytest.mark.asyncio
+async def test_silver_copy_table_drops_unknown_columns_and_encodes_nested_json() -> None:
+    from gcs_sync import silver_copy_table
+
+    table = pa.table(
+        {
+            "job_id": ["J1", "J2"],
+            "lieuTravail": ['{"libelle": "Paris"}', None],  # already encoded: kept as is
+            "competences": [[{"libelle": "Python"}], None],  # older nested file
+            "entreprise": [{"nom": "Acme"}, None],
+            "not_in_table": [1, 2],
+        }
+    )
+    columns = {"job_id", "lieutravail", "competences", "entreprise"}
+
+    result = silver_copy_table(table, columns)
+    assert result.column_names == ["job_id", "lieuTravail", "competences", "entreprise"]
+    assert result.column("lieuTravail").to_pylist() == ['{"libelle": "Paris"}', None]
+    assert result.column("competences").to_pylist() == ['[{"libelle": "Python"}]', None]
+    assert result.column("entreprise").to_pylist() == ['{"nom": "Acme"}', None]
+    for name in ("competences", "entreprise"):
+        assert pa.types.is_string(result.schema.field(name).type)
+
+
+@pytest.mark.asyncio
+async def test_silver_csv_keeps_null_distinct_from_empty_and_quotes() -> None:
+    from gcs_sync import silver_csv
+
+    table = pa.table(
+        {
+            "job_id": ["J1", "J2", "J3"],
+            "description": [None, "", 'Dit "bonjour"\nligne 2, fin'],
+            "nombrePostes": [1, None, 3],
+        }
+    )
+    assert silver_csv(table).getvalue() == (
+        b'"J1",,1\n"J2","",\n"J3","Dit ""bonjour""\nligne 2, fin",3\n'
+    )
+
+
+@pytest.mark.asyncio
+async def test_insert_silver_copies_known_columns() -> None:
+    from gcs_sync import SILVER_COLUMNS_SQL, insert_silver
+
+    cursor = MagicMock()
+    cursor.fetchall.return_value = [("job_id",), ("intitule",)]
+    table = pa.table({"job_id": ["J1"], "intitule": ["Dev"], "extra": ["x"]})
+
+    with patch("gcs_sync.sql.Composed.as_string", lambda self, ctx: repr(self)):
+        insert_silver(cursor, table)
+
+    assert "current_schema()" in SILVER_COLUMNS_SQL
+    copy_sql, buf = cursor.copy_expert.call_args.args
+    assert "silver_stage" in copy_sql
+    assert "extra" not in copy_sql
+    assert buf.getvalue() == b'"J1","Dev"\n'
@@ -0,0 +1,47 @@
+import os
+import re
+import subprocess  # nosec B404 -- runs the test interpreter only
+import sys
+from pathlib import Path
+
+import pytest
+
+API_DIR = Path(__file__).parent.parent / "api"
+
+# Budget for `import app` (cumulative, microseconds as reported by -X importtime).
+# Generous for slow CI runners; torch alone costs several seconds.
+IMPORT_TIME_BUDGET_US = int(os.getenv("IMPORT_TIME_BUDGET_US", "2500000"))
+
+# Loaded by the startup warmup or on first use, never at import
+LAZY_MODULES = {"torch", "sentence_transformers", "aiohttp", "pypdf", "gcsfs"}
+
+
+def _importtime(module: str) -> dict[str, int]:
+    """Cumulative import time (us) per top-level package imported by ``module``."""
+    result = subprocess.run(  # nosec B603 -- fixed arguments
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=API_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)", line)
+        if match:
+            name = match.group(2).split(".")[0]
+            times[name] = max(times.get(name, 0), int(match.group(1)))
+    return times
+
+
+@pytest.mark.asyncio
+async def test_import_app_skips_heavy_modules() -> None:
+    times = _importtime("app")
+    assert "app" in times
+    assert not LAZY_MODULES & set(times)
+
+
+@pytest.mark.asyncio
+async def test_import_app_within_budget() -> None:
+    times = _importtime("app")
+    assert times["app"] < IMPORT_TIME_BUDGET_US, f"import app took {times['app'] / 1e6:.2f}s"
@@ -146,6 +146,31 @@ async def test_serialize_json_col_converts_numpy() -> None:
     assert parsed == [1, 2.5, True]
 
 
+@pytest.mark.asyncio
+async def test_json_encode_expr_matches_serialize_json_col() -> None:
+    import json
+
+    from core import json_encode_expr, serialize_json_col
+
+    df = pl.DataFrame(
+        {
+            "lieuTravail": [{"libelle": "Évry", "codePostal": None}, None, {"libelle": 'a"b'}],
+            "competences": [[{"code": "1", "libelle": "Python"}], [], None],
+            "langues": [["fr", "en"], None, []],
+            "salaire": ['{"libelle": "Annuel"}', None, "{}"],
+        }
+    )
+    out = df.select(json_encode_expr(col, dtype) for col, dtype in df.schema.items())
+
+    for col in df.columns:
+        for native, value in zip(out[col].to_list(), df[col].to_list(), strict=True):
+            expected = serialize_json_col(value)
+            if expected is None:
+                assert native is None
+            else:
+                assert json.loads(native) == json.loads(expected)
+
+
 @pytest.mark.asyncio
 async def test_deduplicate_removes_duplicates() -> None:
     from core import _deduplicate
@@ -153,7 +178,7 @@ async def test_deduplicate_removes_duplicates() -> None:
     df = pl.DataFrame({"id": ["A", "B", "A", "C", "B"], "value": [1, 2, 3, 4, 5]})
     result = _deduplicate(df)
     assert len(result) == 3
-    assert list(result["id"]) == ["A", "B", "C"]
+    assert dict(zip(result["id"], result["value"], strict=True)) == {"A": 3, "B": 5, "C": 4}
 
 
 @pytest.mark.asyncio
@@ -165,12 +190,19 @@ async def test_deduplicate_no_id_column() -> None:
     assert len(result) == 3
 
 
+def _raw_bytes_without_manifest(path: str) -> bytes:
+    if path.endswith("_manifest.json"):
+        raise FileNotFoundError(path)
+    return b""
+
+
 @pytest.mark.asyncio
 async def test_list_raw_files_no_files() -> None:
     mock_fs = MagicMock()
+    mock_fs.cat_file = MagicMock(side_effect=FileNotFoundError)
     mock_fs.glob = MagicMock(side_effect=FileNotFoundError)
 
-    with patch("core.gcsfs.GCSFileSystem", return_value=mock_fs):
+    with patch("core.open_bucket", return_value=(mock_fs, "bucket")):
         from core import _list_raw_files
 
         result = _list_raw_files("test-bucket")
@@ -180,9 +212,10 @@ async def test_list_raw_files_no_files() -> None:
 @pytest.mark.asyncio
 async def test_list_raw_files_empty() -> None:
     mock_fs = MagicMock()
-    mock_fs.glob = MagicMock(return_value=[])
+    mock_fs.cat_file = MagicMock(side_effect=FileNotFoundError)
+    mock_fs.glob = MagicMock(return_value={})
 
-    with patch("core.gcsfs.GCSFileSystem", return_value=mock_fs):
+    with patch("core.open_bucket", return_value=(mock_fs, "bucket")):
         from core import _list_raw_files
 
         result = _list_raw_files("test-bucket")
@@ -192,25 +225,96 @@ async def test_list_raw_files_empty() -> None:
 @pytest.mark.asyncio
 async def test_list_raw_files_latest_only() -> None:
     files = [
-        "gs://bucket/jobs_raw/job_20250601.parquet",
-        "gs://bucket/jobs_raw/job_20250602.parquet",
+        "gs://bucket/jobs_raw/jobs_raw_20250602_080000.parquet",
+        "gs://bucket/jobs_raw/jobs_raw_20250601_080000.parquet",
     ]
     mock_fs = MagicMock()
-    mock_fs.glob = MagicMock(return_value=files)
+    mock_fs.cat_file = MagicMock(side_effect=FileNotFoundError)
+    # The listing's metadata is ignored when the name carries the write time
+    mock_fs.glob = MagicMock(return_value={path: {"updated": None} for path in files})
 
-    with patch("core.gcsfs.GCSFileSystem", return_value=mock_fs):
+    with patch("core.open_bucket", return_value=(mock_fs, "bucket")):
         from core import _list_raw_files
 
         result = _list_raw_files("bucket", days=None)
-        assert len(result) == 1
-        assert result[0] == files[-1]
+        assert result == [files[0]]
+        mock_fs.glob.assert_called_once_with("bucket/jobs_raw/*.parquet", detail=True)
+        mock_fs.info.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_list_raw_files_from_manifest() -> None:
+    import json
+    from datetime import datetime, timedelta
+
+    recent = datetime.now() - timedelta(hours=2)
+    manifest = {
+        "files": {
+            "backfill_a.parquet": {"written_at": "2025-01-01T00:00:00", "rows": 10},
+            "backfill_b.parquet": {"written_at": recent.isoformat(), "rows": 7},
+            "backfill_c.parquet": {"written_at": (recent - timedelta(hours=1)).isoformat()},
+        }
+    }
+    mock_fs = MagicMock()
+    mock_fs.cat_file = MagicMock(return_value=json.dumps(manifest).encode())
+    # Names carry no stamp: the write times come from the manifest
+    mock_fs.glob = MagicMock(
+        return_value={f"bucket/jobs_raw/{name}": {"updated": None} for name in manifest["files"]}
+    )
+
+    with patch("core.open_bucket", return_value=(mock_fs, "bucket")):
+        from core import _list_raw_files
+
+        assert _list_raw_files("bucket") == ["bucket/jobs_raw/backfill_b.parquet"]
+        assert _list_raw_files("bucket", days=1) == [
+            "bucket/jobs_raw/backfill_c.parquet",
+            "bucket/jobs_raw/backfill_b.parquet",
+        ]
+    mock_fs.cat_file.assert_called_with("bucket/jobs_raw/_manifest.json")
+    mock_fs.glob.assert_called_with("bucket/jobs_raw/*.parquet", detail=True)
+
+
+@pytest.mark.asyncio
+async def test_list_raw_files_cross_checks_manifest_with_listing() -> None:
+    import json
+    from datetime import datetime, timedelta
+
+    import fsspec
+
+    fs = fsspec.filesystem("memory")
+    raw_dir = "/raw-check/jobs_raw"
+    old = datetime.now() - timedelta(days=20)
+    recent_stamp = (datetime.now() - timedelta(hours=1)).strftime("%Y%m%d_%H%M%S")
+    fs.pipe_file(f"{raw_dir}/registered.parquet", b"x")
+    # Copied by hand (no manifest entry): selected through its name stamp
+    fs.pipe_file(f"{raw_dir}/jobs_raw_{recent_stamp}.parquet", b"x")
+    manifest = {
+        "files": {
+            "registered.parquet": {"written_at": old.isoformat(), "rows": 3},
+            # Deleted since it was registered: never selected
+            "deleted.parquet": {"written_at": datetime.now().isoformat(), "rows": 5},
+        }
+    }
+    fs.pipe_file(f"{raw_dir}/_manifest.json", json.dumps(manifest).encode())
+
+    with patch("core.open_bucket", return_value=(fs, "/raw-check")):
+        from core import _list_raw_files
+
+        assert _list_raw_files("raw-check") == [f"{raw_dir}/jobs_raw_{recent_stamp}.parquet"]
+        assert _list_raw_files("raw-check", days=30) == [
+            f"{raw_dir}/registered.parquet",
+            f"{raw_dir}/jobs_raw_{recent_stamp}.parquet",
+        ]
+    fs.rm("/raw-check", recursive=True)
 
 
 @pytest.mark.asyncio
 async def test_run_pipeline_basic() -> None:
     mock_fs = MagicMock()
-    mock_fs.glob = MagicMock(return_value=["gs://bucket/jobs_raw/test.parquet"])
-    mock_fs.info = MagicMock(return_value={"updated": "2025-06-01T00:00:00Z"})
+    mock_fs.cat_file = MagicMock(side_effect=_raw_bytes_without_manifest)
+    mock_fs.glob = MagicMock(
+        return_value={"gs://bucket/jobs_raw/test.parquet": {"updated": "2025-06-01T00:00:00Z"}}
+    )
 
     test_df = pl.DataFrame(
         {
@@ -228,8 +332,8 @@ async def test_run_pipeline_basic() -> None:
 
     with (
         patch("core._databricks_already_produced", return_value=False),
-        patch("core.gcsfs.GCSFileSystem", return_value=mock_fs),
-        patch("core.pl.read_parquet", return_value=test_df),
+        patch("core.open_bucket", return_value=(mock_fs, "bucket")),
+        patch("core.pl.scan_parquet", return_value=test_df.lazy()),
         patch("core.SentenceTransformer", return_value=mock_model),
         patch.object(pl.DataFrame, "write_parquet") as mock_write,
     ):
@@ -239,15 +343,17 @@ async def test_run_pipeline_basic() -> None:
         assert silver is not None
         assert gold is not None
         assert mock_model.encode.called
+        assert mock_model.encode.call_args.kwargs["normalize_embeddings"] is True
         assert mock_write.call_count == 2
 
 
 @pytest.mark.asyncio
 async def test_run_pipeline_no_files() -> None:
     mock_fs = MagicMock()
+    mock_fs.cat_file = MagicMock(side_effect=FileNotFoundError)
     mock_fs.glob = MagicMock(side_effect=FileNotFoundError)
 
-    with patch("core.gcsfs.GCSFileSystem", return_value=mock_fs):
+    with patch("core.open_bucket", return_value=(mock_fs, "bucket")):
         from core import run_pipeline
 
         silver, gold = run_pipeline("bucket")
@@ -258,8 +364,10 @@ async def test_run_pipeline_no_files() -> None:
 @pytest.mark.asyncio
 async def test_run_pipeline_with_duplicates() -> None:
     mock_fs = MagicMock()
-    mock_fs.glob = MagicMock(return_value=["gs://bucket/jobs_raw/test.parquet"])
-    mock_fs.info = MagicMock(return_value={"updated": "2025-06-01T00:00:00Z"})
+    mock_fs.cat_file = MagicMock(side_effect=_raw_bytes_without_manifest)
+    mock_fs.glob = MagicMock(
+        return_value={"gs://bucket/jobs_raw/test.parquet": {"updated": "2025-06-01T00:00:00Z"}}
+    )
 
     test_df = pl.DataFrame(
         {
@@ -277,8 +385,8 @@ async def test_run_pipeline_with_duplicates() -> None:
 
     with (
         patch("core._databricks_already_produced", return_value=False),
-        patch("core.gcsfs.GCSFileSystem", return_value=mock_fs),
-        patch("core.pl.read_parquet", return_value=test_df),
+        patch("core.open_bucket", return_value=(mock_fs, "bucket")),
+        patch("core.pl.scan_parquet", return_value=test_df.lazy()),
         patch("core.SentenceTransformer", return_value=mock_model),
         patch.object(pl.DataFrame, "write_parquet"),
     ):
@@ -294,8 +402,10 @@ async def test_run_pipeline_with_duplicates() -> None:
 @pytest.mark.asyncio
 async def test_run_pipeline_max_jobs() -> None:
     mock_fs = MagicMock()
-    mock_fs.glob = MagicMock(return_value=["gs://bucket/jobs_raw/test.parquet"])
-    mock_fs.info = MagicMock(return_value={"updated": "2025-06-01T00:00:00Z"})
+    mock_fs.cat_file = MagicMock(side_effect=_raw_bytes_without_manifest)
+    mock_fs.glob = MagicMock(
+        return_value={"gs://bucket/jobs_raw/test.parquet": {"updated": "2025-06-01T00:00:00Z"}}
+    )
 
     test_df = pl.DataFrame(
         {
@@ -313,8 +423,8 @@ async def test_run_pipeline_max_jobs() -> None:
 
     with (
         patch("core._databricks_already_produced", return_value=False),
-        patch("core.gcsfs.GCSFileSystem", return_value=mock_fs),
-        patch("core.pl.read_parquet", return_value=test_df),
+        patch("core.open_bucket", return_value=(mock_fs, "bucket")),
+        patch("core.pl.scan_parquet", return_value=test_df.lazy()),
         patch("core.SentenceTransformer", return_value=mock_model),
         patch.object(pl.DataFrame, "write_parquet"),
     ):
@@ -323,3 +433,136 @@ async def test_run_pipeline_max_jobs() -> None:
         silver, gold = run_pipeline("bucket", days=None, max_jobs=3)
         assert silver is not None
         assert len(mock_model.encode.call_args[0][0]) == 3
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_on_memory_filesystem() -> None:
+    import fsspec
+
+    fs = fsspec.filesystem("memory")
+    raw = pl.DataFrame(
+        {
+            "id": ["J1", "J2"],
+            "intitule": ["Dev Python", "Data Engineer"],
+            "description": ["<p>Python</p>", "Spark"],
+            "competences": [None, None],
+            "formations": [None, None],
+        }
+    )
+    with fs.open("/lake-test/jobs_raw/jobs_raw_20250601_080000.parquet", "wb") as f:
+        raw.write_parquet(f)
+
+    mock_model = MagicMock()
+    mock_model.encode = MagicMock(return_value=np.array([[0.1] * 384, [0.2] * 384]))
+    with patch("core.SentenceTransformer", return_value=mock_model):
+        from core import run_pipeline
+
+        silver, gold = run_pipeline("memory://lake-test", force=True)
+
+    assert silver.startswith("memory://") and "/lake-test/jobs_silver/" in silver
+    with fs.open(gold, "rb") as f:
+        df_gold = pl.read_parquet(f)
+    assert df_gold["job_id"].to_list() == ["J1", "J2"]
+    fs.rm("/lake-test", recursive=True)
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_keeps_latest_copy_of_duplicate_job() -> None:
+    import fsspec
+    from structlog.testing import capture_logs
+
+    fs = fsspec.filesystem("memory")
+    files = [("20250602_080000", "nouvelle", "J2"), ("20250601_080000", "ancienne", "J3")]
+    for stamp, description, other_id in files:
+        raw = pl.DataFrame(
+            {
+                "id": ["J1", other_id],
+                "intitule": ["Dev Python", "Data Engineer"],
+                "description": [description, "Spark"],
+            }
+        )
+        with fs.open(f"/lake-dup/jobs_raw/jobs_raw_{stamp}.parquet", "wb") as f:
+            raw.write_parquet(f)
+
+    mock_model = MagicMock()
+    mock_model.encode = MagicMock(side_effect=lambda texts, **_: np.zeros((len(texts), 384)))
+    with (
+        patch("core.SentenceTransformer", return_value=mock_model),
+        capture_logs() as logs,
+    ):
+        from core import run_pipeline
+
+        silver, _ = run_pipeline("memory://lake-dup", days=36500, force=True)
+
+    with fs.open(silver, "rb") as f:
+        df_silver = pl.read_parquet(f)
+    assert sorted(df_silver["job_id"]) == ["J1", "J2", "J3"]
+    assert df_silver.filter(pl.col("job_id") == "J1")["description"].item() == "nouvelle"
+    dedup = [e for e in logs if e["event"] == "deduplication"]
+    assert dedup == [{"event": "deduplication", "removed": 1, "kept": 3, "log_level": "info"}]
+    fs.rm("/lake-dup", recursive=True)
+
+
+@pytest.mark.asyncio
+async def test_build_gold_writes_fixed_size_list() -> None:
+    import io
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from core import build_gold
+
+    embeddings = np.random.default_rng(0).standard_normal((3, 384))
+    buf = io.BytesIO()
+    build_gold(["J1", "J2", "J3"], embeddings).write_parquet(buf)
+    table = pq.read_table(io.BytesIO(buf.getvalue()))
+
+    assert table.schema.field("embedding").type == pa.list_(pa.float32(), 384)
+    column = table.column("embedding").combine_chunks()
+    matrix = column.values.to_numpy().reshape(-1, 384)
+    np.testing.assert_array_equal(matrix, embeddings.astype(np.float32))
+
+
+@pytest.mark.asyncio
+async def test_write_outputs_publishes_batch_manifest() -> None:
+    import hashlib
+    import json
+
+    import fsspec
+    from core import _databricks_already_produced, batch_checksum, build_gold, write_outputs
+
+    fs = fsspec.filesystem("memory")
+    df_silver = pl.DataFrame({"job_id": ["J2", "J1"], "intitule": ["Data", "Dev"]})
+    df_gold = build_gold(["J2", "J1"], np.ones((2, 384), dtype=np.float32))
+    write_outputs(fs, "/batch-test", df_silver, df_gold)
+
+    (manifest_path,) = fs.glob("/batch-test/batches/batch_*.json")
+    manifest = json.loads(fs.cat_file(manifest_path))
+    assert manifest_path.endswith(f"batch_{manifest['batch_id']}.json")
+    assert manifest["producer"] == "polars"
+    assert manifest["checksum"] == batch_checksum(["J1", "J2"], ["J1", "J2"])
+    for layer in ("silver", "gold"):
+        (entry,) = manifest["files"][layer]
+        data = fs.cat_file(f"/batch-test/{entry['path']}")
+        assert entry["rows"] == 2
+        assert entry["sha256"] == hashlib.sha256(data).hexdigest()
+    # Only a Databricks manifest makes the fallback pipeline skip the day
+    assert not _databricks_already_produced("memory://batch-test")
+    fs.rm("/batch-test", recursive=True)
+
+
+@pytest.mark.asyncio
+async def test_batch_checksum_matches_databricks_export() -> None:
+    import importlib.util
+    from pathlib import Path
+
+    from core import batch_checksum
+
+    # databricks/common.py is the notebooks' copy: both producers must agree,
+    # ingest-db skips a batch whose checksum was already applied.
+    path = Path(__file__).parent.parent / "databricks" / "common.py"
+    spec = importlib.util.spec_from_file_location("databricks_common", path)
+    databricks_common = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(databricks_common)
+
+    for silver, gold in [(["J2", "J1"], ["J1"]), ([], []), ([1, "J3"], ["J3", 1])]:
+        assert databricks_common.batch_checksum(silver, gold) == batch_checksum(silver, gold)
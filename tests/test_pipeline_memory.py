@@ -0,0 +1,136 @@
+import json
+import os
+import random
+import subprocess  # nosec B404 -- runs the test interpreter only
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+PIPELINE_DIR = Path(__file__).parent.parent / "functions" / "pipeline"
+
+# Peak RSS growth of run_pipeline over its post-import baseline, for 50k
+# synthetic offers with a stub embedding model (the float32 embeddings alone
+# are 73 MB): about 410 MB with the single lazy plan, against 970 MB for the
+# previous stage-by-stage eager frames.
+PIPELINE_RSS_BUDGET_MB = int(os.getenv("PIPELINE_RSS_BUDGET_MB", "550"))
+N_OFFERS = 50_000
+
+# Runs in a fresh interpreter so the test process's own allocations (and the
+# Bronze generation below) do not count. RSS is sampled every few ms from
+# /proc, which includes the Rust/Arrow allocations tracemalloc cannot see.
+PROBE = """
+import json, sys, threading
+import numpy as np
+from unittest.mock import patch
+import core
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096
+
+class StubModel:
+    def encode(self, texts, **kwargs):
+        x = np.random.default_rng(len(texts)).standard_normal((len(texts), 384))
+        return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+base = rss()
+peak = [base]
+stop = threading.Event()
+
+def sample():
+    while not stop.wait(0.002):
+        peak[0] = max(peak[0], rss())
+
+sampler = threading.Thread(target=sample, daemon=True)
+sampler.start()
+with patch("core.SentenceTransformer", return_value=StubModel()):
+    silver, gold = core.run_pipeline(sys.argv[1], days=30, force=True)
+stop.set()
+sampler.join()
+print(json.dumps({"growth_mb": (max(peak[0], rss()) - base) / 2**20, "gold": gold}))
+"""
+
+WORDS = [
+    "expérience",
+    "équipe",
+    "projet",
+    "client",
+    "gestion",
+    "compétences",
+    "formation",
+    "poste",
+    "missions",
+    "entreprise",
+    "développement",
+    "analyse",
+    "données",
+    "qualité",
+    "sécurité",
+    "production",
+    "maintenance",
+    "logistique",
+    "commercial",
+    "service",
+    "accueil",
+    "organisation",
+    "python",
+    "sql",
+    "cloud",
+    "excel",
+    "vente",
+]
+
+
+def _text(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=n_words))
+
+
+def _write_bronze(raw_dir: Path, n: int, files: int = 2) -> None:
+    """Raw offers shaped like the France Travail API export (HTML, nested lists)."""
+    rng = random.Random(0)
+    paragraphs = [f"<p>{_text(rng, rng.randint(20, 80))}</p>" for _ in range(200)]
+    raw_dir.mkdir(parents=True)
+    per_file = n // files
+    for i in range(files):
+        rows = [
+            {
+                "id": f"M{i * per_file + j:08d}",
+                "intitule": _text(rng, 3),
+                "description": "<h2>Missions</h2>" + "".join(rng.choices(paragraphs, k=4)),
+                "lieuTravail": {"libelle": "75 - Paris", "codePostal": "75001"},
+                "entreprise": {"nom": f"Entreprise {rng.randrange(5000)}"},
+                "competences": [
+                    {"code": str(k), "libelle": _text(rng, 4)} for k in range(rng.randint(1, 6))
+                ],
+                "formations": [{"domaineLibelle": _text(rng, 2), "niveauLibelle": "Bac+3"}],
+                "qualitesProfessionnelles": [{"libelle": _text(rng, 2), "description": "d"}],
+                "typeContrat": "CDI",
+            }
+            for j in range(per_file)
+        ]
+        stamp = (datetime.now() - timedelta(hours=i)).strftime("%Y%m%d_%H%M%S")
+        pl.DataFrame(rows).write_parquet(raw_dir / f"jobs_raw_{stamp}.parquet")
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(sys.platform != "linux", reason="samples RSS from /proc")
+async def test_run_pipeline_peak_rss_within_budget(tmp_path: Path) -> None:
+    lake = tmp_path / "lake"
+    _write_bronze(lake / "jobs_raw", N_OFFERS)
+
+    result = subprocess.run(  # nosec B603 -- fixed arguments
+        [sys.executable, "-c", PROBE, f"file://{lake}"],
+        cwd=PIPELINE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert pl.read_parquet(report["gold"].removeprefix("file://")).height == N_OFFERS
+    assert report["growth_mb"] < PIPELINE_RSS_BUDGET_MB, (
+        f"run_pipeline peak RSS grew by {report['growth_mb']:.0f} MB for {N_OFFERS} offers"
+    )
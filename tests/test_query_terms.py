@@ -0,0 +1,45 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_select_query_terms_dedups_stems() -> None:
+    from query_terms import select_query_terms
+
+    result = select_query_terms(["développeur", "développeurs", "python"], None, 0)
+    assert result == ["développeur", "python"]
+
+
+@pytest.mark.asyncio
+async def test_select_query_terms_caps_without_stats() -> None:
+    from query_terms import select_query_terms
+
+    words = [f"mot{i}" for i in range(200)]
+    result = select_query_terms(words, None, 0, max_terms=10)
+    assert result == words[:10]
+
+
+@pytest.mark.asyncio
+async def test_select_query_terms_drops_frequent_and_ranks_by_idf() -> None:
+    from query_terms import select_query_terms, stem
+
+    doc_freq = {stem("python"): 50, stem("kubernetes"): 5, stem("poste"): 900}
+    result = select_query_terms(["poste", "python", "kubernetes"], doc_freq, 1000)
+    assert result == ["kubernetes", "python"]
+
+
+@pytest.mark.asyncio
+async def test_select_query_terms_unknown_stems_fill_last() -> None:
+    from query_terms import select_query_terms, stem
+
+    doc_freq = {stem("python"): 50}
+    result = select_query_terms(["zzzinconnu", "python"], doc_freq, 1000, max_terms=1)
+    assert result == ["python"]
+
+
+@pytest.mark.asyncio
+async def test_build_tsquery_quotes_terms() -> None:
+    from query_terms import build_tsquery
+
+    assert build_tsquery(["python", "c++"]) == "'python' | 'c++'"
+    assert build_tsquery(["l'équipe"]) == "'l''équipe'"
+    assert build_tsquery([]) == ""
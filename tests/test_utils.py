@@ -5,7 +5,7 @@ import pytest
 
 @pytest.mark.asyncio
 async def test_extract_text_from_pdf_with_text(sample_pdf_bytes: bytes) -> None:
-    from utils import extract_text_from_pdf
+    from pdf_extract import extract_text_from_pdf
 
     result = extract_text_from_pdf(sample_pdf_bytes)
     assert result == "Développeur Python backend"
@@ -13,7 +13,7 @@ async def test_extract_text_from_pdf_with_text(sample_pdf_bytes: bytes) -> None:
 
 @pytest.mark.asyncio
 async def test_extract_text_from_pdf_empty(pdf_with_no_text: bytes) -> None:
-    from utils import extract_text_from_pdf
+    from pdf_extract import extract_text_from_pdf
 
     result = extract_text_from_pdf(pdf_with_no_text)
     assert result == ""
@@ -21,13 +21,159 @@ async def test_extract_text_from_pdf_empty(pdf_with_no_text: bytes) -> None:
 
 @pytest.mark.asyncio
 async def test_extract_text_from_pdf_invalid() -> None:
+    from pdf_extract import extract_text_from_pdf
     from pypdf.errors import PdfReadError
-    from utils import extract_text_from_pdf
 
     with pytest.raises(PdfReadError):
         extract_text_from_pdf(b"not-a-valid-pdf")
 
 
+@pytest.mark.asyncio
+async def test_extract_text_from_pdf_page_cap(sample_pdf_bytes: bytes) -> None:
+    from pdf_extract import PdfExtractionError, extract_text_from_pdf
+
+    with pytest.raises(PdfExtractionError) as exc_info:
+        extract_text_from_pdf(sample_pdf_bytes, max_pages=0)
+    assert exc_info.value.code == "too_many_pages"
+
+
+def _two_page_pdf(pdf_bytes: bytes) -> bytes:
+    import io
+
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for _ in range(2):
+        writer.add_page(PdfReader(io.BytesIO(pdf_bytes)).pages[0])
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_extract_text_from_pdf_reads_pages_up_to_limit(sample_pdf_bytes: bytes) -> None:
+    from pdf_extract import extract_text_from_pdf
+
+    pdf = _two_page_pdf(sample_pdf_bytes)
+    assert extract_text_from_pdf(pdf, text_pages=5).count("Python backend") == 2
+    assert extract_text_from_pdf(pdf, text_pages=1).count("Python backend") == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("extractor", ["pdfminer", "pypdfium2"])
+async def test_extract_text_from_pdf_optional_backends(
+    sample_pdf_bytes: bytes, extractor: str
+) -> None:
+    pytest.importorskip(extractor)
+    from pdf_extract import PdfExtractionError, extract_text_from_pdf
+
+    pdf = _two_page_pdf(sample_pdf_bytes)
+    assert extract_text_from_pdf(pdf, text_pages=5, extractor=extractor).count("Python") == 2
+    with pytest.raises(PdfExtractionError):
+        extract_text_from_pdf(pdf, max_pages=1, extractor=extractor)
+
+
+@pytest.mark.asyncio
+async def test_missing_extractor_falls_back_to_pypdf(sample_pdf_bytes: bytes) -> None:
+    from pdf_extract import _resolve_extractor, extract_text_from_pdf
+
+    _resolve_extractor.cache_clear()
+    try:
+        with patch("pdf_extract.importlib.util.find_spec", return_value=None):
+            assert _resolve_extractor("pypdfium2") == "pypdf"
+            assert "Python backend" in extract_text_from_pdf(
+                sample_pdf_bytes, extractor="pypdfium2"
+            )
+    finally:
+        _resolve_extractor.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_extract_worker_cpu_timeout() -> None:
+    from pdf_extract import PdfExtractionError, _extract_worker
+
+    def _spin(file_bytes: bytes, max_pages: int, text_pages: int, extractor: str) -> str:
+        while True:
+            pass
+
+    with (
+        patch("pdf_extract.extract_text_from_pdf", _spin),
+        pytest.raises(PdfExtractionError) as exc_info,
+    ):
+        _extract_worker(b"%PDF", 20, 5, "pypdf", 0.2)
+    assert exc_info.value.code == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_extract_text_async_runs_in_pool(sample_pdf_bytes: bytes) -> None:
+    from pdf_extract import extract_text_async
+
+    result = await extract_text_async(sample_pdf_bytes)
+    assert "Python backend" in result
+
+
+class _FakePool:
+    """Executor whose first instance hangs; shutting it down breaks its futures."""
+
+    instances: list["_FakePool"] = []
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        self.pending: list = []
+        self.closed = False
+        _FakePool.instances.append(self)
+
+    def submit(self, fn: object, file_bytes: bytes, *args: object):  # noqa: ANN202
+        from concurrent.futures import Future
+
+        future: Future = Future()
+        if file_bytes == b"slow" or len(_FakePool.instances) == 1:
+            self.pending.append(future)
+        else:
+            future.set_result("texte extrait")
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        from concurrent.futures.process import BrokenProcessPool
+
+        self.closed = True
+        for future in self.pending:
+            if not future.done():
+                future.set_exception(BrokenProcessPool("killed"))
+
+
+@pytest.mark.asyncio
+async def test_pool_reset_spares_concurrent_extraction() -> None:
+    import asyncio
+
+    import pdf_extract
+    from pdf_extract import PdfExtractionError, extract_text_async
+
+    async def _later_upload() -> str:
+        await asyncio.sleep(0.02)
+        return await extract_text_async(b"ok")
+
+    _FakePool.instances = []
+    with (
+        patch.object(pdf_extract, "_executor", None),
+        patch("pdf_extract.ProcessPoolExecutor", _FakePool),
+        patch("pdf_extract.settings.pdf_cpu_timeout", 0.05),
+        patch("pdf_extract._WALL_CLOCK_MARGIN", 0.0),
+    ):
+        slow, other = await asyncio.gather(
+            extract_text_async(b"slow"), _later_upload(), return_exceptions=True
+        )
+        assert isinstance(slow, PdfExtractionError) and slow.code == "timeout"
+        # The other upload lost its worker to the reset and was retried
+        assert other == "texte extrait"
+        first, second = _FakePool.instances
+        assert first.closed and not second.closed
+        assert pdf_extract._executor is second
+
+        # A late failure of the replaced pool leaves the current one alone
+        pdf_extract._reset_executor(first)
+        assert pdf_extract._executor is second and not second.closed
+
+
 @pytest.mark.asyncio
 async def test_linear_mapping_normal() -> None:
     from utils import linear_mapping
@@ -131,3 +277,252 @@ async def test_search_jobs_vector_hybrid_returns_results() -> None:
         assert results[0]["job_id"] == "123ABC"
         assert "similarity_score" in results[0]
         assert "matching_terms" in results[0]
+
+
+@pytest.mark.asyncio
+async def test_warmup_pool_bounds_the_connection_wait() -> None:
+    mock_pool = AsyncMock()
+    mock_conn = AsyncMock()
+    mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_conn.__aexit__ = AsyncMock(return_value=None)
+    mock_pool.connection = MagicMock(return_value=mock_conn)
+
+    with (
+        patch("utils._get_pool", AsyncMock(return_value=mock_pool)),
+        patch("utils.settings.db_connect_timeout", 3.0),
+    ):
+        from utils import warmup_pool
+
+        await warmup_pool()
+        mock_pool.wait.assert_awaited_once_with(timeout=3.0)
+        mock_conn.execute.assert_awaited_once_with("SELECT 1")
+
+
+@pytest.mark.asyncio
+async def test_search_jobs_vector_hybrid_binary_mode_uses_coarse_candidates() -> None:
+    mock_pool = AsyncMock()
+    mock_conn = AsyncMock()
+    mock_cursor = AsyncMock()
+    mock_cursor.__aenter__ = AsyncMock(return_value=mock_cursor)
+    mock_cursor.__aexit__ = AsyncMock(return_value=None)
+    mock_cursor.execute = AsyncMock()
+    mock_cursor.fetchall = AsyncMock(return_value=[])
+    mock_conn.cursor = MagicMock(return_value=mock_cursor)
+    mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_conn.__aexit__ = AsyncMock(return_value=None)
+    mock_pool.connection = MagicMock(return_value=mock_conn)
+
+    with (
+        patch("utils._get_pool", AsyncMock(return_value=mock_pool)),
+        patch("utils.settings.embedding_search_mode", "binary"),
+        patch("utils.settings.embedding_coarse_candidates", 500),
+    ):
+        from utils import search_jobs_vector_hybrid
+
+        await search_jobs_vector_hybrid(
+            embedding=[0.1] * 384, cv_text_fts="python", cv_text_orig="Python"
+        )
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "binary_quantize" in sql
+        assert params["coarse_limit"] == 500
+
+
+@pytest.mark.asyncio
+async def test_search_jobs_vector_hybrid_full_mode_uses_hnsw_candidates() -> None:
+    mock_pool = AsyncMock()
+    mock_conn = AsyncMock()
+    mock_cursor = AsyncMock()
+    mock_cursor.__aenter__ = AsyncMock(return_value=mock_cursor)
+    mock_cursor.__aexit__ = AsyncMock(return_value=None)
+    mock_cursor.execute = AsyncMock()
+    mock_cursor.fetchall = AsyncMock(return_value=[])
+    mock_conn.cursor = MagicMock(return_value=mock_cursor)
+    mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_conn.__aexit__ = AsyncMock(return_value=None)
+    mock_pool.connection = MagicMock(return_value=mock_conn)
+
+    with (
+        patch("utils._get_pool", AsyncMock(return_value=mock_pool)),
+        patch("utils.settings.embedding_search_mode", "full"),
+        patch("utils.settings.embedding_coarse_candidates", 5000),
+    ):
+        from utils import search_jobs_vector_hybrid
+
+        await search_jobs_vector_hybrid(
+            embedding=[0.1] * 384, cv_text_fts="python", cv_text_orig="Python"
+        )
+        (settings_sql, settings_params), (sql, _) = (
+            c.args for c in mock_cursor.execute.call_args_list
+        )
+        # The ORDER BY ... LIMIT shape the vector_ip_ops HNSW index can serve
+        assert "ORDER BY embedding <#> (SELECT q FROM params)" in sql
+        assert "LIMIT %(coarse_limit)s" in sql
+        assert "hnsw.ef_search" in settings_sql
+        assert settings_params == ("1000",)  # pgvector's maximum
+
+
+@pytest.mark.asyncio
+async def test_search_jobs_vector_hybrid_binds_inputs_once_prepared() -> None:
+    from pgvector import Vector
+
+    mock_pool = AsyncMock()
+    mock_conn = AsyncMock()
+    mock_cursor = AsyncMock()
+    mock_cursor.__aenter__ = AsyncMock(return_value=mock_cursor)
+    mock_cursor.__aexit__ = AsyncMock(return_value=None)
+    mock_cursor.execute = AsyncMock()
+    mock_cursor.fetchall = AsyncMock(return_value=[])
+    mock_conn.cursor = MagicMock(return_value=mock_cursor)
+    mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_conn.__aexit__ = AsyncMock(return_value=None)
+    mock_pool.connection = MagicMock(return_value=mock_conn)
+
+    with patch("utils._get_pool", AsyncMock(return_value=mock_pool)):
+        from utils import search_jobs_vector_hybrid
+
+        await search_jobs_vector_hybrid(
+            embedding=[0.1] * 384, cv_text_fts="python", cv_text_orig="Python"
+        )
+        call = mock_cursor.execute.call_args
+        sql, params = call.args
+        assert call.kwargs["prepare"] is True
+        assert isinstance(params["embedding"], Vector)
+        assert sql.count("%(embedding)b") == 1
+        assert sql.count("%(tsquery)s") == 1
+
+
+@pytest.mark.asyncio
+async def test_search_jobs_vector_hybrid_uses_in_memory_lexeme_stats() -> None:
+    from query_terms import stem
+
+    mock_pool = AsyncMock()
+    mock_conn = AsyncMock()
+    mock_cursor = AsyncMock()
+    mock_cursor.__aenter__ = AsyncMock(return_value=mock_cursor)
+    mock_cursor.__aexit__ = AsyncMock(return_value=None)
+    mock_cursor.execute = AsyncMock()
+    mock_cursor.fetchall = AsyncMock(return_value=[])
+    mock_conn.cursor = MagicMock(return_value=mock_cursor)
+    mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_conn.__aexit__ = AsyncMock(return_value=None)
+    mock_pool.connection = MagicMock(return_value=mock_conn)
+
+    with (
+        patch("utils._get_pool", AsyncMock(return_value=mock_pool)),
+        patch("utils._lexeme_doc_freq", {stem("poste"): 900, stem("python"): 10}),
+        patch("utils._lexeme_total_docs", 1000),
+        patch("utils._lexeme_stats_loaded_at", 0.0),
+    ):
+        from utils import _load_lexeme_stats, search_jobs_vector_hybrid
+
+        await search_jobs_vector_hybrid(
+            embedding=[0.1] * 384, cv_text_fts="poste python", cv_text_orig="Poste Python"
+        )
+        _, params = mock_cursor.execute.call_args.args
+        assert params["tsquery"] == "'python'"
+        assert not _load_lexeme_stats.called
+
+
+EXPLAIN_JSON = [
+    {
+        "Plan": {
+            "Node Type": "Limit",
+            "Actual Total Time": 42.0,
+            "Actual Rows": 100,
+            "Actual Loops": 1,
+            "Plans": [
+                {
+                    "Node Type": "Sort",
+                    "Actual Total Time": 40.0,
+                    "Actual Rows": 100,
+                    "Actual Loops": 1,
+                    "Sort Method": "external merge",
+                    "Sort Space Type": "Disk",
+                    "Sort Space Used": 8192,
+                    "Temp Written Blocks": 1024,
+                    "Plans": [
+                        {
+                            "Node Type": "Seq Scan",
+                            "Relation Name": "jobs",
+                            "Actual Total Time": 5.0,
+                            "Actual Rows": 2000,
+                            "Actual Loops": 2,
+                            "Shared Hit Blocks": 300,
+                            "Shared Read Blocks": 12,
+                        }
+                    ],
+                }
+            ],
+        },
+        "Planning Time": 1.5,
+        "Execution Time": 42.5,
+    }
+]
+
+
+@pytest.mark.asyncio
+async def test_summarize_plan_self_times_and_spills() -> None:
+    from query_plan import summarize_plan
+
+    summary = summarize_plan(EXPLAIN_JSON)
+    assert summary["execution_ms"] == 42.5
+    assert summary["spilled"] is True
+    limit, sort, scan = summary["nodes"]
+    assert limit["node"] == "Limit" and limit["self_ms"] == 2.0
+    assert sort["self_ms"] == 30.0  # 40 - 2 loops x 5
+    assert sort["sort_method"] == "external merge" and sort["spilled"] is True
+    assert scan["node"] == "Seq Scan jobs"
+    assert scan["rows"] == 4000 and scan["spilled"] is False
+
+
+@pytest.mark.asyncio
+async def test_plan_samples_cli_parses_console_log_lines() -> None:
+    import importlib.util
+    import json
+    from pathlib import Path
+
+    import structlog
+    from query_plan import SAMPLE_EVENT, summarize_plan
+
+    path = Path(__file__).parent.parent / "scripts" / "plan_samples.py"
+    spec = importlib.util.spec_from_file_location("plan_samples", path)
+    assert spec is not None and spec.loader is not None
+    plan_samples = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(plan_samples)
+
+    sample = json.dumps(summarize_plan(EXPLAIN_JSON), separators=(",", ":"))
+    line = structlog.dev.ConsoleRenderer(colors=False)(
+        None, "info", {"event": SAMPLE_EVENT, "spilled": True, "sample": sample}
+    )
+    report = plan_samples.aggregate(plan_samples.parse_samples([line, "unrelated line"]))
+    assert report["samples"] == 1
+    assert report["spill_rate"] == 1.0
+    assert report["nodes"][0]["node"] == "Sort"
+
+
+@pytest.mark.asyncio
+async def test_search_jobs_vector_hybrid_samples_query_plan() -> None:
+    mock_pool = AsyncMock()
+    mock_conn = AsyncMock()
+    mock_cursor = AsyncMock()
+    mock_cursor.__aenter__ = AsyncMock(return_value=mock_cursor)
+    mock_cursor.__aexit__ = AsyncMock(return_value=None)
+    mock_cursor.execute = AsyncMock()
+    mock_cursor.fetchall = AsyncMock(return_value=[])
+    mock_conn.cursor = MagicMock(return_value=mock_cursor)
+    mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_conn.__aexit__ = AsyncMock(return_value=None)
+    mock_pool.connection = MagicMock(return_value=mock_conn)
+
+    with (
+        patch("utils._get_pool", AsyncMock(return_value=mock_pool)),
+        patch("utils.settings.explain_sample_rate", 1.0),
+        patch("utils.log_query_plan", new_callable=AsyncMock) as mock_explain,
+    ):
+        from utils import search_jobs_vector_hybrid
+
+        await search_jobs_vector_hybrid(
+            embedding=[0.1] * 384, cv_text_fts="python", cv_text_orig="Python"
+        )
+        sql, params = mock_cursor.execute.call_args.args
+        mock_explain.assert_awaited_once_with(mock_conn, sql, params, "full")
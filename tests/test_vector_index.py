@@ -0,0 +1,202 @@
+import json
+import os
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+
+def _write_version(root: Path, version: str, job_ids: list[str], embeddings: np.ndarray) -> None:
+    path = root / version
+    path.mkdir(parents=True)
+    np.save(path / "job_ids.npy", np.asarray(job_ids, dtype=str))
+    np.save(path / "embeddings.npy", embeddings)
+    (path / "meta.json").write_text(
+        json.dumps({"version": version, "rows": len(job_ids), "created_at": time.time()})
+    )
+    (root / "LATEST").write_text(version)
+
+
+def _unit(rng: np.random.Generator, n: int) -> np.ndarray:
+    vecs = rng.standard_normal((n, 384)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+@pytest.mark.asyncio
+async def test_top_n_matches_exact_ranking(tmp_path: Path) -> None:
+    from vector_index import VectorIndex
+
+    rng = np.random.default_rng(0)
+    embeddings = _unit(rng, 500)
+    job_ids = [f"J{i:04d}" for i in range(500)]
+    _write_version(tmp_path, "20260101_000000", job_ids, embeddings)
+
+    index = VectorIndex(str(tmp_path))
+    index.refresh(force=True)
+    query = embeddings[42]
+    expected = [job_ids[i] for i in np.argsort(-(embeddings @ query))[:20]]
+    assert index.top_n(query, 20) == expected
+    assert index.top_n(query, 1) == ["J0042"]
+
+
+@pytest.mark.asyncio
+async def test_float32_snapshot_is_memory_mapped(tmp_path: Path) -> None:
+    from vector_index import VectorIndex
+
+    embeddings = _unit(np.random.default_rng(5), 10)
+    _write_version(tmp_path, "20260101_000000", [str(i) for i in range(10)], embeddings)
+
+    index = VectorIndex(str(tmp_path))
+    index.refresh(force=True)
+    assert isinstance(index.embeddings, np.memmap)
+    assert index.top_n(embeddings[7], 1) == ["7"]
+
+
+@pytest.mark.asyncio
+async def test_float16_snapshot_is_upcast(tmp_path: Path) -> None:
+    from vector_index import VectorIndex
+
+    embeddings = _unit(np.random.default_rng(1), 10).astype(np.float16)
+    _write_version(tmp_path, "20260101_000000", [str(i) for i in range(10)], embeddings)
+
+    index = VectorIndex(str(tmp_path))
+    index.refresh(force=True)
+    assert index.embeddings is not None
+    assert index.embeddings.dtype == np.float32
+    assert index.top_n(embeddings[3].astype(np.float32), 1) == ["3"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_lexeme_stats_are_loaded(tmp_path: Path) -> None:
+    from vector_index import VectorIndex
+
+    _write_version(tmp_path, "20260101_000000", ["A", "B"], _unit(np.random.default_rng(4), 2))
+    version_dir = tmp_path / "20260101_000000"
+    np.save(version_dir / "lexemes.npy", np.asarray(["python", "develop"], dtype=str))
+    np.save(version_dir / "lexeme_ndoc.npy", np.asarray([1, 2], dtype=np.int32))
+
+    index = VectorIndex(str(tmp_path))
+    assert index.refresh(force=True) is True
+    assert index.lexeme_doc_freq == {"python": 1, "develop": 2}
+    assert index.total_docs == 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_picks_up_new_version(tmp_path: Path) -> None:
+    from vector_index import VectorIndex
+
+    rng = np.random.default_rng(2)
+    _write_version(tmp_path, "20260101_000000", ["A", "B"], _unit(rng, 2))
+    index = VectorIndex(str(tmp_path), check_interval=3600)
+    index.refresh()
+    assert index.version == "20260101_000000"
+
+    _write_version(tmp_path, "20260102_000000", ["A", "B", "C"], _unit(rng, 3))
+    assert index.refresh() is False  # within check_interval: not polled
+    assert index.version == "20260101_000000"
+
+    assert index.refresh(force=True) is True
+    assert index.version == "20260102_000000"
+    status = index.status()
+    assert status["rows"] == 3
+    assert status["stale"] is False
+
+
+@pytest.mark.asyncio
+async def test_refresh_swaps_state_as_a_whole(tmp_path: Path) -> None:
+    from dataclasses import FrozenInstanceError
+
+    from vector_index import VectorIndex
+
+    rng = np.random.default_rng(6)
+    first = _unit(rng, 2)
+    _write_version(tmp_path, "20260101_000000", ["A", "B"], first)
+    index = VectorIndex(str(tmp_path))
+    index.refresh(force=True)
+    pinned = index.state
+
+    _write_version(tmp_path, "20260102_000000", ["C", "D", "E"], _unit(rng, 3))
+    assert index.refresh(force=True) is True
+    assert index.state is not pinned
+    # A reader holding the previous state keeps a consistent version
+    assert pinned.version == "20260101_000000"
+    assert index.top_n(first[1], 2, pinned) == ["B", "A"]
+    assert len(index.top_n(first[1], 3)) == 3
+    with pytest.raises(FrozenInstanceError):
+        pinned.version = "x"  # type: ignore[misc]
+
+
+@pytest.mark.asyncio
+async def test_status_stale_when_too_old(tmp_path: Path) -> None:
+    from vector_index import VectorIndex
+
+    _write_version(tmp_path, "20260101_000000", ["A"], _unit(np.random.default_rng(3), 1))
+    meta = tmp_path / "20260101_000000" / "meta.json"
+    meta.write_text(json.dumps({"created_at": time.time() - 7200}))
+
+    index = VectorIndex(str(tmp_path))
+    index.refresh(force=True)
+    with patch("vector_index.settings.vector_snapshot_max_age", 3600):
+        assert index.status()["stale"] is True
+
+
+@pytest.mark.asyncio
+async def test_missing_snapshot_is_not_loaded(tmp_path: Path) -> None:
+    from vector_index import VectorIndex
+
+    index = VectorIndex(os.fspath(tmp_path / "absent"))
+    index.refresh(force=True)
+    assert index.version is None
+    assert index.top_n(np.zeros(384, dtype=np.float32), 10) == []
+    assert index.status() == {"enabled": True, "loaded": False, "version": None}
+
+
+@pytest.mark.asyncio
+async def test_embed_cv_and_search_passes_replica_candidates() -> None:
+    mock_model = MagicMock()
+    mock_model.encode = MagicMock(return_value=MagicMock(tolist=lambda: [0.1] * 384))
+    mock_index = MagicMock()
+    mock_index.version = "20260101_000000"
+    mock_index.top_n = MagicMock(return_value=["J2", "J1"])
+
+    with (
+        patch("embed_cv_search._get_model", return_value=mock_model),
+        patch("embed_cv_search.get_vector_index", return_value=mock_index),
+        patch("embed_cv_search.search_jobs_vector_hybrid", new_callable=AsyncMock) as mock_search,
+    ):
+        mock_search.return_value = []
+        from embed_cv_search import embed_cv_and_search
+
+        await embed_cv_and_search("Développeur Python")
+        assert mock_search.call_args.kwargs["embed_candidates"] == ["J2", "J1"]
+
+
+@pytest.mark.asyncio
+async def test_search_jobs_vector_hybrid_replica_ranks_given_ids() -> None:
+    mock_pool = AsyncMock()
+    mock_conn = AsyncMock()
+    mock_cursor = AsyncMock()
+    mock_cursor.__aenter__ = AsyncMock(return_value=mock_cursor)
+    mock_cursor.__aexit__ = AsyncMock(return_value=None)
+    mock_cursor.execute = AsyncMock()
+    mock_cursor.fetchall = AsyncMock(return_value=[])
+    mock_conn.cursor = MagicMock(return_value=mock_cursor)
+    mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_conn.__aexit__ = AsyncMock(return_value=None)
+    mock_pool.connection = MagicMock(return_value=mock_conn)
+
+    with patch("utils._get_pool", AsyncMock(return_value=mock_pool)):
+        from utils import search_jobs_vector_hybrid
+
+        await search_jobs_vector_hybrid(
+            embedding=[0.1] * 384,
+            cv_text_fts="python",
+            cv_text_orig="Python",
+            embed_candidates=["J2", "J1"],
+        )
+        sql, params = mock_cursor.execute.call_args.args
+        assert "WITH ORDINALITY" in sql
+        assert "ROW_NUMBER() OVER (ORDER BY g.embedding" not in sql
+        assert params["embed_ids"] == ["J2", "J1"]